@@ -0,0 +1,157 @@
+"""
+Generación de correos mediante la Batch API de OpenAI para campañas sin requisitos de latencia.
+
+Todos los prompts de correo (construidos con `build_email_request` a partir de
+`profile`) se agrupan en un único archivo JSONL que se envía como un batch. El
+proceso espera a que termine y vuelca cada respuesta en el contexto de su lead. El
+batch cuesta aproximadamente la mitad y no consume la cuota de peticiones en vivo.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from agent_tools.tool_generate_outbound_email import (
+    EMAIL_MODEL,
+    build_email_request,
+    extract_subject,
+)
+from models.sales import SalesContext
+from miscs.metrics import METRICS, cached_tokens
+from miscs.openai_client import get_async_openai_client
+from miscs.providers import load_config
+
+load_config()
+
+logger = logging.getLogger("batch_email")
+
+BATCH_ENDPOINT = "/v1/responses"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = float(os.environ.get("EMAIL_BATCH_POLL_INTERVAL", "30"))
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_jsonl(contexts: List[SalesContext]) -> bytes:
+    """
+    Construir el archivo JSONL del batch, una petición por lead con perfil.
+
+    El `custom_id` es la posición del contexto en la lista, para poder mapear las
+    respuestas de vuelta aunque lleguen desordenadas.
+    """
+    lines = []
+    for index, context in enumerate(contexts):
+        if not context.profile:
+            continue
+        lines.append(
+            json.dumps(
+                {
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": build_email_request(context),
+                },
+                ensure_ascii=False,
+            )
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _response_text(body: Dict[str, Any]) -> str:
+    """Concatenar el texto de salida de una respuesta de la API de Responses en JSON"""
+    parts = []
+    for item in body.get("output", []):
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content", []):
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts)
+
+
+async def wait_for_batch(client, batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL):
+    """Consultar el estado del batch hasta que llegue a un estado final"""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            return batch
+        logger.info(f"Batch {batch_id} en estado {batch.status}")
+        await asyncio.sleep(poll_interval)
+
+
+async def generate_emails_in_batch(
+    contexts: List[SalesContext],
+    client=None,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+) -> int:
+    """
+    Generar los correos de todos los contextos con un único batch.
+
+    Args:
+        contexts: Contextos de los leads ya investigados; se actualizan con
+            `email_draft` y `email_subject`
+        client: Cliente AsyncOpenAI (o un doble compatible); por defecto el compartido
+        poll_interval: Segundos entre consultas del estado del batch
+
+    Returns:
+        Número de correos generados
+    """
+    client = client or get_async_openai_client()
+    payload = build_batch_jsonl(contexts)
+    if not payload.strip():
+        print("No hay leads con perfil para generar correos en batch")
+        return 0
+
+    input_file = await client.files.create(
+        file=("emails.jsonl", payload), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+    )
+    print(f"📦 Batch de correos enviado: {batch.id}")
+
+    started = time.perf_counter()
+    batch = await wait_for_batch(client, batch.id, poll_interval)
+    METRICS.record("batch", "email", time.perf_counter() - started)
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"El batch {batch.id} terminó con estado {batch.status}")
+        return 0
+
+    output = await client.files.content(batch.output_file_id)
+    generated = 0
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        context = contexts[int(record["custom_id"])]
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.error(
+                f"Correo no generado para {context.name}: "
+                f"{record.get('error') or response.get('status_code')}"
+            )
+            continue
+
+        body = response["body"]
+        email = _response_text(body)
+        context.email_draft = email
+        context.email_subject = extract_subject(email + "\n")
+        generated += 1
+
+        usage = body.get("usage") or {}
+        METRICS.record(
+            "llm",
+            "email_batch",
+            0.0,
+            f"{EMAIL_MODEL} (batch)",
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+            lead=context.name,
+            cached_tokens=cached_tokens(usage),
+        )
+
+    print(f"✅ Batch completado: {generated}/{len(contexts)} correos generados")
+    return generated
@@ -0,0 +1,69 @@
+"""
+Herramientas (`function_tool`) que usa el grafo de agentes de multi_agents.py.
+
+Envuelven las implementaciones de cada módulo de `agent_tools`. Están separadas de ellas
+porque importar el SDK de agentes es caro: el pipeline determinista y los trabajos por
+lotes no importan este módulo.
+"""
+from typing import Optional
+
+from agents import RunContextWrapper, function_tool
+
+from agent_tools.research_lead_with_tavily import research_lead
+from agent_tools.scrape_and_extract_linkedin_profile import scrape_linkedin_profile
+from agent_tools.tavily_search import search_tavily
+from agent_tools.tool_generate_outbound_email import write_outbound_email
+from models.sales import SalesContext
+
+
+@function_tool
+async def research_lead_with_tavily(
+    wrapper: RunContextWrapper[SalesContext], name: str, linkedin_url: str = None
+) -> str:
+    """Investigar un lead utilizando la búsqueda web de Tavily y formatear los resultados similar a un perfil de LinkedIn"""
+    profile = await research_lead(wrapper.context, name, linkedin_url)
+    return profile.to_prompt()
+
+
+@function_tool
+async def extract_linkedin_profile(
+    wrapper: RunContextWrapper[SalesContext], linkedin_url: str
+) -> str:
+    """Extraer datos de perfil de una URL de LinkedIn"""
+    profile = await scrape_linkedin_profile(wrapper.context, linkedin_url)
+    return profile.to_prompt()
+
+
+@function_tool
+async def generate_email(
+    wrapper: RunContextWrapper[SalesContext],
+) -> str:
+    """Generar un correo electrónico de ventas personalizado basado en los datos del perfil de LinkedIn"""
+    return await write_outbound_email(wrapper.context)
+
+
+@function_tool
+async def tavily_search(
+    ctx: RunContextWrapper,
+    query: str,
+    max_results: Optional[int] = None,
+) -> str:
+    """
+    Buscar información en la web utilizando el motor de búsqueda Tavily.
+
+    Args:
+        query: La consulta de búsqueda para encontrar información en la web
+        max_results: Número de resultados a devolver (entre 1 y 10)
+        search_depth: Profundidad de búsqueda, ya sea "basic" para resultados más rápidos o "comprehensive" para una búsqueda más exhaustiva
+
+    Returns:
+        Información encontrada en la web relacionada con la consulta
+    """
+    # Establecer el nombre de la herramienta en el contexto
+    ctx.context.set_last_tool("tavily_search")
+
+    # Aplicar valores predeterminados dentro de la función
+    if max_results is None:
+        max_results = 5
+
+    return await search_tavily(query=query, max_results=max_results)
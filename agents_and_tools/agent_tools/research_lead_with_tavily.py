@@ -1,32 +1,103 @@
+import asyncio
 import os
 import logging
-from typing import Any, Dict
+import time
+import weakref
 import json
-from agents import RunContextWrapper, function_tool
-from openai import OpenAI
-from dotenv import load_dotenv
-from models.sales import SalesContext
-from agent_tools.tavily_search import search_tavily
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from models.sales import LeadProfile, SalesContext
+from agent_tools.tavily_search import fetch_tavily_results_many
+from agent_tools.utils.extraction_batcher import EXTRACTION_BATCH_SIZE, ExtractionBatcher
+from agent_tools.utils.search_results import build_search_context
+from schemas.linkedin_schema import LINKEDIN_PROFILE_SCHEMA
+from miscs.llm_cache import extraction_cache_key, get_extraction_cache
+from miscs.metrics import METRICS
+from miscs.openai_client import get_async_openai_client
+from miscs.providers import load_config
+from miscs.rate_limit import call_with_retry, estimate_tokens
+
+# El nivel y el formato los configura el punto de entrada (ver multi_agents.main)
 logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno
-load_dotenv()
+load_config()
+
+# Consultas a Tavily en vuelo por lead (1 equivale a ejecutarlas en secuencia)
+TAVILY_QUERY_CONCURRENCY = int(os.environ.get("TAVILY_QUERY_CONCURRENCY", "4"))
+# Tiempo máximo por consulta para que una búsqueda lenta no retrase al resto
+TAVILY_QUERY_TIMEOUT = float(os.environ.get("TAVILY_QUERY_TIMEOUT", "20"))
+
+# Extracción del perfil estructurado; cambiar la versión al editar el prompt
+EXTRACTION_MODEL = "gpt-4o-mini"
+EXTRACTION_PROMPT_VERSION = "web-profile-v2"
+EXTRACTION_RESPONSE_FORMAT = {"type": "json_object"}
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", "30"))
+EXTRACTION_SYSTEM_PROMPT = """Eres un experto en extraer información profesional sobre personas a partir de resultados de búsqueda web.
+                    Extrae información sobre la carrera, educación, intereses y actividades profesionales de la persona.
+                    Formatea la información para que coincida con la estructura de un perfil de LinkedIn.
+                    Por favor, devuelve la información como un objeto JSON con estos campos exactos en el nivel superior (NO los anides bajo una clave 'profile'):
+                    - current_role: su cargo actual
+                    - company: su empresa actual
+                    - industry: su industria
+                    - experience: array de objetos con campos title, company y duration
+                    - education: array de strings
+                    - interests: array de strings
+                    - recent_activity: string
+                    
+                    Si la información no está disponible, haz una suposición razonable basada en el contexto pero indica incertidumbre."""
+
+# Margen de tokens para el prompt de sistema y la respuesta al estimar el consumo TPM
+EXTRACTION_TOKEN_OVERHEAD = 1500
+
+# Variante para extraer varios leads en una sola llamada (ver ExtractionBatcher)
+EXTRACTION_BATCH_SYSTEM_PROMPT = """Eres un experto en extraer información profesional sobre personas a partir de resultados de búsqueda web.
+La entrada contiene los resultados de búsqueda de varias personas, cada bloque precedido por "### lead_id: <id>".
+Para cada bloque, extrae la carrera, educación, intereses y actividades profesionales de esa persona, usando solo los resultados de su bloque, y devuelve un elemento en `profiles` con su mismo `lead_id`.
+Si la información no está disponible, haz una suposición razonable basada en el contexto pero indica incertidumbre."""
+
+# Inicio de `recent_activity` en el perfil de respaldo cuando la investigación falla
+RESEARCH_ERROR_PREFIX = "Error al extraer información del perfil."
+
+# Los futures del batcher pertenecen a un event loop, así que se guarda uno por loop
+_batchers = weakref.WeakKeyDictionary()
+
+
+def _get_extraction_batcher() -> ExtractionBatcher:
+    loop = asyncio.get_running_loop()
+    if loop not in _batchers:
+        _batchers[loop] = ExtractionBatcher(
+            model=EXTRACTION_MODEL,
+            system_prompt=EXTRACTION_BATCH_SYSTEM_PROMPT,
+            item_schema=LINKEDIN_PROFILE_SCHEMA,
+            metric_name="extraction_web_batch",
+            timeout=EXTRACTION_TIMEOUT,
+        )
+    return _batchers[loop]
+
+
+def is_fallback_profile(profile: LeadProfile) -> bool:
+    """Indica si el perfil es el de respaldo devuelto cuando la investigación falla"""
+    return profile.recent_activity.startswith(RESEARCH_ERROR_PREFIX)
+
+
+async def _create_chat_completion(**kwargs):
+    return await get_async_openai_client().chat.completions.create(**kwargs)
+
 
-# Inicializar cliente OpenAI
-openai_api_key = os.environ.get("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
+async def research_lead(
+    context: SalesContext, name: str, linkedin_url: str = None
+) -> LeadProfile:
+    """
+    Implementación de la investigación web, invocable fuera de un agente.
 
+    Args:
+        context: Contexto de ventas del lead; se actualiza con `profile`
+        name: Nombre del lead
+        linkedin_url: URL de LinkedIn opcional para consultas adicionales
 
-@function_tool
-async def research_lead_with_tavily(
-    wrapper: RunContextWrapper[SalesContext], name: str, linkedin_url: str = None
-) -> Dict[str, Any]:
-    """Investigar un lead utilizando la búsqueda web de Tavily y formatear los resultados similar a un perfil de LinkedIn"""
-    description = wrapper.context.get("description", "")
-    print(f"Iniciando investigación web para lead: {name}")
+    Returns:
+        Perfil del lead (uno de respaldo si la investigación falla)
+    """
+    description = context.description
     logger.info(f"Investigando lead: {name} (LinkedIn URL: {linkedin_url})")
     if description:
         logger.info(f"Descripción del lead: {description}")
@@ -52,8 +123,7 @@ async def research_lead_with_tavily(
             f"{name} professional interests"
         ]
     
-    # Extraer dominio de LinkedIn URL si está disponible para contexto adicional
-    domain = None
+    # Añadir el nombre de usuario de la URL de LinkedIn como contexto adicional
     if linkedin_url:
         parts = linkedin_url.split("/")
         if len(parts) > 2:
@@ -63,121 +133,91 @@ async def research_lead_with_tavily(
                 search_queries.append(f"{name} {username} professional background")
     
     # Recopilar resultados de búsqueda
-    print(f"Buscando en la web información sobre {name}...")
-    combined_results = ""
-    for query in search_queries:
-        results = await search_tavily(query=query, max_results=3)
-        combined_results += f"\n\n{results}"
+    logger.info(f"Buscando en la web información sobre {name}")
+    # Lanzar todas las consultas a la vez; los resultados vuelven en el orden original
+    query_results = await fetch_tavily_results_many(
+        search_queries,
+        max_results=3,
+        max_concurrency=TAVILY_QUERY_CONCURRENCY,
+        timeout=TAVILY_QUERY_TIMEOUT,
+    )
+    # Quitar páginas repetidas entre consultas y recortar al presupuesto de tokens
+    combined_results = build_search_context(
+        [result for results in query_results for result in results], name, description
+    )
     
-    print("✅ Búsqueda web completada")
+    logger.info(f"Búsqueda web completada para {name}")
     
     # Usar OpenAI para extraer información estructurada de los resultados de búsqueda
+    # Las instrucciones viven en el prompt de sistema (prefijo estático cacheable); el
+    # mensaje del usuario solo lleva los datos del lead
+    user_prompt = f"Resultados de búsqueda web sobre {name}:\n\n{combined_results}"
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """Eres un experto en extraer información profesional sobre personas a partir de resultados de búsqueda web.
-                    Extrae información sobre la carrera, educación, intereses y actividades profesionales de la persona.
-                    Formatea la información para que coincida con la estructura de un perfil de LinkedIn.
-                    Por favor, devuelve la información como un objeto JSON con estos campos exactos en el nivel superior (NO los anides bajo una clave 'profile'):
-                    - current_role: su cargo actual
-                    - company: su empresa actual
-                    - industry: su industria
-                    - experience: array de objetos con campos title, company y duration
-                    - education: array de strings
-                    - interests: array de strings
-                    - recent_activity: string
-                    
-                    Si la información no está disponible, haz una suposición razonable basada en el contexto pero indica incertidumbre."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Aquí están los resultados de búsqueda web sobre {name}. Extrae información profesional y devuélvela como un objeto JSON formateado como un perfil de LinkedIn con los campos exactos especificados:\n\n{combined_results}"
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7
+        # Reutilizar la extracción si ya se hizo con el mismo modelo, prompt y entrada
+        cache = get_extraction_cache()
+        cache_key = extraction_cache_key(
+            EXTRACTION_MODEL,
+            EXTRACTION_SYSTEM_PROMPT,
+            user_prompt,
+            EXTRACTION_RESPONSE_FORMAT,
+            EXTRACTION_PROMPT_VERSION,
         )
+        structured_data = cache.get(cache_key) if cache else None
+
+        # Agrupar con las extracciones de otros leads en vuelo; None si hay que llamar solo.
+        # El batch usa otro prompt y el esquema estricto, así que se cachea con su propia clave
+        if structured_data is None and EXTRACTION_BATCH_SIZE > 1:
+            batch_cache_key = extraction_cache_key(
+                EXTRACTION_MODEL,
+                EXTRACTION_BATCH_SYSTEM_PROMPT,
+                user_prompt,
+                LINKEDIN_PROFILE_SCHEMA,
+                EXTRACTION_PROMPT_VERSION,
+            )
+            structured_data = cache.get(batch_cache_key) if cache else None
+            if structured_data is None:
+                structured_data = await _get_extraction_batcher().extract(name, user_prompt)
+                if structured_data is not None and cache:
+                    cache.set(batch_cache_key, structured_data, tag=EXTRACTION_PROMPT_VERSION)
+
+        if structured_data is None:
+            started = time.perf_counter()
+            response = await call_with_retry(
+                "openai",
+                _create_chat_completion,
+                estimated_tokens=estimate_tokens(user_prompt) + EXTRACTION_TOKEN_OVERHEAD,
+                model=EXTRACTION_MODEL,
+                messages=[
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt},
+                ],
+                response_format=EXTRACTION_RESPONSE_FORMAT,
+                temperature=0.7,
+                timeout=EXTRACTION_TIMEOUT,
+            )
+            METRICS.record_llm(
+                "extraction_web", EXTRACTION_MODEL, time.perf_counter() - started, response.usage
+            )
+
+            # Analizar los datos estructurados de la respuesta
+            structured_data = json.loads(response.choices[0].message.content)
+            if cache:
+                cache.set(cache_key, structured_data, tag=EXTRACTION_PROMPT_VERSION)
         
-        # Analizar los datos estructurados de la respuesta
-        structured_data = json.loads(response.choices[0].message.content)
-        
-        # Comprobar si los datos están anidados bajo una clave 'profile'
-        if 'profile' in structured_data and isinstance(structured_data['profile'], dict):
-            profile_data = structured_data['profile']
-        else:
-            profile_data = structured_data
-        
-        # Asegurar que la respuesta coincida con el formato del esquema de LinkedIn, con el mapeo adecuado
-        formatted_profile = {
-            "current_role": profile_data.get("current_role") or profile_data.get("headline") or "Unknown",
-            "company": profile_data.get("company") or (profile_data.get("experience", [{}])[0].get("company") if profile_data.get("experience") else "Unknown"),
-            "industry": profile_data.get("industry", "Unknown"),
-            "experience": []
-        }
-        
-        # Manejar la experiencia con el formato adecuado
-        if "experience" in profile_data and isinstance(profile_data["experience"], list):
-            for exp in profile_data["experience"]:
-                if isinstance(exp, dict):
-                    formatted_exp = {
-                        "title": exp.get("title", "Unknown"),
-                        "company": exp.get("company", "Unknown"),
-                        "duration": exp.get("duration") or f"{exp.get('start_date', '')} - {exp.get('end_date', 'Present')}"
-                    }
-                    formatted_profile["experience"].append(formatted_exp)
-        
-        if not formatted_profile["experience"]:
-            formatted_profile["experience"] = [{"title": "Unknown", "company": "Unknown", "duration": "Unknown"}]
-        
-        # Manejar la educación
-        if "education" in profile_data and isinstance(profile_data["education"], list):
-            formatted_profile["education"] = []
-            for edu in profile_data["education"]:
-                if isinstance(edu, dict):
-                    edu_str = f"{edu.get('degree', 'Degree')} at {edu.get('institution', 'Institution')}"
-                    formatted_profile["education"].append(edu_str)
-                elif isinstance(edu, str):
-                    formatted_profile["education"].append(edu)
-        else:
-            formatted_profile["education"] = ["Unknown"]
-        
-        # Manejar intereses
-        formatted_profile["interests"] = profile_data.get("interests", ["Unknown"])
-        if not isinstance(formatted_profile["interests"], list):
-            formatted_profile["interests"] = ["Unknown"]
-        
-        # Manejar actividad reciente
-        formatted_profile["recent_activity"] = profile_data.get("recent_activity") or "No hay información de actividad reciente disponible"
-        
-        # Imprimir un resumen de la información encontrada
-        print("\n📋 Resumen del Perfil del Lead:")
-        print(f"  • Rol actual: {formatted_profile['current_role']} en {formatted_profile['company']}")
-        print(f"  • Industria: {formatted_profile['industry']}")
-        if formatted_profile['education'] and formatted_profile['education'][0] != "Unknown":
-            print(f"  • Educación: {formatted_profile['education'][0]}")
-        if formatted_profile['interests'] and formatted_profile['interests'][0] != "Unknown":
-            print(f"  • Intereses clave: {', '.join(formatted_profile['interests'][:3])}")
-        
-        # Actualizar el contexto con los datos de perfil estructurados
-        wrapper.context["profile_data"] = formatted_profile
+        # Normalizar al perfil tipado (tolera perfiles anidados y campos con otro nombre)
+        profile = LeadProfile.from_dict(structured_data)
+
+        logger.info(f"Resumen del perfil de {name}:\n" + "\n".join(profile.summary_lines()))
+
+        # Actualizar el contexto con el perfil estructurado
+        context.profile = profile
         
-        print("✅ Investigación del lead completada")
-        return formatted_profile
+        logger.info(f"Investigación completada para {name}")
+        return profile
         
     except Exception as e:
         logger.error(f"Error al procesar los resultados de búsqueda web: {str(e)}")
-        # Devolver datos de respaldo que coincidan con el esquema requerido
-        fallback_data = {
-            "current_role": "Unknown",
-            "company": "Unknown",
-            "industry": "Unknown",
-            "experience": [{"title": "Unknown", "company": "Unknown", "duration": "Unknown"}],
-            "education": ["Unknown"],
-            "interests": ["Unknown"],
-            "recent_activity": f"Error al extraer información del perfil. Error: {str(e)}"
-        }
-        wrapper.context["profile_data"] = fallback_data
-        return fallback_data
+        # Devolver un perfil de respaldo con todos los campos desconocidos
+        fallback_profile = LeadProfile(recent_activity=f"{RESEARCH_ERROR_PREFIX} Error: {str(e)}")
+        context.profile = fallback_profile
+        return fallback_profile
@@ -1,41 +1,127 @@
 import os
-from typing import Any, Dict
-from agents import RunContextWrapper, function_tool
-from dotenv import load_dotenv
-import requests
+import asyncio
+import importlib.util
+import logging
 from agent_tools.utils.linkedin import parse_linkedin_profile
-from models.sales import SalesContext
+from agent_tools.utils.linkedin_url import normalize_linkedin_url
+from models.sales import LeadProfile, SalesContext
+from miscs.cache import LazyCache, PersistentCache
+from miscs.metrics import METRICS
+from miscs.providers import PROVIDERS, load_config, register_http_provider
+from miscs.rate_limit import call_with_retry
 
-load_dotenv()
+logger = logging.getLogger("linkedin_scraper")
+
+load_config()
 
 scraper_api_key = os.environ.get("SCRAPER_API_KEY")
 
+# Backend asíncrono: un único pool de conexiones keep-alive compartido por todo el proceso.
+# El renderizado de ScraperAPI puede tardar decenas de segundos; SCRAPER_TIMEOUT es el
+# plazo de cada intento y la concurrencia la limita SCRAPERAPI_MAX_CONCURRENCY.
+SCRAPER_API_URL = "https://api.scraperapi.com/"
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "70"))
+SCRAPER_MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "10"))
 
-@function_tool
-def extract_linkedin_profile(
-    wrapper: RunContextWrapper[SalesContext], linkedin_url: str
-) -> Dict[str, Any]:
-    """Extraer datos de perfil de una URL de LinkedIn"""
-    print("Iniciando raspado y extracción de LinkedIn")
+# httpx (o requests como respaldo) se importa en la primera descarga
+HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None
+
+
+register_http_provider("scraperapi", SCRAPER_TIMEOUT, SCRAPER_MAX_CONNECTIONS)
+
+
+async def _scraper_fetch_raw(url: str, api_key: str) -> str:
+    """
+    Descarga la página renderizada como Markdown sin bloquear el event loop.
 
-    payload = {
-        "api_key": scraper_api_key,
-        "url": linkedin_url,
-        "output_format": "markdown",
-    }
-    response = requests.get(
-        "https://api.scraperapi.com/",
-        params=payload,
+    Usa el pool HTTP compartido cuando httpx está disponible y, si no, ejecuta
+    `requests.get` en un hilo con el mismo plazo.
+    """
+    params = {"api_key": api_key, "url": url, "output_format": "markdown"}
+    if HTTPX_AVAILABLE:
+        response = await PROVIDERS.get("scraperapi").get(SCRAPER_API_URL, params=params)
+        response.raise_for_status()
+        return response.text
+
+    import requests
+
+    response = await asyncio.wait_for(
+        asyncio.to_thread(requests.get, SCRAPER_API_URL, params=params, timeout=SCRAPER_TIMEOUT),
+        SCRAPER_TIMEOUT,
     )
+    response.raise_for_status()
+    return response.text
+
+
+# Cache persistente de las páginas descargadas, por URL de LinkedIn normalizada
+SCRAPER_CACHE_ENABLED = os.getenv("SCRAPER_CACHE_ENABLED", "1") == "1"
+SCRAPER_CACHE_PATH = os.getenv("SCRAPER_CACHE_PATH", os.path.join(".cache", "scraper.sqlite"))
+SCRAPER_CACHE_TTL = float(os.getenv("SCRAPER_CACHE_TTL", str(7 * 24 * 3600)))
+SCRAPER_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPER_CACHE_MAX_ENTRIES", "20000"))
+
+_page_cache = LazyCache(
+    lambda: SCRAPER_CACHE_ENABLED,
+    SCRAPER_CACHE_PATH,
+    table="scraper_pages",
+    ttl=SCRAPER_CACHE_TTL,
+    max_entries=SCRAPER_CACHE_MAX_ENTRIES,
+)
+
+
+def scraper_cache_stats() -> dict:
+    """Devuelve los contadores de la cache de páginas (vacío si no se ha usado)."""
+    return _page_cache.stats()
+
+
+async def fetch_linkedin_markdown(linkedin_url: str) -> str:
+    """
+    Obtener el Markdown de un perfil de LinkedIn a través de ScraperAPI.
+
+    Usa la cache persistente, la cuota, la concurrencia y los reintentos del proveedor.
+    Lanza una excepción si la descarga falla.
+    """
+    if not scraper_api_key:
+        raise RuntimeError("Variable de entorno SCRAPER_API_KEY no encontrada.")
+
+    url = normalize_linkedin_url(linkedin_url)
+    cache = _page_cache.get()
+    cache_key = PersistentCache.make_key(url)
+
+    page_markdown = cache.get(cache_key) if cache else None
+    if page_markdown is None:
+        with METRICS.timer("scraperapi", "fetch"):
+            page_markdown = await call_with_retry(
+                "scraperapi", _scraper_fetch_raw, url, scraper_api_key
+            )
+        if cache and page_markdown:
+            cache.set(cache_key, page_markdown)
+    else:
+        logger.info(f"Página de LinkedIn obtenida de la cache: {url}")
+
+    return page_markdown
+
+
+async def scrape_linkedin_profile(context: SalesContext, linkedin_url: str) -> LeadProfile:
+    """
+    Implementación del raspado y la extracción, invocable fuera de un agente.
+
+    Args:
+        context: Contexto de ventas del lead; se actualiza con `profile`
+        linkedin_url: URL del perfil de LinkedIn
+
+    Returns:
+        Perfil del lead
+    """
+    print("Iniciando raspado y extracción de LinkedIn")
 
-    page_markdown = response.text
+    page_markdown = await fetch_linkedin_markdown(linkedin_url)
 
     # Extraer el perfil del usuario de la respuesta
-    profile_data = parse_linkedin_profile(page_markdown)
+    profile = LeadProfile.from_dict(await parse_linkedin_profile(page_markdown))
 
-    # Actualizar el contexto con los datos del perfil extraído
-    wrapper.context["profile_data"] = profile_data
+    # Actualizar el contexto con el perfil extraído
+    context.profile = profile
 
     print("Extracción de LinkedIn finalizada.")
 
-    return profile_data
+    return profile
@@ -4,62 +4,161 @@ Herramienta de búsqueda personalizada utilizando la API de Tavily para capacida
 
 import os
 import asyncio
-from typing import Optional
-from dotenv import load_dotenv
+import importlib.util
+import unicodedata
+from typing import List, Optional
 import logging
 
-from agents import function_tool, RunContextWrapper
+from miscs.cache import LazyCache, PersistentCache
+from miscs.metrics import METRICS
+from miscs.providers import PROVIDERS, load_config, register_http_provider
+from miscs.rate_limit import call_with_retry
 
 # Configurar logging
 logger = logging.getLogger("tavily_search")
 
 # Cargar variables de entorno para obtener la clave API de Tavily
-load_dotenv()
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-
-# Intentar importar el cliente Tavily, manejar el caso donde podría no estar instalado
-try:
-    from tavily import TavilyClient
-
-    tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-    TAVILY_AVAILABLE = True
-except ImportError:
-    TAVILY_AVAILABLE = False
+load_config()
+
+# Backend asíncrono: un único pool de conexiones keep-alive compartido por todo el proceso
+TAVILY_API_URL = "https://api.tavily.com/search"
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "15"))
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", "20"))
+
+# Se comprueba qué backends están instalados sin importarlos: httpx y el SDK de Tavily
+# se importan al construir el cliente, en la primera búsqueda
+HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None
+TAVILY_AVAILABLE = importlib.util.find_spec("tavily") is not None
+if not HTTPX_AVAILABLE and not TAVILY_AVAILABLE:
     logger.warning(
         "SDK de Python Tavily no encontrado. Ejecuta 'pip install tavily-python' para usar la búsqueda Tavily."
     )
-except Exception as e:
-    TAVILY_AVAILABLE = False
-    logger.warning(f"Error al inicializar el cliente Tavily: {str(e)}")
 
 
-async def search_tavily(query: str, max_results: int = 5) -> str:
+def _build_sdk_client():
+    from tavily import TavilyClient
+
+    return TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+
+register_http_provider("tavily", TAVILY_TIMEOUT, TAVILY_MAX_CONNECTIONS)
+PROVIDERS.register("tavily_sdk", _build_sdk_client, per_loop=False)
+
+
+async def _tavily_search_raw(
+    query: str, api_key: str, max_results: int, search_depth: str = "basic"
+) -> dict:
     """
-    Función interna para buscar utilizando la API de Tavily.
+    Llama a la API de búsqueda de Tavily sin bloquear el event loop.
+
+    Usa el pool HTTP compartido cuando httpx está disponible y, si solo está
+    instalado el SDK síncrono, ejecuta `TavilyClient.search` en un hilo.
     """
-    from tavily import TavilyClient
+    if HTTPX_AVAILABLE:
+        response = await PROVIDERS.get("tavily").post(
+            TAVILY_API_URL,
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={
+                "query": query,
+                "search_depth": search_depth,
+                "max_results": max_results,
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    if not TAVILY_AVAILABLE:
+        raise RuntimeError("No hay un cliente Tavily disponible")
+
+    return await asyncio.wait_for(
+        asyncio.to_thread(
+            PROVIDERS.get("tavily_sdk").search,
+            query=query,
+            search_depth=search_depth,
+            max_results=max_results,
+        ),
+        TAVILY_TIMEOUT,
+    )
+
+
+# Cache persistente de respuestas de búsqueda
+TAVILY_CACHE_ENABLED = os.getenv("TAVILY_CACHE_ENABLED", "1") == "1"
+TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH", os.path.join(".cache", "tavily.sqlite"))
+TAVILY_CACHE_TTL = float(os.getenv("TAVILY_CACHE_TTL", str(7 * 24 * 3600)))
+TAVILY_CACHE_MAX_ENTRIES = int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "50000"))
+
+_search_cache = LazyCache(
+    lambda: TAVILY_CACHE_ENABLED,
+    TAVILY_CACHE_PATH,
+    table="tavily_search",
+    ttl=TAVILY_CACHE_TTL,
+    max_entries=TAVILY_CACHE_MAX_ENTRIES,
+)
+
 
-    # Inicializar cliente Tavily desde variable de entorno
+def normalize_query(query: str) -> str:
+    """Normaliza una consulta (unicode, mayúsculas y espacios) para usarla como clave."""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+def search_cache_stats() -> dict:
+    """Devuelve los contadores de la cache de búsquedas (vacío si está deshabilitada)."""
+    _search_cache.get()
+    return _search_cache.stats()
+
+
+async def fetch_tavily_results(query: str, max_results: int = 5) -> List[dict]:
+    """
+    Obtener los resultados crudos de Tavily (title, url, content, score) de una consulta.
+
+    Usa la cache persistente, la cuota y los reintentos del proveedor. Lanza una
+    excepción si la búsqueda falla.
+    """
+    # Leer la clave API desde variable de entorno
     tavily_api_key = os.environ.get("TAVILY_API_KEY")
     if not tavily_api_key:
-        return "Error: Variable de entorno TAVILY_API_KEY no encontrada."
+        raise RuntimeError("Variable de entorno TAVILY_API_KEY no encontrada.")
+
+    search_depth = "basic"
+    cache = _search_cache.get()
+    cache_key = PersistentCache.make_key(normalize_query(query), max_results, search_depth)
+
+    response = cache.get(cache_key) if cache else None
+    if response is None:
+        # Llamar a la API de Tavily sin bloquear el event loop, con cuota y reintentos
+        with METRICS.timer("tavily", "search"):
+            response = await call_with_retry(
+                "tavily",
+                _tavily_search_raw,
+                query,
+                tavily_api_key,
+                max_results=max_results,
+                search_depth=search_depth,
+            )
+        if cache and response and response.get("results"):
+            cache.set(cache_key, response)
+
+    if not response or "results" not in response:
+        return []
+    return response["results"]
 
-    # Crear instancia del cliente
-    tavily_client = TavilyClient(api_key=tavily_api_key)
 
-    try:
-        # Llamar a la API de Tavily utilizando el cliente
-        response = tavily_client.search(
-            query=query, search_depth="basic", max_results=max_results
-        )
+async def search_tavily(query: str, max_results: int = 5) -> str:
+    """
+    Función interna para buscar utilizando la API de Tavily.
+    """
+    if not os.environ.get("TAVILY_API_KEY"):
+        return "Error: Variable de entorno TAVILY_API_KEY no encontrada."
 
-        if not response or "results" not in response:
+    try:
+        results = await fetch_tavily_results(query, max_results)
+        if not results:
             return f"No se encontraron resultados para la consulta: {query}"
 
         # Formatear los resultados
         results_text = f"Resultados de búsqueda web para '{query}':\n\n"
 
-        for i, result in enumerate(response["results"]):
+        for i, result in enumerate(results):
             results_text += f"{i + 1}. {result.get('title', 'Sin título')}\n"
             results_text += f"   URL: {result.get('url', 'Sin URL')}\n"
             results_text += f"   {result.get('content', 'No hay contenido disponible')}\n\n"
@@ -70,28 +169,36 @@ async def search_tavily(query: str, max_results: int = 5) -> str:
         return f"Error al buscar en la web: {str(e)}"
 
 
-@function_tool
-async def tavily_search(
-    ctx: RunContextWrapper,
-    query: str,
-    max_results: Optional[int] = None,
-) -> str:
+async def fetch_tavily_results_many(
+    queries: List[str],
+    max_results: int = 5,
+    max_concurrency: int = 4,
+    timeout: Optional[float] = None,
+) -> List[List[dict]]:
     """
-    Buscar información en la web utilizando el motor de búsqueda Tavily.
+    Ejecuta varias consultas a Tavily de forma concurrente.
 
     Args:
-        query: La consulta de búsqueda para encontrar información en la web
-        max_results: Número de resultados a devolver (entre 1 y 10)
-        search_depth: Profundidad de búsqueda, ya sea "basic" para resultados más rápidos o "comprehensive" para una búsqueda más exhaustiva
+        queries: Consultas a ejecutar
+        max_results: Número de resultados por consulta
+        max_concurrency: Máximo de consultas en vuelo al mismo tiempo
+        timeout: Tiempo máximo (segundos) por consulta; None para no limitar
 
     Returns:
-        Información encontrada en la web relacionada con la consulta
+        Resultados crudos de cada consulta en el mismo orden que `queries`. Una consulta
+        lenta o fallida devuelve una lista vacía sin afectar a las demás.
     """
-    # Establecer el nombre de la herramienta en el contexto
-    ctx.context.set_last_tool("tavily_search")
-
-    # Aplicar valores predeterminados dentro de la función
-    if max_results is None:
-        max_results = 5
-
-    return await search_tavily(query=query, max_results=max_results)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_query(query: str) -> List[dict]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(fetch_tavily_results(query, max_results), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tiempo agotado en la consulta a Tavily: {query}")
+                return []
+            except Exception as e:
+                logger.warning(f"Error en la consulta a Tavily '{query}': {str(e)}")
+                return []
+
+    return await asyncio.gather(*(run_query(query) for query in queries))
@@ -1,81 +1,212 @@
+import inspect
 import os
-from agents import RunContextWrapper, function_tool
-from dotenv import load_dotenv
-from openai import OpenAI
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
 
 from models.sales import SalesContext
+from prompts.sales import EMAIL_PROMPT_VERSION, EMAIL_SYSTEM_PROMPT
+from miscs.metrics import METRICS
+from miscs.openai_client import get_async_openai_client
+from miscs.providers import load_config
+from miscs.rate_limit import call_with_retry, estimate_tokens
 
-load_dotenv()
+load_config()
 
-openai_api_key = os.environ.get("OPENAI_API_KEY")
+EMAIL_MODEL = "gpt-4o-mini"
+EMAIL_MAX_OUTPUT_TOKENS = 2048
+EMAIL_TIMEOUT = float(os.environ.get("EMAIL_TIMEOUT", "60"))
 
+# Streaming: activarlo para todos los leads y límite de caracteres antes de cortar
+EMAIL_STREAMING = os.environ.get("EMAIL_STREAMING", "0") == "1"
+EMAIL_MAX_CHARS = int(os.environ.get("EMAIL_MAX_CHARS", "2000"))
 
-client = OpenAI(api_key=openai_api_key)
+# Línea de asunto, tolerando formato Markdown ("**Asunto:** ...", "# Asunto: ...")
+SUBJECT_PATTERN = re.compile(
+    r"^[\s*#_]*asunto[\s*_]*:[\s*_]*(.+?)[\s*_]*$", re.IGNORECASE | re.MULTILINE
+)
 
+# Callback de streaming: recibe el evento ("delta", "subject", "done") y su texto
+EmailStreamHandler = Callable[[str, str], Union[None, Awaitable[None]]]
 
-@function_tool
-def generate_email(
-    wrapper: RunContextWrapper[SalesContext],
-) -> str:
-    """Generar un correo electrónico de ventas personalizado basado en los datos del perfil de LinkedIn"""
 
-    if not wrapper.context.get("profile_data"):
-        return "Error: No hay datos de perfil de LinkedIn disponibles. Por favor, extraiga los datos del perfil primero."
+def build_email_request(context: SalesContext) -> Dict[str, Any]:
+    """
+    Construir los argumentos de `responses.create` para el correo de un lead.
+
+    El mensaje de sistema es el prefijo estático EMAIL_SYSTEM_PROMPT, igual para todos
+    los leads; el nombre y el perfil van al final, en el mensaje del usuario.
 
-    system_prompt = "Eres un experto en escribir correos electrónicos de ventas personalizados. Escribe un correo electrónico conciso y persuasivo que conecte con los antecedentes e intereses del prospecto."
-
-    prompt_details = f"""
-    INFORMACIÓN DEL DESTINATARIO:
-
-    {wrapper.context["name"]}
-    
-    {wrapper.context["profile_data"]}
-    
-    
-    DETALLES DEL CORREO ELECTRÓNICO:
-    - Nombre del Remitente: Pedro Cisternas
-    - Empresa del Remitente: Gimnasio Inc
-    
-    CONTEXTO DE LA EMPRESA: Gimnasio Inc es un gimnasio boutique con entrenamientos personalizados para deportistas. Nos enfocamos en ofrecer programas de entrenamiento adaptados a las necesidades individuales de cada cliente, ayudándolos a alcanzar sus objetivos de fitness de manera eficiente y segura. Nos especializamos en:
-    
-    1. Entrenamiento personalizado
-    2. Evaluaciones físicas detalladas
-    3. Programas de nutrición y bienestar
-    4. Clases grupales exclusivas para mejorar el rendimiento
-
-    
-    Directrices:
-    - Mantén el correo electrónico conciso (1 párrafo)
-    - Escribe como Josh Braun (ilumina un problema que el prospecto podría no conocer)
-    - Sin jergas, sin pitch duro, solo despierta interés
-    - Personaliza según los antecedentes del destinatario, pero sin ser invasivo
-    - Concéntrate en despertar curiosidad en lugar de vender
+    Args:
+        context: Contexto de ventas con `name` y `profile`
+
+    Returns:
+        Diccionario de argumentos para la API de Responses
     """
+    # Solo los datos del lead van después del prefijo estático compartido
+    prompt_details = f"INFORMACIÓN DEL DESTINATARIO:\n\n{context.name}\n\n{context.profile.to_prompt()}"
 
-    response = client.responses.create(
-        model="gpt-4o-mini",
-        input=[
+    return {
+        "model": EMAIL_MODEL,
+        "input": [
             {
                 "role": "system",
-                "content": [{"type": "input_text", "text": system_prompt}],
+                "content": [{"type": "input_text", "text": EMAIL_SYSTEM_PROMPT}],
             },
             {
                 "role": "user",
                 "content": [{"type": "input_text", "text": prompt_details}],
             },
         ],
-        text={"format": {"type": "text"}},
-        reasoning={},
-        tools=[],
-        temperature=0.7,
-        max_output_tokens=2048,
-        top_p=1,
-        store=True,
+        "text": {"format": {"type": "text"}},
+        "reasoning": {},
+        "tools": [],
+        "temperature": 0.7,
+        "max_output_tokens": EMAIL_MAX_OUTPUT_TOKENS,
+        "top_p": 1,
+        "store": True,
+        "metadata": {"prompt_version": EMAIL_PROMPT_VERSION},
+    }
+
+
+def extract_subject(draft: str) -> Optional[str]:
+    """Devuelve el asunto si la línea "Asunto: ..." ya está completa en el borrador"""
+    complete_text = draft[: draft.rfind("\n") + 1]
+    match = SUBJECT_PATTERN.search(complete_text)
+    return match.group(1) if match else None
+
+
+def split_email(draft: str) -> Tuple[Optional[str], str]:
+    """Separa el borrador en (asunto, cuerpo), quitando la línea "Asunto: ..." del cuerpo"""
+    subject = extract_subject(draft + "\n")
+    body = SUBJECT_PATTERN.sub("", draft, count=1).strip() if subject else draft.strip()
+    return subject, body
+
+
+async def _notify(handler: Optional[EmailStreamHandler], event: str, text: str):
+    """Invoca el callback de streaming, sea síncrono o asíncrono"""
+    if handler is None:
+        return
+    result = handler(event, text)
+    if inspect.isawaitable(result):
+        await result
+
+
+def _request_tokens(request: Dict[str, Any]) -> int:
+    """Tokens estimados de los mensajes de una petición a la API de Responses"""
+    return sum(
+        estimate_tokens(part["text"]) for message in request["input"] for part in message["content"]
+    )
+
+
+async def _stream_email(context: SalesContext, request: Dict[str, Any]) -> str:
+    """
+    Generar el correo en streaming, volcando cada fragmento en `email_draft`.
+
+    Notifica al callback del contexto con los eventos "delta" (cada fragmento),
+    "subject" (en cuanto el asunto está completo) y "done" (borrador final). Corta la
+    generación si el borrador supera EMAIL_MAX_CHARS para no pagar tokens de más.
+    """
+    handler = context.email_stream_handler
+    started = time.perf_counter()
+    draft = ""
+    usage = None
+
+    async def open_and_read():
+        # Cada intento abre y lee el stream completo: el hueco de concurrencia de
+        # call_with_retry se mantiene mientras se lee y se libera antes del backoff
+        nonlocal draft, usage
+        stream = await get_async_openai_client().responses.create(
+            stream=True, timeout=EMAIL_TIMEOUT, **request
+        )
+        try:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    if not draft:
+                        METRICS.record("ttft", "email", time.perf_counter() - started, EMAIL_MODEL)
+                    draft += event.delta
+                    context.email_draft = draft
+                    await _notify(handler, "delta", event.delta)
+
+                    if not context.email_subject:
+                        subject = extract_subject(draft)
+                        if subject:
+                            context.email_subject = subject
+                            await _notify(handler, "subject", subject)
+
+                    if len(draft) > EMAIL_MAX_CHARS:
+                        print(f"✂️ Borrador cortado en {EMAIL_MAX_CHARS} caracteres")
+                        break
+                elif event.type == "response.completed":
+                    usage = event.response.usage
+        except Exception as e:
+            if draft:
+                # El callback ya recibió fragmentos: reintentar los duplicaría
+                raise RuntimeError(f"Stream del correo interrumpido: {e}") from e
+            raise
+        finally:
+            await stream.close()
+
+    await call_with_retry(
+        "openai",
+        open_and_read,
+        estimated_tokens=estimate_tokens(str(request["input"])) + EMAIL_MAX_OUTPUT_TOKENS,
+    )
+
+    elapsed = time.perf_counter() - started
+    if usage is not None:
+        METRICS.record_llm("email", EMAIL_MODEL, elapsed, usage)
+    else:
+        # Stream cortado antes de "response.completed": se estiman los tokens a partir
+        # del prompt y del texto recibido para no subestimar el costo
+        METRICS.record(
+            "llm",
+            "email",
+            elapsed,
+            EMAIL_MODEL,
+            input_tokens=_request_tokens(request),
+            output_tokens=estimate_tokens(draft),
+        )
+    await _notify(handler, "done", draft)
+    return draft
+
+
+async def write_outbound_email(context: SalesContext) -> str:
+    """
+    Implementación de la generación del correo, invocable fuera de un agente.
+
+    Si EMAIL_STREAMING está activo o el contexto trae un `email_stream_handler`, el
+    correo se genera en streaming (ver `_stream_email`).
+
+    Args:
+        context: Contexto de ventas con `name` y `profile`; se actualiza con `email_draft`
+
+    Returns:
+        El correo generado o un mensaje de error si no hay perfil
+    """
+    if not context.profile:
+        return "Error: No hay datos de perfil de LinkedIn disponibles. Por favor, extraiga los datos del perfil primero."
+
+    request = build_email_request(context)
+
+    if EMAIL_STREAMING or context.email_stream_handler:
+        return await _stream_email(context, request)
+
+    started = time.perf_counter()
+    response = await call_with_retry(
+        "openai",
+        get_async_openai_client().responses.create,
+        estimated_tokens=estimate_tokens(str(request["input"])) + EMAIL_MAX_OUTPUT_TOKENS,
+        timeout=EMAIL_TIMEOUT,
+        **request,
     )
 
+    METRICS.record_llm("email", EMAIL_MODEL, time.perf_counter() - started, response.usage)
+
     generated_email = response.output_text
 
     # Actualiza el contexto con el correo electrónico generado
-    wrapper.context["email_draft"] = generated_email
+    context.email_draft = generated_email
+    context.email_subject = extract_subject(generated_email + "\n")
 
     return generated_email
@@ -0,0 +1,206 @@
+"""
+Micro-batching de extracciones de perfil: varias personas en una sola llamada al modelo.
+
+Las extracciones pendientes se acumulan durante unos milisegundos (o hasta completar
+`max_batch_size`) y se envían juntas con un esquema de array de perfiles. Cada lead
+espera su propio resultado; si el batch falla o no devuelve a alguien, ese lead
+recibe `None` y debe hacer su llamada individual.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from miscs.metrics import METRICS, cached_tokens
+from miscs.openai_client import get_async_openai_client
+from miscs.providers import load_config
+from miscs.rate_limit import call_with_retry, estimate_tokens
+
+load_config()
+
+logger = logging.getLogger("extraction_batcher")
+
+# Leads por llamada (1 desactiva el micro-batching) y espera máxima para completar el batch
+EXTRACTION_BATCH_SIZE = int(os.environ.get("EXTRACTION_BATCH_SIZE", "8"))
+EXTRACTION_BATCH_WAIT_MS = float(os.environ.get("EXTRACTION_BATCH_WAIT_MS", "20"))
+
+# Margen de tokens de salida por perfil al estimar el consumo TPM
+PROFILE_OUTPUT_TOKENS = 600
+
+
+def build_batch_schema(item_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Esquema estricto `{"profiles": [{"lead_id", "profile"}]}` a partir del esquema de un perfil"""
+    return {
+        "type": "object",
+        "properties": {
+            "profiles": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "lead_id": {
+                            "type": "string",
+                            "description": "Identificador del lead tal como aparece en la entrada.",
+                        },
+                        "profile": item_schema,
+                    },
+                    "required": ["lead_id", "profile"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["profiles"],
+        "additionalProperties": False,
+    }
+
+
+@dataclass
+class _ExtractionJob:
+    lead: str
+    prompt: str
+    future: asyncio.Future
+
+
+class ExtractionBatcher:
+    """
+    Agrupa extracciones concurrentes en una única petición a la API de Responses.
+
+    Args:
+        model: Modelo de OpenAI
+        system_prompt: Instrucciones para extraer un perfil por cada lead de la entrada
+        item_schema: Esquema JSON de un perfil (por ejemplo LINKEDIN_PROFILE_SCHEMA)
+        metric_name: Nombre con el que se registran las llamadas en METRICS
+        max_batch_size: Leads por llamada como máximo
+        max_wait_ms: Milisegundos que se espera a más leads antes de enviar un batch incompleto
+    """
+
+    def __init__(
+        self,
+        model: str,
+        system_prompt: str,
+        item_schema: Dict[str, Any],
+        metric_name: str,
+        max_batch_size: int = EXTRACTION_BATCH_SIZE,
+        max_wait_ms: float = EXTRACTION_BATCH_WAIT_MS,
+        timeout: float = 60.0,
+    ):
+        self.model = model
+        self.system_prompt = system_prompt
+        self.schema = build_batch_schema(item_schema)
+        self.metric_name = metric_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._pending: List[_ExtractionJob] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def extract(self, lead: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Encolar la extracción de un lead y esperar su perfil.
+
+        Returns:
+            El perfil extraído o None si el batch no pudo resolverlo
+        """
+        loop = asyncio.get_running_loop()
+        job = _ExtractionJob(lead, prompt, loop.create_future())
+        self._pending.append(job)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await job.future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        jobs, self._pending = self._pending, []
+        if not jobs:
+            return
+        task = asyncio.ensure_future(self._run_batch(jobs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, jobs: List[_ExtractionJob]):
+        profiles: Dict[str, Any] = {}
+        # Un único lead no gana nada con el formato de batch: que haga su llamada normal
+        if len(jobs) > 1:
+            try:
+                profiles = await self._request(jobs)
+            except Exception as e:
+                logger.warning(f"Batch de {len(jobs)} extracciones fallido, se harán llamadas individuales: {e}")
+
+        for index, job in enumerate(jobs):
+            if not job.future.done():
+                job.future.set_result(profiles.get(str(index)))
+
+    async def _request(self, jobs: List[_ExtractionJob]) -> Dict[str, Any]:
+        """Enviar el batch y devolver los perfiles indexados por `lead_id`"""
+        user_prompt = "\n\n".join(
+            f"### lead_id: {index}\n{job.prompt}" for index, job in enumerate(jobs)
+        )
+
+        started = time.perf_counter()
+        response = await call_with_retry(
+            "openai",
+            get_async_openai_client().responses.create,
+            estimated_tokens=estimate_tokens(self.system_prompt + user_prompt)
+            + PROFILE_OUTPUT_TOKENS * len(jobs),
+            model=self.model,
+            input=[
+                {
+                    "role": "system",
+                    "content": [{"type": "input_text", "text": self.system_prompt}],
+                },
+                {
+                    "role": "user",
+                    "content": [{"type": "input_text", "text": user_prompt}],
+                },
+            ],
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "profiles_batch",
+                    "strict": True,
+                    "schema": self.schema,
+                }
+            },
+            temperature=0.7,
+            timeout=self.timeout,
+        )
+        elapsed = time.perf_counter() - started
+
+        # El costo del batch se reparte a partes iguales entre sus leads
+        input_tokens = getattr(response.usage, "input_tokens", 0) or 0
+        output_tokens = getattr(response.usage, "output_tokens", 0) or 0
+        cached = cached_tokens(response.usage)
+        for job in jobs:
+            METRICS.record(
+                "llm",
+                self.metric_name,
+                elapsed,
+                self.model,
+                input_tokens // len(jobs),
+                output_tokens // len(jobs),
+                lead=job.lead,
+                cached_tokens=cached // len(jobs),
+            )
+
+        valid_ids = {str(index) for index in range(len(jobs))}
+        profiles = {}
+        for item in json.loads(response.output_text).get("profiles", []):
+            lead_id = str(item.get("lead_id", "")).strip()
+            if lead_id in valid_ids and isinstance(item.get("profile"), dict):
+                profiles.setdefault(lead_id, item["profile"])
+
+        missing = len(jobs) - len(profiles)
+        if missing:
+            logger.warning(f"El batch no devolvió {missing} de {len(jobs)} perfiles")
+        return profiles
@@ -1,26 +1,74 @@
 import json
 import logging
 import os
-from openai import OpenAI
+import time
+from agent_tools.utils.linkedin_markdown import (
+    LINKEDIN_TRIM_ENABLED,
+    TRIM_STATS,
+    trim_linkedin_markdown,
+)
 from schemas.linkedin_schema import LINKEDIN_PROFILE_SCHEMA
+from miscs.llm_cache import extraction_cache_key, get_extraction_cache
+from miscs.metrics import METRICS
+from miscs.openai_client import get_async_openai_client
+from miscs.rate_limit import call_with_retry, estimate_tokens
+from miscs.providers import load_config
 
-# Inicializar cliente OpenAI
-openai_api_key = os.environ.get("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
+load_config()
 
+# Cambiar la versión al editar el prompt para no reutilizar extracciones antiguas
+LINKEDIN_PROMPT_VERSION = "linkedin-profile-v1"
+LINKEDIN_MODEL = "gpt-4o-mini"
+LINKEDIN_SYSTEM_PROMPT = "Eres un experto en examinar la página de LinkedIn de una persona y extraer información relevante."
+LINKEDIN_TIMEOUT = float(os.environ.get("LINKEDIN_EXTRACTION_TIMEOUT", "60"))
 
-def parse_linkedin_profile(markdown_content: str):
-    """Extraer datos estructurados del contenido HTML del perfil de LinkedIn utilizando la API de OpenAI"""
+
+async def parse_linkedin_profile(markdown_content: str, trim: bool = LINKEDIN_TRIM_ENABLED):
+    """
+    Extraer datos estructurados del contenido HTML del perfil de LinkedIn utilizando la API de OpenAI
+
+    Con `trim`, la página se reduce antes a las secciones útiles para el esquema
+    (ver `trim_linkedin_markdown`).
+    """
     logging.info("Iniciando extracción de datos estructurados del perfil de LinkedIn")
-    response = client.responses.create(
-        model="gpt-4o-mini",
+
+    if trim:
+        with METRICS.timer("preprocess", "linkedin_trim"):
+            page = trim_linkedin_markdown(markdown_content)
+        TRIM_STATS.add(page)
+        logging.info(
+            f"Página de LinkedIn recortada: {page.input_tokens} → {page.output_tokens} tokens "
+            f"(secciones: {', '.join(page.sections) or 'ninguna reconocida'})"
+        )
+        markdown_content = page.text
+
+    # Reutilizar la extracción si la página no ha cambiado
+    cache = get_extraction_cache()
+    cache_key = extraction_cache_key(
+        LINKEDIN_MODEL,
+        LINKEDIN_SYSTEM_PROMPT,
+        markdown_content,
+        LINKEDIN_PROFILE_SCHEMA,
+        LINKEDIN_PROMPT_VERSION,
+    )
+    cached_profile = cache.get(cache_key) if cache else None
+    if cached_profile is not None:
+        logging.info("Perfil de LinkedIn obtenido de la cache de extracciones")
+        return cached_profile
+
+    started = time.perf_counter()
+    response = await call_with_retry(
+        "openai",
+        get_async_openai_client().responses.create,
+        estimated_tokens=estimate_tokens(markdown_content) + 1000,
+        model=LINKEDIN_MODEL,
         input=[
             {
                 "role": "system",
                 "content": [
                     {
                         "type": "input_text",
-                        "text": "Eres un experto en examinar la página de LinkedIn de una persona y extraer información relevante.",
+                        "text": LINKEDIN_SYSTEM_PROMPT,
                     }
                 ],
             },
@@ -41,6 +89,15 @@ def parse_linkedin_profile(markdown_content: str):
         tools=[],
         temperature=0.5,
         top_p=1,
+        timeout=LINKEDIN_TIMEOUT,
+    )
+
+    METRICS.record_llm(
+        "extraction_linkedin", LINKEDIN_MODEL, time.perf_counter() - started, response.usage
     )
 
-    return json.loads(response.output_text)
+    profile_data = json.loads(response.output_text)
+    if cache:
+        cache.set(cache_key, profile_data, tag=LINKEDIN_PROMPT_VERSION)
+
+    return profile_data
@@ -0,0 +1,306 @@
+"""
+Recorte del Markdown de un perfil de LinkedIn antes del prompt de extracción.
+
+La página que devuelve ScraperAPI trae barras de navegación, bloques de "People also
+viewed", pies de página y enlaces a imágenes que no aportan nada a
+LINKEDIN_PROFILE_SCHEMA. Aquí se conservan solo el encabezado (nombre y titular) y las
+secciones About, Experience, Education y Activity, se quitan imágenes y URLs de los
+enlaces y el resultado se recorta a un presupuesto de tokens.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from miscs.providers import load_config
+from miscs.rate_limit import estimate_tokens
+
+load_config()
+
+LINKEDIN_TRIM_ENABLED = os.environ.get("LINKEDIN_TRIM_ENABLED", "1") == "1"
+# Presupuesto de tokens para la página recortada
+LINKEDIN_TOKEN_BUDGET = int(os.environ.get("LINKEDIN_TOKEN_BUDGET", "2500"))
+# Líneas del encabezado (nombre, titular, ubicación...) que se conservan
+INTRO_MAX_LINES = 6
+# No vale la pena conservar el inicio de una línea recortada por debajo de este tamaño
+MIN_PARTIAL_LINE_TOKENS = 20
+
+# Secciones que alimentan LINKEDIN_PROFILE_SCHEMA, con sus títulos en inglés y español
+KEEP_SECTIONS = {
+    "about": ("about", "acerca de", "extracto", "sobre mí"),
+    "experience": ("experience", "experiencia"),
+    "education": ("education", "educación", "formación", "formación académica"),
+    "activity": ("activity", "actividad"),
+}
+# Secciones del perfil que el esquema no usa
+DROP_SECTIONS = {
+    "licenses & certifications",
+    "licencias y certificaciones",
+    "languages",
+    "idiomas",
+    "volunteer experience",
+    "experiencia de voluntariado",
+    "honors & awards",
+    "reconocimientos y premios",
+    "projects",
+    "proyectos",
+    "publications",
+    "courses",
+    "cursos",
+    "organizations",
+    "organizaciones",
+    "recommendations received",
+    "recomendaciones recibidas",
+    "groups",
+    "grupos",
+}
+# Inicios de títulos de bloques que se descartan (llevan el nombre del perfil u otro sufijo)
+DROP_PREFIXES = (
+    "people also viewed",
+    "otras personas también",
+    "people you may know",
+    "explore more posts",
+    "explore collaborative articles",
+    "others named",
+    "otros con el nombre",
+    "more activity by",
+    "más actividad de",
+    "similar profiles",
+    "perfiles similares",
+    "add new skills",
+    "sign in to view",
+    "inicia sesión para ver",
+)
+# Líneas de navegación y botones que sobreviven a la limpieza de enlaces
+NOISE_LINES = {
+    "skip to main content",
+    "join now",
+    "sign in",
+    "sign in to view full profile",
+    "report this profile",
+    "report this post",
+    "see more",
+    "see less",
+    "show more",
+    "show less",
+    "…see more",
+    "...see more",
+    "join now to see all activity",
+    "follow",
+    "connect",
+    "message",
+    "contact info",
+    "like",
+    "comment",
+    "share",
+    "únete ahora",
+    "iniciar sesión",
+    "ver más",
+    "…ver más",
+    "ver menos",
+    "únete para ver toda la actividad",
+    "seguir",
+    "conectar",
+    "enviar mensaje",
+    "información de contacto",
+    "recomendar",
+    "comentar",
+    "compartir",
+}
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+BARE_URL_PATTERN = re.compile(r"<?https?://\S+>?")
+FOOTER_PATTERN = re.compile(r"^(linkedin( corporation)?\s*)?©", re.IGNORECASE)
+
+
+@dataclass
+class TrimmedPage:
+    text: str
+    input_tokens: int
+    output_tokens: int
+    sections: List[str]
+    truncated: bool = False
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.input_tokens - self.output_tokens
+
+
+@dataclass
+class TrimStats:
+    """Tokens recortados de las páginas de LinkedIn procesadas en el proceso"""
+
+    pages: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    truncated: int = 0
+    # Páginas sin secciones reconocibles (se envió el texto limpio completo)
+    unrecognized: int = 0
+    sections: dict = field(default_factory=dict)
+
+    def add(self, page: TrimmedPage):
+        self.pages += 1
+        self.input_tokens += page.input_tokens
+        self.output_tokens += page.output_tokens
+        self.truncated += page.truncated
+        self.unrecognized += not page.sections
+        for section in page.sections:
+            self.sections[section] = self.sections.get(section, 0) + 1
+
+    @property
+    def reduction(self) -> float:
+        return 1 - self.output_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+# Acumulado de todas las llamadas a `parse_linkedin_profile`
+TRIM_STATS = TrimStats()
+
+
+def _normalize_title(text: str) -> str:
+    return " ".join(text.strip("*_:# ").split()).casefold()
+
+
+def _section_for(title: str) -> Optional[str]:
+    """Nombre de la sección a conservar, "" si es un bloque a descartar o None si no es un título"""
+    title = _normalize_title(title)
+    for section, aliases in KEEP_SECTIONS.items():
+        if title in aliases:
+            return section
+    if title in DROP_SECTIONS or title.startswith(DROP_PREFIXES):
+        return ""
+    return None
+
+
+def clean_line(line: str) -> str:
+    """Quita imágenes, URLs de enlaces y URLs sueltas de una línea"""
+    line = IMAGE_PATTERN.sub("", line)
+    line = LINK_PATTERN.sub(r"\1", line)
+    line = BARE_URL_PATTERN.sub("", line).strip()
+    # Viñeta que solo contenía una imagen
+    return "" if line in ("-", "*", "•") else line
+
+
+def _is_noise(line: str) -> bool:
+    return not line or _normalize_title(line) in NOISE_LINES
+
+
+def split_sections(markdown: str) -> Tuple[List[str], List[Tuple[str, List[str]]]]:
+    """
+    Separar la página en el encabezado y las secciones a conservar.
+
+    Un encabezado Markdown de nivel 1-2 siempre abre un bloque nuevo (se conserva solo si
+    es una de KEEP_SECTIONS). Los de nivel 3+ y las líneas sueltas solo abren un bloque si
+    su texto es un título conocido, así que los puestos de Experience siguen en su sección.
+
+    Returns:
+        (líneas del encabezado, [(sección, líneas)])
+    """
+    intro: List[str] = []
+    sections: List[Tuple[str, List[str]]] = []
+    # None: antes del nombre; "intro": encabezado; "": bloque descartado; otro: sección
+    current: Optional[str] = None
+    previous = None
+
+    for raw_line in markdown.splitlines():
+        heading = HEADING_PATTERN.match(raw_line.strip())
+        title = heading.group(2) if heading else raw_line
+        section = _section_for(clean_line(title))
+
+        if heading and len(heading.group(1)) == 1 and current is None:
+            current = "intro"
+            intro.append(clean_line(raw_line))
+            continue
+        if FOOTER_PATTERN.match(raw_line.strip()):
+            current = ""
+            continue
+        if section is not None or (heading and len(heading.group(1)) <= 2):
+            current = section or ""
+            if current:
+                sections.append((current, [f"## {clean_line(title)}"]))
+            previous = None
+            continue
+
+        line = clean_line(raw_line)
+        if _is_noise(line) or line == previous:
+            continue
+        previous = line
+        if current == "intro" and len(intro) < INTRO_MAX_LINES:
+            intro.append(line)
+        elif current and current != "intro":
+            sections[-1][1].append(line)
+
+    return intro, sections
+
+
+def _fit(
+    sections: List[Tuple[str, List[str]]], token_budget: int
+) -> Tuple[List[Tuple[str, List[str]]], bool]:
+    """
+    Recortar las secciones a `token_budget` conservando las primeras líneas de cada una.
+
+    El presupuesto se reparte de forma equitativa: las secciones más chicas que su parte
+    (Education, About) quedan enteras y lo que sobra se divide entre las más grandes.
+    """
+    sizes = [sum(estimate_tokens(line) for line in lines) for _, lines in sections]
+    if sum(sizes) <= token_budget:
+        return sections, False
+
+    allowances = [0.0] * len(sections)
+    remaining = token_budget
+    order = sorted(range(len(sections)), key=lambda index: sizes[index])
+    for position, index in enumerate(order):
+        allowances[index] = min(sizes[index], remaining / (len(order) - position))
+        remaining -= allowances[index]
+
+    fitted = []
+    for (section, lines), allowance in zip(sections, allowances):
+        kept, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line)
+            if kept and used + cost > allowance:
+                # Cortar la línea que no cabe en el último espacio dentro de lo disponible
+                available = int(allowance - used)
+                if available >= MIN_PARTIAL_LINE_TOKENS:
+                    kept.append(line[: available * 4].rsplit(" ", 1)[0] + "…")
+                break
+            kept.append(line)
+            used += cost
+        fitted.append((section, kept))
+    return fitted, True
+
+
+def trim_linkedin_markdown(markdown: str, token_budget: int = LINKEDIN_TOKEN_BUDGET) -> TrimmedPage:
+    """
+    Reducir la página a las partes útiles para la extracción y a `token_budget` tokens.
+
+    Si no se reconoce ninguna sección (otra plantilla de página, muro de login...), se
+    usa el texto limpio completo recortado al presupuesto para no perder información.
+    """
+    input_tokens = estimate_tokens(markdown)
+    intro, sections = split_sections(markdown)
+
+    if sections:
+        intro_budget = sum(estimate_tokens(line) for line in intro)
+        sections, truncated = _fit(sections, max(0, token_budget - intro_budget))
+        blocks = ["\n".join(intro)] if intro else []
+        blocks += ["\n".join(lines) for _, lines in sections]
+        text = "\n\n".join(blocks)
+    else:
+        lines = [clean_line(line) for line in markdown.splitlines()]
+        text = "\n".join(line for line in lines if not _is_noise(line))
+        truncated = False
+
+    # Tope final por si el encabezado o las primeras líneas ya superan el presupuesto
+    if estimate_tokens(text) > token_budget:
+        text = text[: token_budget * 4].rsplit("\n", 1)[0]
+        truncated = True
+
+    return TrimmedPage(
+        text=text,
+        input_tokens=input_tokens,
+        output_tokens=estimate_tokens(text),
+        sections=[section for section, _ in sections],
+        truncated=truncated,
+    )
@@ -0,0 +1,21 @@
+"""
+Normalización de URLs de perfiles de LinkedIn.
+
+Sin dependencias fuera de la biblioteca estándar: la usan tanto la ingesta de leads como
+el raspado de perfiles.
+"""
+from urllib.parse import urlsplit
+
+
+def normalize_linkedin_url(url: str) -> str:
+    """Normaliza una URL de LinkedIn (esquema https, host en minúsculas, sin parámetros ni barra final)"""
+    url = url.strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.endswith("linkedin.com"):
+        host = "www.linkedin.com"
+    return f"https://{host}{parts.path.rstrip('/')}"
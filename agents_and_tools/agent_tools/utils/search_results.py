@@ -0,0 +1,139 @@
+"""
+Preparación de los resultados de búsqueda antes del prompt de extracción.
+
+Las consultas de un mismo lead ("background", "experience", "education"...) suelen
+devolver las mismas páginas. Aquí se eliminan duplicados por URL y por contenido casi
+idéntico (shingles de palabras), se ordenan los fragmentos por relevancia para el lead
+y se recorta el texto a un presupuesto de tokens.
+"""
+import os
+import re
+import unicodedata
+from typing import Dict, List, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from miscs.providers import load_config
+from miscs.rate_limit import estimate_tokens
+
+load_config()
+
+# Presupuesto de tokens para los resultados de búsqueda en el prompt de extracción
+SEARCH_CONTEXT_TOKEN_BUDGET = int(os.environ.get("SEARCH_CONTEXT_TOKEN_BUDGET", "3000"))
+# Similitud de Jaccard entre shingles a partir de la cual dos fragmentos son duplicados
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("SEARCH_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+SHINGLE_SIZE = 5
+# No vale la pena incluir un fragmento recortado por debajo de este tamaño
+MIN_SNIPPET_TOKENS = 40
+
+TRACKING_PARAMS = {"fbclid", "gclid", "trk", "trackingid", "ref", "originalsubdomain"}
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def canonical_url(url: str) -> str:
+    """Normaliza una URL (esquema, www, barra final, fragmento y parámetros de seguimiento)"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query)
+        if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS)
+    ]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+def _words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return WORD_PATTERN.findall(text)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Conjunto de hashes de las secuencias de `size` palabras del texto"""
+    words = _words(text)
+    if len(words) <= size:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i : i + size])) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def relevance(result: Dict, lead_terms: Set[str], name_terms: Set[str]) -> float:
+    """
+    Puntuación de relevancia de un resultado para el lead.
+
+    Combina el `score` de Tavily con la fracción de términos del lead presentes en el
+    título y el contenido, y da prioridad a los fragmentos que mencionan su nombre.
+    """
+    words = set(_words(f"{result.get('title', '')} {result.get('content', '')}"))
+    overlap = len(lead_terms & words) / len(lead_terms) if lead_terms else 0.0
+    mentions_name = bool(name_terms) and name_terms <= words
+    return float(result.get("score") or 0.0) + overlap + (1.0 if mentions_name else 0.0)
+
+
+def select_results(
+    results: List[Dict],
+    name: str,
+    description: str = "",
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> List[Dict]:
+    """
+    Ordenar los resultados por relevancia y descartar duplicados.
+
+    Un resultado se descarta si su URL canónica ya apareció o si su contenido es casi
+    idéntico (Jaccard >= `threshold`) al de uno más relevante ya seleccionado.
+    """
+    name_terms = set(_words(name))
+    lead_terms = name_terms | {word for word in _words(description) if len(word) > 2}
+    ranked = sorted(
+        results, key=lambda result: relevance(result, lead_terms, name_terms), reverse=True
+    )
+
+    selected = []
+    seen_urls = set()
+    seen_shingles: List[Set[int]] = []
+    for result in ranked:
+        url = canonical_url(result.get("url") or "")
+        if url and url in seen_urls:
+            continue
+        content_shingles = shingles(result.get("content") or "")
+        if any(jaccard(content_shingles, other) >= threshold for other in seen_shingles):
+            continue
+        if url:
+            seen_urls.add(url)
+        seen_shingles.append(content_shingles)
+        selected.append(result)
+    return selected
+
+
+def build_search_context(
+    results: List[Dict],
+    name: str,
+    description: str = "",
+    token_budget: int = SEARCH_CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """
+    Texto de resultados para el prompt: sin duplicados, ordenado por relevancia y recortado
+    a `token_budget` tokens (el último fragmento se trunca si no cabe entero).
+    """
+    blocks = []
+    remaining = token_budget
+    for index, result in enumerate(select_results(results, name, description), start=1):
+        header = f"{index}. {result.get('title', 'Sin título')}\n   URL: {result.get('url', 'Sin URL')}\n"
+        content = result.get("content") or "No hay contenido disponible"
+        available = remaining - estimate_tokens(header)
+        if available < MIN_SNIPPET_TOKENS:
+            break
+        if estimate_tokens(content) > available:
+            # Cortar en el último espacio dentro del presupuesto (~4 caracteres por token)
+            content = content[: available * 4].rsplit(" ", 1)[0] + "…"
+        block = f"{header}   {content}\n"
+        blocks.append(block)
+        remaining -= estimate_tokens(block)
+    return "\n".join(blocks)
@@ -0,0 +1,22 @@
+"""
+Benchmarks sin red del sistema de prospección.
+
+Las caches persistentes y el registro de trabajos de los benchmarks van a un directorio
+temporal, nunca al directorio de trabajo: una ejecución no debe calentar las caches que
+lee la siguiente ni escribir en el repositorio.
+"""
+import os
+import tempfile
+
+BENCHMARK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "lead-benchmark-cache")
+
+
+def use_benchmark_cache_dir():
+    """Apuntar las caches a BENCHMARK_CACHE_DIR; llamar antes de importar las herramientas"""
+    for variable, filename in (
+        ("TAVILY_CACHE_PATH", "tavily.sqlite"),
+        ("SCRAPER_CACHE_PATH", "scraper.sqlite"),
+        ("EXTRACTION_CACHE_PATH", "extraction.sqlite"),
+        ("LEAD_JOB_STORE_PATH", "jobs.sqlite"),
+    ):
+        os.environ.setdefault(variable, os.path.join(BENCHMARK_CACHE_DIR, filename))
@@ -0,0 +1,115 @@
+"""
+Comprobación del recorte de páginas de LinkedIn contra las páginas guardadas en
+`benchmarks/fixtures/linkedin`.
+
+Para cada página verifica que el texto recortado conserva los datos esperados del
+perfil (`keep` en expected.json), que descarta la navegación y los bloques ajenos
+(`drop`) y que reconoce las secciones esperadas, y muestra los tokens ahorrados.
+
+Con `--extract` además extrae el perfil con el modelo real a partir de la página
+completa y de la recortada y compara los campos (requiere OPENAI_API_KEY).
+
+Uso:
+    python agents_and_tools/benchmarks/check_linkedin_trim.py [--budget 2500] [--extract]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Añadir agents_and_tools al path, igual que al ejecutar multi_agents.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent_tools.utils.linkedin_markdown import LINKEDIN_TOKEN_BUDGET, trim_linkedin_markdown
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "linkedin"
+# Campos de LINKEDIN_PROFILE_SCHEMA que se comparan con --extract
+COMPARED_FIELDS = ("current_role", "company", "industry", "experience", "education")
+
+
+def check_page(name: str, markdown: str, expected: dict, budget: int) -> list:
+    """Devuelve la lista de fallos del recorte de una página (vacía si todo está bien)"""
+    page = trim_linkedin_markdown(markdown, token_budget=budget)
+    failures = []
+    for text in expected.get("keep", []):
+        if text not in page.text:
+            failures.append(f"falta '{text}'")
+    for text in expected.get("drop", []):
+        if text in page.text:
+            failures.append(f"sobra '{text}'")
+    missing_sections = set(expected.get("sections", [])) - set(page.sections)
+    if missing_sections:
+        failures.append(f"secciones no reconocidas: {', '.join(sorted(missing_sections))}")
+    if "truncated" in expected and page.truncated != expected["truncated"]:
+        failures.append(f"truncated={page.truncated}, se esperaba {expected['truncated']}")
+    if page.output_tokens > budget:
+        failures.append(f"{page.output_tokens} tokens supera el presupuesto de {budget}")
+
+    print(
+        f"{name:<24} {page.input_tokens:>8} {page.output_tokens:>8} "
+        f"{1 - page.output_tokens / page.input_tokens:>7.0%}  {'OK' if not failures else 'FALLA'}"
+    )
+    for failure in failures:
+        print(f"    - {failure}")
+    return failures
+
+
+def _field(profile: dict, field: str):
+    value = profile.get(field)
+    if field == "experience":
+        # Basta con que coincidan los puestos, no la redacción de la duración
+        return [(entry.get("title"), entry.get("company")) for entry in value or []]
+    return value
+
+
+async def compare_extraction(name: str, markdown: str) -> list:
+    """Extraer el perfil de la página completa y de la recortada y listar los campos distintos"""
+    from agent_tools.utils.linkedin import parse_linkedin_profile
+
+    full, trimmed = await asyncio.gather(
+        parse_linkedin_profile(markdown, trim=False),
+        parse_linkedin_profile(markdown, trim=True),
+    )
+    differences = [
+        f"{field}: {_field(full, field)!r} → {_field(trimmed, field)!r}"
+        for field in COMPARED_FIELDS
+        if _field(full, field) != _field(trimmed, field)
+    ]
+    print(f"{name:<24} {len(COMPARED_FIELDS) - len(differences)}/{len(COMPARED_FIELDS)} campos iguales")
+    for difference in differences:
+        print(f"    - {difference}")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobar el recorte de páginas de LinkedIn")
+    parser.add_argument("--budget", type=int, default=LINKEDIN_TOKEN_BUDGET, help="Presupuesto de tokens")
+    parser.add_argument("--extract", action="store_true", help="Comparar la extracción con el modelo real")
+    args = parser.parse_args()
+
+    expected = json.loads((FIXTURES_DIR / "expected.json").read_text(encoding="utf-8"))
+    pages = {name: (FIXTURES_DIR / name).read_text(encoding="utf-8") for name in sorted(expected)}
+
+    print(f"{'Página':<24} {'Entrada':>8} {'Salida':>8} {'Ahorro':>7}")
+    failures = sum(
+        len(check_page(name, markdown, expected[name], args.budget))
+        for name, markdown in pages.items()
+    )
+
+    if args.extract:
+        print("\nExtracción con el modelo (página completa → recortada):")
+
+        async def run_all():
+            return await asyncio.gather(
+                *(compare_extraction(name, markdown) for name, markdown in pages.items())
+            )
+
+        for differences in asyncio.run(run_all()):
+            failures += len(differences)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
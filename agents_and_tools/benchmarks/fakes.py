@@ -0,0 +1,268 @@
+"""
+Dobles locales de OpenAI, Tavily y ScraperAPI para medir el sistema sin red ni costo.
+
+Cada doble tiene una distribución de latencia y una tasa de error configurables. Los
+errores imitan las respuestas HTTP reales (429 con Retry-After, 5xx) para que también
+se ejerciten los reintentos y el limitador de tasa.
+"""
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Distribución log-normal de latencia y probabilidad de error de un servicio.
+
+    Args:
+        median: Latencia mediana en segundos
+        sigma: Dispersión de la log-normal (0 para latencia constante)
+        error_rate: Probabilidad de que una llamada falle
+        rate_limit_share: Fracción de los errores que son 429 (el resto son 503)
+    """
+
+    median: float
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_share: float = 0.5
+
+    def sample(self) -> float:
+        if self.sigma <= 0:
+            return self.median
+        return random.lognormvariate(0, self.sigma) * self.median
+
+    def maybe_fail(self):
+        if random.random() < self.error_rate:
+            if random.random() < self.rate_limit_share:
+                raise FakeAPIError(429, retry_after=0.5)
+            raise FakeAPIError(503)
+
+
+class FakeAPIError(Exception):
+    """Error con la misma forma que los de openai/httpx (status_code y response.headers)"""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"Error simulado {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+FAKE_PROFILE = {
+    "current_role": "Head of Growth",
+    "company": "Acme Corp",
+    "industry": "Software",
+    "experience": [
+        {"title": "Head of Growth", "company": "Acme Corp", "duration": "2021 - Present"},
+        {"title": "Growth Manager", "company": "Initech", "duration": "2017 - 2021"},
+    ],
+    "education": ["MBA, Universidad de Chile, 2016"],
+    "interests": ["running", "data", "liderazgo"],
+    "recent_activity": "Publicó sobre métricas de retención",
+}
+
+FAKE_EMAIL = (
+    "Asunto: Una idea sobre tu rendimiento\n\n"
+    "Hola, vi tu trayectoria y pensé que podría interesarte cómo otros líderes "
+    "entrenan con planes personalizados sin perder horas de agenda.\n\n"
+    "Saludos,\nPedro Cisternas\nGimnasio Inc"
+)
+
+
+def _usage(input_text: str, output_text: str, cached_tokens: int = 0) -> SimpleNamespace:
+    input_tokens = len(input_text) // 4 + 1
+    output_tokens = len(output_text) // 4 + 1
+    details = SimpleNamespace(cached_tokens=cached_tokens)
+    return SimpleNamespace(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        prompt_tokens=input_tokens,
+        completion_tokens=output_tokens,
+        total_tokens=input_tokens + output_tokens,
+        input_tokens_details=details,
+        prompt_tokens_details=details,
+    )
+
+
+class FakeAsyncOpenAI:
+    """
+    Cliente con la forma de `openai.AsyncOpenAI` (chat.completions, responses, files y batches).
+
+    Imita la cache de prompts de OpenAI: si el prefijo estático de la petición (mensaje de
+    sistema y formato de salida) ya se vio y mide al menos PROMPT_CACHE_MIN_TOKENS, esa
+    parte se reporta como `cached_tokens`, en incrementos de PROMPT_CACHE_INCREMENT.
+    """
+
+    PROMPT_CACHE_MIN_TOKENS = 1024
+    PROMPT_CACHE_INCREMENT = 128
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat_create))
+        self.responses = SimpleNamespace(create=self._responses_create)
+        self.files = SimpleNamespace(create=self._files_create, content=self._files_content)
+        self.batches = SimpleNamespace(create=self._batches_create, retrieve=self._batches_retrieve)
+        self._files = {}
+        self._batches = {}
+        self._prefixes = set()
+
+    def _cached_tokens(self, prefix: str) -> int:
+        tokens = len(prefix) // 4
+        if tokens < self.PROMPT_CACHE_MIN_TOKENS:
+            return 0
+        if prefix not in self._prefixes:
+            self._prefixes.add(prefix)
+            return 0
+        return tokens - (tokens - self.PROMPT_CACHE_MIN_TOKENS) % self.PROMPT_CACHE_INCREMENT
+
+    async def _respond(self, input_text: str, output_text: str, prefix: str = ""):
+        self.calls += 1
+        cached_tokens = self._cached_tokens(prefix)
+        await asyncio.sleep(self.latency.sample())
+        self.latency.maybe_fail()
+        return _usage(input_text, output_text, cached_tokens)
+
+    async def _chat_create(self, messages, response_format=None, **kwargs):
+        content = json.dumps(FAKE_PROFILE)
+        prefix = json.dumps([messages[0], response_format], ensure_ascii=False)
+        usage = await self._respond(json.dumps(messages, ensure_ascii=False), content, prefix)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    async def _responses_create(self, input, text=None, stream=False, **kwargs):
+        text_format = (text or {}).get("format", {})
+        input_text = json.dumps(input, ensure_ascii=False)
+        if text_format.get("name") == "profiles_batch":
+            # Un perfil por cada bloque "### lead_id: <id>" de la entrada
+            lead_ids = re.findall(r"### lead_id: (\w+)", input_text)
+            output_text = json.dumps(
+                {"profiles": [{"lead_id": lead_id, "profile": FAKE_PROFILE} for lead_id in lead_ids]}
+            )
+        elif text_format.get("type") == "json_schema":
+            output_text = json.dumps(FAKE_PROFILE)
+        else:
+            output_text = FAKE_EMAIL
+        prefix = json.dumps([input[0], text], ensure_ascii=False)
+        usage = await self._respond(input_text, output_text, prefix)
+        if stream:
+            return FakeResponseStream(output_text, usage)
+        return SimpleNamespace(output_text=output_text, usage=usage)
+
+
+    async def _files_create(self, file, purpose):
+        _, content = file
+        file_id = f"file-{len(self._files)}"
+        self._files[file_id] = content.decode("utf-8") if isinstance(content, bytes) else content
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    async def _files_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id])
+
+    async def _batches_create(self, input_file_id, endpoint, completion_window, **kwargs):
+        batch_id = f"batch-{len(self._batches)}"
+        # El batch queda "en progreso" durante un par de consultas antes de completarse
+        self._batches[batch_id] = {"input_file_id": input_file_id, "polls_left": 2}
+        return SimpleNamespace(id=batch_id, status="validating", output_file_id=None)
+
+    async def _batches_retrieve(self, batch_id):
+        batch = self._batches[batch_id]
+        if batch["polls_left"] > 0:
+            batch["polls_left"] -= 1
+            return SimpleNamespace(id=batch_id, status="in_progress", output_file_id=None)
+
+        lines = []
+        for line in self._files[batch["input_file_id"]].splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            self.calls += 1
+            usage = _usage(json.dumps(request["body"]["input"], ensure_ascii=False), FAKE_EMAIL)
+            body = {
+                "output": [
+                    {"type": "message", "content": [{"type": "output_text", "text": FAKE_EMAIL}]}
+                ],
+                "usage": {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens},
+            }
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        output_file_id = f"file-{len(self._files)}"
+        self._files[output_file_id] = "\n".join(lines)
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id=output_file_id)
+
+
+class FakeResponseStream:
+    """Stream de eventos de la API de Responses: un delta por palabra y un evento final"""
+
+    def __init__(self, output_text: str, usage: SimpleNamespace):
+        self.output_text = output_text
+        self.usage = usage
+
+    async def __aiter__(self):
+        for word in self.output_text.split(" "):
+            await asyncio.sleep(0)
+            yield SimpleNamespace(type="response.output_text.delta", delta=word + " ")
+        yield SimpleNamespace(
+            type="response.completed", response=SimpleNamespace(usage=self.usage)
+        )
+
+    async def close(self):
+        pass
+
+
+class FakeTavily:
+    """Sustituto asíncrono de `tavily_search._tavily_search_raw`"""
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.calls = 0
+
+    async def search(
+        self, query: str, api_key: str, max_results: int, search_depth: str = "basic"
+    ) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        self.latency.maybe_fail()
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Resultado {i + 1} para {query}",
+                    "url": f"https://example.com/{abs(hash(query)) % 10_000}/{i}",
+                    "content": f"{query}. " + "Texto de ejemplo sobre la trayectoria profesional. " * 8,
+                    "score": 1.0 - i / 10,
+                }
+                for i in range(max_results)
+            ],
+        }
+
+
+class FakeScraperAPI:
+    """Sustituto asíncrono de `scrape_and_extract_linkedin_profile._scraper_fetch_raw`"""
+
+    # Página pública completa (navegación, "People also viewed", pie...) como la de ScraperAPI
+    PAGE = (Path(__file__).parent / "fixtures" / "linkedin" / "ana-perez.md").read_text(encoding="utf-8")
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.calls = 0
+
+    async def fetch(self, url: str, api_key: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        self.latency.maybe_fail()
+        return self.PAGE
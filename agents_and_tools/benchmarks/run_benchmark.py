@@ -0,0 +1,235 @@
+"""
+Benchmark sin red del pipeline de prospección.
+
+Sustituye OpenAI, Tavily y ScraperAPI por los dobles de `benchmarks/fakes.py` y hace
+pasar N leads sintéticos por el pipeline determinista, reportando leads/s, latencia
+de cola, pico de memoria (RSS) y retraso del event loop.
+
+Uso:
+    python agents_and_tools/benchmarks/run_benchmark.py --leads 1000 --concurrency 32
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+# Añadir agents_and_tools al path, igual que al ejecutar multi_agents.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Claves ficticias: las herramientas comprueban que estén definidas antes de llamar a los proveedores
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ.setdefault("SCRAPER_API_KEY", "scraper-benchmark")
+
+from benchmarks import use_benchmark_cache_dir
+
+use_benchmark_cache_dir()
+
+from benchmarks.fakes import FakeAsyncOpenAI, FakeScraperAPI, FakeTavily, LatencyProfile
+from agent_tools import scrape_and_extract_linkedin_profile, tavily_search
+from models.sales import build_sales_context
+from miscs import llm_cache, rate_limit
+from miscs.openai_client import set_async_openai_client
+from miscs.metrics import METRICS, percentile
+from miscs.run_parallel_agents import run_dict_tasks_in_parallel
+from miscs.sharding import Shard, all_shards, iter_shard, split_provider_quotas
+from sales_pipeline import run_sales_pipeline
+
+
+def synthetic_leads(count: int):
+    """Genera leads sintéticos de forma perezosa"""
+    for i in range(count):
+        yield {
+            "name": f"Lead Sintético {i}",
+            "linkedin_url": f"https://www.linkedin.com/in/lead-sintetico-{i}",
+            "description": f"Gerente comercial #{i % 50}",
+        }
+
+
+def install_fakes(args) -> dict:
+    """Reemplaza los clientes reales por los dobles locales"""
+    openai_fake = FakeAsyncOpenAI(LatencyProfile(args.openai_latency, error_rate=args.error_rate))
+    tavily_fake = FakeTavily(LatencyProfile(args.tavily_latency, error_rate=args.error_rate))
+    scraper_fake = FakeScraperAPI(LatencyProfile(args.scraper_latency, error_rate=args.error_rate))
+
+    set_async_openai_client(openai_fake)
+    tavily_search._tavily_search_raw = tavily_fake.search
+    scrape_and_extract_linkedin_profile._scraper_fetch_raw = scraper_fake.fetch
+
+    if not args.with_cache:
+        tavily_search.TAVILY_CACHE_ENABLED = False
+        scrape_and_extract_linkedin_profile.SCRAPER_CACHE_ENABLED = False
+        llm_cache.EXTRACTION_CACHE_ENABLED = False
+
+    if not args.respect_quotas:
+        # Cuotas prácticamente ilimitadas para medir solo el planificador y los clientes
+        for provider, (_, tokens_per_minute) in rate_limit.PROVIDER_QUOTAS.items():
+            rate_limit.PROVIDER_QUOTAS[provider] = (1e9, 1e12 if tokens_per_minute else None)
+    rate_limit._limiters.clear()
+
+    return {"openai": openai_fake, "tavily": tavily_fake, "scraperapi": scraper_fake}
+
+
+class LoopLagMonitor:
+    """Mide cuánto tarda el event loop en despertar una tarea que duerme `interval` segundos"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+async def run_benchmark(args, shard: Optional[Shard] = None) -> dict:
+    """Ejecuta el benchmark (solo los leads de `shard`, si se indica) y devuelve las métricas agregadas"""
+    fakes = install_fakes(args)
+    METRICS.reset()
+    monitor = LoopLagMonitor()
+
+    async def process(lead: dict):
+        result = await run_sales_pipeline(lead)
+        if args.linkedin:
+            await scrape_and_extract_linkedin_profile.scrape_linkedin_profile(
+                build_sales_context(lead), lead["linkedin_url"]
+            )
+        return result
+
+    leads = synthetic_leads(args.leads)
+    if shard:
+        leads = iter_shard(leads, shard)
+
+    monitor.start()
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await run_dict_tasks_in_parallel(
+            process_function=process,
+            input_dicts=leads,
+            show_progress=False,
+            max_concurrency=args.concurrency,
+            collect_results=False,
+        )
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    latencies = METRICS.latencies("lead")
+    return {
+        "leads": latencies.count,
+        "elapsed": elapsed,
+        "leads_per_second": latencies.count / elapsed if elapsed else 0.0,
+        "p50": latencies.percentile(50),
+        "p95": latencies.percentile(95),
+        "p99": latencies.percentile(99),
+        # ru_maxrss está en KB en Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "loop_lag_p99": percentile(monitor.samples, 99),
+        "loop_lag_max": max(monitor.samples, default=0.0),
+        "calls": {name: fake.calls for name, fake in fakes.items()},
+    }
+
+
+def run_benchmark_shard(args, shard: Shard) -> dict:
+    """Punto de entrada de cada proceso con --workers: su propio loop, dobles y métricas"""
+    if args.respect_quotas:
+        split_provider_quotas(shard.count)
+    summary = asyncio.run(run_benchmark(args, shard))
+    summary["metrics"] = METRICS.snapshot()
+    return summary
+
+
+def run_sharded_benchmark(args) -> dict:
+    """Reparte los leads entre `args.workers` procesos y combina sus métricas"""
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        shards = list(executor.map(run_benchmark_shard, [args] * args.workers, all_shards(args.workers)))
+    # Incluye el arranque de los procesos, igual que lo pagaría un lote real
+    elapsed = time.perf_counter() - started
+
+    # Los agregados de todos los procesos se unen en el colector del padre
+    METRICS.reset()
+    calls = {}
+    for shard in shards:
+        METRICS.merge(shard["metrics"])
+        for name, count in shard["calls"].items():
+            calls[name] = calls.get(name, 0) + count
+    latencies = METRICS.latencies("lead")
+    return {
+        "leads": latencies.count,
+        "elapsed": elapsed,
+        "leads_per_second": latencies.count / elapsed if elapsed else 0.0,
+        "p50": latencies.percentile(50),
+        "p95": latencies.percentile(95),
+        "p99": latencies.percentile(99),
+        "peak_rss_mb": max(shard["peak_rss_mb"] for shard in shards),
+        "loop_lag_p99": max(shard["loop_lag_p99"] for shard in shards),
+        "loop_lag_max": max(shard["loop_lag_max"] for shard in shards),
+        "calls": calls,
+        "workers": args.workers,
+    }
+
+
+def print_summary(summary: dict):
+    print("\n===== Benchmark sin red =====")
+    print(f"Leads:                 {summary['leads']}")
+    if summary.get("workers"):
+        print(f"Procesos:              {summary['workers']}")
+    print(f"Tiempo total:          {summary['elapsed']:.2f} s")
+    print(f"Rendimiento:           {summary['leads_per_second']:.2f} leads/s")
+    print(
+        f"Latencia por lead:     p50 {summary['p50']:.3f} s | "
+        f"p95 {summary['p95']:.3f} s | p99 {summary['p99']:.3f} s"
+    )
+    print(f"Pico de memoria (RSS): {summary['peak_rss_mb']:.1f} MB" + (" por proceso" if summary.get("workers") else ""))
+    print(
+        f"Retraso del loop:      p99 {summary['loop_lag_p99'] * 1000:.1f} ms | "
+        f"máx {summary['loop_lag_max'] * 1000:.1f} ms"
+    )
+    print(f"Llamadas simuladas:    {summary['calls']}")
+    print(f"\n{METRICS.latency_table()}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sin red del pipeline de prospección")
+    parser.add_argument("--leads", type=int, default=100, help="Número de leads sintéticos (10 a 10.000)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Leads en vuelo al mismo tiempo")
+    parser.add_argument("--openai-latency", type=float, default=0.8, help="Latencia mediana de OpenAI (s)")
+    parser.add_argument("--tavily-latency", type=float, default=0.4, help="Latencia mediana de Tavily (s)")
+    parser.add_argument("--scraper-latency", type=float, default=3.0, help="Latencia mediana de ScraperAPI (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de error por llamada")
+    parser.add_argument("--linkedin", action="store_true", help="Incluir el raspado de LinkedIn por lead")
+    parser.add_argument("--with-cache", action="store_true", help="Mantener activas las caches persistentes")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos entre los que se reparten los leads")
+    parser.add_argument("--respect-quotas", action="store_true", help="Aplicar las cuotas configuradas de cada proveedor")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.workers > 1:
+        print_summary(run_sharded_benchmark(args))
+    else:
+        print_summary(asyncio.run(run_benchmark(args)))
+
+
+if __name__ == "__main__":
+    main()
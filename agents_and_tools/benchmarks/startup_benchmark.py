@@ -0,0 +1,180 @@
+"""
+Benchmark del arranque de la CLI.
+
+Cada medición corre en un intérprete nuevo, como un worker de cron, y reporta:
+
+- Importación: tiempo de `import multi_agents` (y de otros módulos de entrada) y qué
+  SDK pesados quedaron cargados.
+- Primera petición: tiempo desde el arranque del proceso hasta la primera llamada a un
+  proveedor al procesar un lead con el pipeline, con los dobles de `benchmarks/fakes.py`
+  sin latencia.
+- Clientes: tiempo de construir cada cliente del registro de proveedores (importa su
+  SDK, sin red).
+
+Uso:
+    python agents_and_tools/benchmarks/startup_benchmark.py [--runs 5] [--module multi_agents]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# SDK cuya importación domina el arranque
+HEAVY_MODULES = ("agents", "openai", "httpx", "tavily", "requests", "pydantic", "dotenv")
+
+# Código de cada proceso hijo; devuelve sus tiempos como JSON en la última línea
+CHILD_PRELUDE = f"""
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {str(ROOT)!r})
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ.setdefault("SCRAPER_API_KEY", "scraper-benchmark")
+from benchmarks import use_benchmark_cache_dir
+use_benchmark_cache_dir()
+"""
+
+IMPORT_CHILD = CHILD_PRELUDE + """
+import {module}
+from miscs.providers import PROVIDERS
+result = {{
+    "import": time.perf_counter() - started,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+    "built": PROVIDERS.built(),
+}}
+print(json.dumps(result))
+"""
+
+FIRST_REQUEST_CHILD = CHILD_PRELUDE + """
+import asyncio, contextlib, io
+import {module}
+imported = time.perf_counter() - started
+
+from benchmarks.run_benchmark import install_fakes, parse_args
+from sales_pipeline import run_sales_pipeline
+
+fakes = install_fakes(parse_args(
+    ["--openai-latency", "0", "--tavily-latency", "0", "--scraper-latency", "0"]
+))
+first_call = []
+
+
+def first_call_timer(method):
+    async def timed(*args, **kwargs):
+        first_call.append(time.perf_counter() - started)
+        return await method(*args, **kwargs)
+
+    return timed
+
+
+from agent_tools import scrape_and_extract_linkedin_profile, tavily_search
+tavily_search._tavily_search_raw = first_call_timer(tavily_search._tavily_search_raw)
+scrape_and_extract_linkedin_profile._scraper_fetch_raw = first_call_timer(
+    scrape_and_extract_linkedin_profile._scraper_fetch_raw
+)
+
+lead = {{"name": "Lead de arranque", "linkedin_url": "https://www.linkedin.com/in/lead-de-arranque"}}
+with contextlib.redirect_stdout(io.StringIO()):
+    asyncio.run(run_sales_pipeline(lead))
+result = {{
+    "import": imported,
+    "first_request": min(first_call) if first_call else None,
+    "first_lead": time.perf_counter() - started,
+}}
+print(json.dumps(result))
+"""
+
+CLIENTS_CHILD = CHILD_PRELUDE + """
+import asyncio
+import {module}
+from miscs.providers import PROVIDERS
+
+async def build_all():
+    timings = {{}}
+    for name in PROVIDERS.names():
+        building = time.perf_counter()
+        try:
+            PROVIDERS.get(name)
+        except Exception as e:
+            timings[name] = f"error: {{type(e).__name__}}"
+            continue
+        timings[name] = time.perf_counter() - building
+    await PROVIDERS.aclose()
+    return timings
+
+print(json.dumps(asyncio.run(build_all())))
+"""
+
+
+def run_child(code: str) -> dict:
+    """Ejecuta `code` en un intérprete nuevo y devuelve su JSON más el tiempo total del proceso"""
+    spawned = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    wall = time.perf_counter() - spawned
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "error")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"process": wall, **result}
+
+
+def _median(results: list, key: str) -> float:
+    values = [result[key] for result in results if isinstance(result.get(key), (int, float))]
+    return statistics.median(values) if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de la CLI")
+    parser.add_argument("--runs", type=int, default=5, help="Procesos por medición (se reporta la mediana)")
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="Módulo de entrada a importar (por defecto multi_agents y sales_pipeline)",
+    )
+    args = parser.parse_args()
+    modules = args.module or ["multi_agents", "sales_pipeline"]
+
+    # Un proceso de calentamiento para que los .pyc ya estén compilados
+    run_child(IMPORT_CHILD.format(module=modules[0], heavy=HEAVY_MODULES))
+
+    print("\n===== Arranque de la CLI (mediana de procesos nuevos) =====")
+    print(f"{'Módulo':<16} {'Importación (s)':>16} {'Proceso (s)':>12} {'Clientes':>9}  SDK cargados")
+    for module in modules:
+        results = [
+            run_child(IMPORT_CHILD.format(module=module, heavy=HEAVY_MODULES))
+            for _ in range(args.runs)
+        ]
+        print(
+            f"{module:<16} {_median(results, 'import'):>16.3f} {_median(results, 'process'):>12.3f} "
+            f"{len(results[-1]['built']):>9}  "
+            f"{', '.join(results[-1]['loaded']) or '-'}"
+        )
+
+    results = [
+        run_child(FIRST_REQUEST_CHILD.format(module=modules[0])) for _ in range(args.runs)
+    ]
+    print(f"\nPrimera petición ({modules[0]}, pipeline con dobles sin latencia):")
+    print(f"  Importación:              {_median(results, 'import'):.3f} s")
+    print(f"  Hasta la primera llamada: {_median(results, 'first_request'):.3f} s")
+    print(f"  Primer lead completo:     {_median(results, 'first_lead'):.3f} s")
+    print(f"  Proceso completo:         {_median(results, 'process'):.3f} s")
+
+    timings = run_child(CLIENTS_CHILD.format(module=modules[0]))
+    timings.pop("process")
+    print("\nConstrucción de clientes (primer uso, sin red):")
+    for name, elapsed in timings.items():
+        value = f"{elapsed:.3f} s" if isinstance(elapsed, float) else elapsed
+        print(f"  {name:<12} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Lectura perezosa de leads desde archivos CSV o JSONL (opcionalmente comprimidos con gzip)
+o desde la entrada estándar.
+
+Cada fila se valida y normaliza al vuelo y los duplicados (nombre + URL + email) se
+descartan con una tabla SQLite temporal en disco, de modo que una exportación de
+millones de filas se puede pasar al planificador como generador con memoria acotada
+y sin descartar nunca un lead distinto.
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, TextIO, Union
+
+from agent_tools.utils.linkedin_url import normalize_linkedin_url
+from miscs.providers import load_config
+from models.sales import lead_key
+
+load_config()
+
+logger = logging.getLogger("lead_ingest")
+
+# Memoria máxima (KiB) de la caché de páginas de la tabla de duplicados; el resto queda en disco
+LEAD_DEDUPE_CACHE_KB = int(os.environ.get("LEAD_DEDUPE_CACHE_KB", "16384"))
+
+# Nombres de columna aceptados para cada campo del lead
+FIELD_ALIASES = {
+    "name": ("name", "nombre", "full_name", "full name"),
+    "linkedin_url": ("linkedin_url", "linkedin", "linkedin url", "profile_url"),
+    "description": ("description", "descripcion", "descripción", "title", "cargo"),
+    "email": ("email", "correo", "e-mail"),
+}
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class SeenKeys:
+    """
+    Conjunto exacto de claves ya vistas en una tabla SQLite temporal.
+
+    La base se crea en un archivo temporal que SQLite borra al cerrarla; solo la caché
+    de páginas (`cache_kb`) vive en memoria, así que el consumo no crece con el lote.
+
+    Args:
+        cache_kb: Memoria máxima de la caché de páginas, en KiB
+    """
+
+    def __init__(self, cache_kb: int = LEAD_DEDUPE_CACHE_KB):
+        # Una ruta vacía crea una base privada en disco que se elimina al cerrarla
+        self._conn = sqlite3.connect("", isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(f"PRAGMA cache_size=-{max(1, cache_kb)}")
+        self._conn.execute("CREATE TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, key: str) -> bool:
+        """Añade la clave; devuelve True si ya estaba."""
+        cursor = self._conn.execute("INSERT OR IGNORE INTO seen (key) VALUES (?)", (key,))
+        return cursor.rowcount == 0
+
+    def close(self):
+        self._conn.close()
+
+
+@dataclass
+class IngestStats:
+    read: int = 0
+    accepted: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+
+
+def normalize_lead(row: Dict[str, str]) -> Dict[str, str]:
+    """
+    Convertir una fila en un lead con el formato de `data/sales_leads.py`.
+
+    Raises:
+        ValueError: Si la fila no tiene nombre o trae una URL o un email inválidos
+    """
+    columns = {key.strip().lower(): value for key, value in row.items() if key}
+
+    def field(name: str) -> str:
+        for alias in FIELD_ALIASES[name]:
+            value = columns.get(alias)
+            if value is not None:
+                return " ".join(unicodedata.normalize("NFC", str(value)).split())
+        return ""
+
+    name = field("name")
+    if not name:
+        raise ValueError("falta el nombre")
+
+    linkedin_url = normalize_linkedin_url(field("linkedin_url"))
+    if linkedin_url and "linkedin.com" not in linkedin_url:
+        raise ValueError(f"URL de LinkedIn inválida: {linkedin_url}")
+
+    lead = {"name": name, "linkedin_url": linkedin_url}
+
+    description = field("description")
+    if description:
+        lead["description"] = description
+
+    email = field("email").lower()
+    if email:
+        if not EMAIL_PATTERN.match(email):
+            raise ValueError(f"email inválido: {email}")
+        lead["email"] = email
+
+    return lead
+
+
+def _open_text(path: str) -> TextIO:
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, "r", encoding="utf-8-sig", newline="")
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    base = path[:-3] if path.endswith(".gz") else path
+    if base.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+def _iter_rows(stream: TextIO, fmt: str) -> Iterator[Union[Dict[str, str], str]]:
+    """Filas del CSV como diccionarios o líneas JSONL sin decodificar"""
+    if fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+    else:
+        yield from csv.DictReader(stream)
+
+
+def iter_leads(
+    path: str,
+    fmt: Optional[str] = None,
+    dedupe: bool = True,
+    stats: Optional[IngestStats] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Leer leads de forma perezosa desde un archivo o la entrada estándar.
+
+    Args:
+        path: Ruta del archivo (.csv, .jsonl, opcionalmente .gz) o "-" para stdin
+        fmt: "csv" o "jsonl"; por defecto se deduce de la extensión (stdin usa CSV)
+        dedupe: Descartar leads repetidos por nombre + URL + email
+        stats: Contadores opcionales que se actualizan mientras se consume el generador
+
+    Yields:
+        Leads normalizados, listos para `build_sales_context`
+    """
+    fmt = _detect_format(path, fmt)
+    stats = stats if stats is not None else IngestStats()
+    seen = SeenKeys() if dedupe else None
+
+    try:
+        yield from _iter_valid_leads(path, fmt, stats, seen)
+    finally:
+        if seen is not None:
+            seen.close()
+
+
+def _iter_valid_leads(
+    path: str, fmt: str, stats: IngestStats, seen: Optional[SeenKeys]
+) -> Iterator[Dict[str, str]]:
+    with _open_text(path) as stream:
+        for line_number, row in enumerate(_iter_rows(stream, fmt), start=1):
+            stats.read += 1
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                if not isinstance(row, dict):
+                    raise ValueError("la fila no es un objeto")
+                lead = normalize_lead(row)
+            except ValueError as e:
+                stats.invalid += 1
+                logger.warning(f"{path}:{line_number}: fila descartada ({e})")
+                continue
+
+            if seen is not None:
+                if seen.add(lead_key(lead["name"], lead["linkedin_url"], lead.get("email", ""))):
+                    stats.duplicates += 1
+                    continue
+
+            stats.accepted += 1
+            yield lead
@@ -1,8 +1,10 @@
 import logging
+import time
 from typing import Any, Optional
 
 from agents import RunContextWrapper, RunHooks, Agent, Tool
 from miscs.agent_context import AgentContext
+from miscs.metrics import METRICS, MetricsCollector, usage_tokens
 
 # Configure module logger
 logger = logging.getLogger("founder_agent")
@@ -168,3 +170,106 @@ class MinimalLogger(AgentLifecycleLogger):
         # We're only overriding this method to disable logging
         # of the final output, but still call hooks
         pass
+
+
+# Lifecycle hooks that turn agent events into latency/token metrics
+class AgentMetricsHooks(AgentLifecycleLogger):
+    """
+    Records wall time per agent turn, per handoff and per tool call, plus the
+    tokens each agent turn consumed, tagged by lead.
+
+    A single instance can be shared by concurrent runs: state is keyed by the
+    run's context wrapper.
+    """
+
+    def __init__(self, metrics: MetricsCollector = METRICS, enabled: bool = False):
+        """
+        Initialize the metrics hooks
+
+        Args:
+            metrics: Collector that receives the samples
+            enabled: Whether to also log lifecycle events
+        """
+        super().__init__(enabled=enabled)
+        self.metrics = metrics
+        self._turns = {}
+        self._handoffs = {}
+        self._tools = {}
+
+    @staticmethod
+    def _lead(context: RunContextWrapper) -> str:
+        """Lead name from either a dict or an object context"""
+        lead_context = context.context
+        if isinstance(lead_context, dict):
+            return lead_context.get("name") or ""
+        return getattr(lead_context, "name", "") or ""
+
+    @staticmethod
+    def _usage(context: RunContextWrapper) -> tuple:
+        """Accumulated (input, output) tokens of the run so far"""
+        return usage_tokens(getattr(context, "usage", None))
+
+    def _close_turn(self, context: RunContextWrapper):
+        """Record the turn of the agent currently running in this context"""
+        turn = self._turns.pop(id(context), None)
+        if turn is None:
+            return
+
+        agent_name, model, started, input_before, output_before = turn
+        input_now, output_now = self._usage(context)
+        self.metrics.record(
+            "agent_turn",
+            agent_name,
+            time.perf_counter() - started,
+            model,
+            input_now - input_before,
+            output_now - output_before,
+            lead=self._lead(context),
+        )
+
+    async def on_agent_start(self, context: RunContextWrapper, agent: Agent) -> None:
+        now = time.perf_counter()
+        handoff = self._handoffs.pop(id(context), None)
+        if handoff is not None:
+            label, started = handoff
+            self.metrics.record("handoff", label, now - started, lead=self._lead(context))
+
+        model = agent.model if isinstance(agent.model, str) else None
+        self._turns[id(context)] = (agent.name, model, now, *self._usage(context))
+        self._log_if_enabled("info", f"🚀 Agent started: {agent.name}")
+
+    async def on_agent_end(
+        self, context: RunContextWrapper, agent: Agent, output: Any
+    ) -> None:
+        self._close_turn(context)
+        self._log_if_enabled("info", f"✅ Agent {agent.name} finished")
+
+    async def on_handoff(
+        self, context: RunContextWrapper, from_agent: Agent, to_agent: Agent
+    ) -> None:
+        self._close_turn(context)
+        self._handoffs[id(context)] = (
+            f"{from_agent.name} → {to_agent.name}",
+            time.perf_counter(),
+        )
+        self._log_if_enabled(
+            "info", f"🔄 Handoff from {from_agent.name} to {to_agent.name}"
+        )
+
+    async def on_tool_start(
+        self, context: RunContextWrapper, agent: Agent, tool: Tool
+    ) -> None:
+        self._tools[(id(context), tool.name)] = time.perf_counter()
+        self._log_if_enabled(
+            "info", f"🔧 Tool started: {tool.name} by agent {agent.name}"
+        )
+
+    async def on_tool_end(
+        self, context: RunContextWrapper, agent: Agent, tool: Tool, result: str
+    ) -> None:
+        started = self._tools.pop((id(context), tool.name), None)
+        if started is not None:
+            self.metrics.record(
+                "tool", tool.name, time.perf_counter() - started, lead=self._lead(context)
+            )
+        self._log_if_enabled("info", f"🔧 Tool {tool.name} completed")
@@ -0,0 +1,199 @@
+"""
+Cache persistente clave/valor sobre un único archivo SQLite, con expiración por TTL,
+desalojo LRU acotado por número de entradas y contadores de aciertos/fallos.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class PersistentCache:
+    """
+    Cache de valores serializables a JSON almacenada en SQLite.
+
+    Args:
+        path: Ruta del archivo SQLite (se crea el directorio si no existe)
+        table: Nombre de la tabla, permite compartir un archivo entre varias caches
+        ttl: Segundos de validez de cada entrada; None para no expirar
+        max_entries: Número máximo de entradas antes de desalojar las menos usadas
+    """
+
+    # Cada cuántas escrituras se comprueba si hay que desalojar entradas
+    EVICTION_INTERVAL = 50
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        ttl: Optional[float] = None,
+        max_entries: int = 10000,
+    ):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL permite que varios procesos lean y escriban el mismo archivo
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                tag TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_tag ON {table} (tag)")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Construye una clave estable (SHA-256) a partir de partes serializables."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Devuelve el valor guardado o None si no existe o ha expirado."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None):
+        """Guarda un valor, con una etiqueta opcional para invalidarlo en bloque."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, tag, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), tag, now, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        """Elimina entradas expiradas y, si sobran, las de acceso más antiguo."""
+        if self.ttl is not None:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def invalidate(self, tag: Optional[str] = None) -> int:
+        """
+        Elimina entradas de la cache.
+
+        Args:
+            tag: Si se indica, solo se eliminan las entradas con esa etiqueta
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock:
+            if tag is None:
+                cursor = self._conn.execute(f"DELETE FROM {self.table}")
+            else:
+                cursor = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE tag = ?", (tag,)
+                )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve los contadores de aciertos/fallos y el número de entradas."""
+        with self._lock:
+            (entries,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LazyCache:
+    """
+    Cache persistente que se abre en el primer uso, o nunca si está deshabilitada.
+
+    Args:
+        enabled: Indica si la cache está activa; se consulta en cada `get`, así que
+            desactivarla (por ejemplo, cambiando el flag del módulo) surte efecto aunque
+            ya esté abierta
+        path, table, ttl, max_entries: Argumentos de `PersistentCache`
+    """
+
+    def __init__(
+        self,
+        enabled: Callable[[], bool],
+        path: str,
+        table: str = "cache",
+        ttl: Optional[float] = None,
+        max_entries: int = 10000,
+    ):
+        self.enabled = enabled
+        self._args = dict(path=path, table=table, ttl=ttl, max_entries=max_entries)
+        self._cache: Optional[PersistentCache] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[PersistentCache]:
+        """Devuelve la cache, abriéndola en el primer uso (None si está deshabilitada)."""
+        if not self.enabled():
+            return None
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = PersistentCache(**self._args)
+        return self._cache
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la cache (vacío si no se ha abierto)."""
+        return self._cache.stats() if self._cache else {}
@@ -0,0 +1,57 @@
+"""
+Límites de concurrencia por proveedor externo (OpenAI, Tavily, ScraperAPI).
+"""
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from miscs.providers import load_config
+
+load_config()
+
+# Máximo de llamadas simultáneas por proveedor, configurable por variable de entorno
+PROVIDER_LIMITS: Dict[str, int] = {
+    "openai": int(os.environ.get("OPENAI_MAX_CONCURRENCY", "16")),
+    "tavily": int(os.environ.get("TAVILY_MAX_CONCURRENCY", "8")),
+    "scraperapi": int(os.environ.get("SCRAPERAPI_MAX_CONCURRENCY", "4")),
+}
+
+# Los semáforos de asyncio pertenecen a un event loop, así que se guardan por loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def configure_provider_limits(**limits: int):
+    """
+    Ajusta los límites de concurrencia por proveedor.
+
+    Args:
+        **limits: Límite por nombre de proveedor, por ejemplo openai=8, tavily=4
+
+    Los nuevos valores se aplican a los semáforos creados a partir de este momento.
+    """
+    for provider, limit in limits.items():
+        if limit < 1:
+            raise ValueError(f"El límite para {provider} debe ser al menos 1")
+        PROVIDER_LIMITS[provider] = limit
+    _semaphores.clear()
+
+
+def provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Devuelve el semáforo del proveedor para el event loop actual."""
+    if provider not in PROVIDER_LIMITS:
+        raise ValueError(f"Proveedor desconocido: {provider}")
+
+    loop = asyncio.get_running_loop()
+    loop_semaphores = _semaphores.setdefault(loop, {})
+    if provider not in loop_semaphores:
+        loop_semaphores[provider] = asyncio.Semaphore(PROVIDER_LIMITS[provider])
+    return loop_semaphores[provider]
+
+
+@asynccontextmanager
+async def provider_slot(provider: str):
+    """Reserva un hueco de concurrencia del proveedor mientras dura el bloque."""
+    async with provider_semaphore(provider):
+        yield
@@ -0,0 +1,184 @@
+"""
+Registro persistente del estado de cada lead de un lote, para poder reanudarlo.
+
+Cada lead pasa por los estados queued → researched → emailed (o failed). Al terminar
+cada etapa se guardan el perfil y `email_draft` en SQLite, de modo que si el
+proceso se cae una ejecución con `--resume` solo repite el trabajo pendiente.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+from models.sales import LeadProfile, SalesContext, lead_key
+from miscs.providers import load_config
+
+load_config()
+
+JOB_STORE_PATH = os.environ.get("LEAD_JOB_STORE_PATH", os.path.join(".cache", "jobs.sqlite"))
+
+QUEUED = "queued"
+RESEARCHED = "researched"
+EMAILED = "emailed"
+FAILED = "failed"
+
+
+class LeadJobStore:
+    """
+    Estado y checkpoints de los leads almacenados en SQLite.
+
+    Args:
+        path: Ruta del archivo SQLite (se crea el directorio si no existe)
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lead_jobs (
+                lead_key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                linkedin_url TEXT,
+                state TEXT NOT NULL,
+                profile_data TEXT,
+                email_draft TEXT,
+                email_subject TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lead_jobs_state ON lead_jobs (state)")
+
+    def enqueue(self, leads: Iterable[dict], reset: bool = False) -> int:
+        """
+        Registra los leads del lote en estado queued.
+
+        Args:
+            leads: Leads a registrar
+            reset: Si es True, descarta los checkpoints de ejecuciones anteriores;
+                si es False, los leads ya registrados conservan su estado
+
+        Returns:
+            Número de leads registrados
+        """
+        now = time.time()
+        rows = []
+        for lead in leads:
+            name, linkedin_url = lead.get("name", ""), lead.get("linkedin_url", "")
+            key = lead_key(name, linkedin_url, lead.get("email", ""))
+            rows.append((key, name, linkedin_url, QUEUED, now))
+        verb = "INSERT OR REPLACE" if reset else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"{verb} INTO lead_jobs (lead_key, name, linkedin_url, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def track(self, leads: Iterable[dict], reset: bool = False, chunk_size: int = 500) -> Iterator[dict]:
+        """
+        Registrar los leads a medida que se consumen, sin cargar el iterable completo.
+
+        Los leads se registran en bloques de `chunk_size` (ver `enqueue`) antes de
+        entregarlos, así que un generador de millones de filas mantiene la memoria acotada.
+        """
+        chunk = []
+        for lead in leads:
+            chunk.append(lead)
+            if len(chunk) >= chunk_size:
+                self.enqueue(chunk, reset=reset)
+                yield from chunk
+                chunk = []
+        if chunk:
+            self.enqueue(chunk, reset=reset)
+            yield from chunk
+
+    def restore(self, context: SalesContext) -> Optional[str]:
+        """
+        Carga en el contexto los checkpoints guardados del lead.
+
+        Returns:
+            Estado del lead, o None si no está registrado
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, profile_data, email_draft, email_subject FROM lead_jobs "
+                "WHERE lead_key = ?",
+                (lead_key(context.name, context.linkedin_url, context.email),),
+            ).fetchone()
+        if row is None:
+            return None
+
+        state, profile_data, email_draft, email_subject = row
+        if profile_data:
+            context.profile = LeadProfile.from_dict(json.loads(profile_data))
+        if email_draft:
+            context.email_draft = email_draft
+            context.email_subject = email_subject
+        return state
+
+    def checkpoint(self, context: SalesContext):
+        """Guarda el avance del lead: emailed si ya tiene correo, researched si solo tiene perfil."""
+        if context.email_draft:
+            state = EMAILED
+        elif context.profile:
+            state = RESEARCHED
+        else:
+            return
+
+        profile = context.profile
+        self._upsert(
+            context,
+            state,
+            profile_data=json.dumps(profile.to_dict(), ensure_ascii=False) if profile else None,
+            email_draft=context.email_draft or None,
+            email_subject=context.email_subject,
+            error=None,
+        )
+
+    def mark_failed(self, context: SalesContext, error: str):
+        """Marca el lead como fallido, conservando los checkpoints que ya tuviera."""
+        self._upsert(context, FAILED, error=error, attempt=True)
+
+    def _upsert(self, context: SalesContext, state: str, attempt: bool = False, **fields):
+        columns = ["state", "updated_at", *fields]
+        values = [state, time.time(), *fields.values()]
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        if attempt:
+            assignments += ", attempts = lead_jobs.attempts + 1"
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO lead_jobs (lead_key, name, linkedin_url, {', '.join(columns)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(lead_key) DO UPDATE SET {assignments}",
+                (
+                    lead_key(context.name, context.linkedin_url, context.email),
+                    context.name,
+                    context.linkedin_url,
+                    *values,
+                ),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Número de leads en cada estado."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM lead_jobs GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
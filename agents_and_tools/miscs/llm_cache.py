@@ -0,0 +1,51 @@
+"""
+Memoización de las extracciones estructuradas hechas con modelos de OpenAI.
+
+La clave es un hash del modelo, el prompt de sistema, el texto de entrada, el esquema
+de salida y la versión del prompt, de modo que un lead sin cambios no vuelve a pagar
+la llamada al modelo. Cada entrada se etiqueta con su versión de prompt para poder
+invalidarla en bloque.
+"""
+import os
+from typing import Any, Optional
+
+from miscs.cache import LazyCache, PersistentCache
+from miscs.providers import load_config
+
+load_config()
+
+EXTRACTION_CACHE_ENABLED = os.environ.get("EXTRACTION_CACHE_ENABLED", "1") == "1"
+EXTRACTION_CACHE_PATH = os.environ.get(
+    "EXTRACTION_CACHE_PATH", os.path.join(".cache", "extraction.sqlite")
+)
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.environ.get("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+
+_extraction_cache = LazyCache(
+    lambda: EXTRACTION_CACHE_ENABLED,
+    EXTRACTION_CACHE_PATH,
+    table="profile_extraction",
+    max_entries=EXTRACTION_CACHE_MAX_ENTRIES,
+)
+
+
+def get_extraction_cache() -> Optional[PersistentCache]:
+    """Devuelve la cache de extracciones, abriéndola en el primer uso."""
+    return _extraction_cache.get()
+
+
+def extraction_cache_key(
+    model: str, system_prompt: str, input_text: str, schema: Any, prompt_version: str
+) -> str:
+    """Clave direccionada por contenido para una llamada de extracción."""
+    return PersistentCache.make_key(model, system_prompt, input_text, schema, prompt_version)
+
+
+def invalidate_prompt_version(prompt_version: str) -> int:
+    """
+    Elimina las extracciones guardadas con una versión de prompt.
+
+    Returns:
+        Número de entradas eliminadas
+    """
+    cache = get_extraction_cache()
+    return cache.invalidate(tag=prompt_version) if cache else 0
@@ -0,0 +1,353 @@
+"""
+Métricas de latencia, tokens y costo por lead.
+
+Cada medición queda etiquetada con el lead en curso (ver `lead_scope`), su tipo
+("agent_turn", "handoff", "tool", "llm", "tavily"...) y un nombre. Al final del lote,
+`MetricsCollector.report` devuelve tablas de percentiles y de costo por modelo.
+
+Las mediciones no se guardan una a una: se acumulan en agregados por (tipo, nombre), por
+modelo y por lead en curso, así que la memoria no crece con el tamaño del lote.
+"""
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Precio en USD por millón de tokens: (entrada, salida)
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    # La Batch API cobra la mitad
+    "gpt-4o-mini (batch)": (0.075, 0.30),
+}
+# Los tokens de entrada servidos desde la cache de prompts del proveedor cuestan la mitad
+CACHED_INPUT_DISCOUNT = 0.5
+
+# Lead al que se atribuyen las mediciones de la tarea actual
+current_lead: ContextVar[str] = ContextVar("current_lead", default="")
+
+
+@contextmanager
+def lead_scope(lead_name: str):
+    """Etiqueta con `lead_name` todas las mediciones hechas dentro del bloque."""
+    token = current_lead.set(lead_name)
+    try:
+        yield
+    finally:
+        current_lead.reset(token)
+
+
+# Resolución del histograma de latencias: cada cubeta abarca un 1% más que la anterior,
+# desde HISTOGRAM_MIN segundos (los valores menores caen en la primera)
+HISTOGRAM_GROWTH = 1.01
+HISTOGRAM_MIN = 1e-4
+
+
+class LatencyHistogram:
+    """
+    Histograma logarítmico de latencias con memoria acotada.
+
+    Guarda solo el número de mediciones por cubeta, así que el tamaño no crece con el
+    lote y dos histogramas se pueden sumar (por ejemplo, los de varios shards). Los
+    percentiles tienen un error relativo menor al 1%.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        if value <= HISTOGRAM_MIN:
+            return 0
+        return int(math.log(value / HISTOGRAM_MIN) / math.log(HISTOGRAM_GROWTH))
+
+    def add(self, value: float):
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Percentil aproximado: el centro geométrico de la cubeta, acotado al mínimo y al máximo."""
+        if not self.count:
+            return 0.0
+        rank = (self.count - 1) * pct / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                value = HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (bucket + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": self.buckets,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(bucket): count for bucket, count in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"] if data["min"] is not None else math.inf
+        histogram.max = data["max"]
+        return histogram
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal entre los dos valores más cercanos."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def estimate_cost(
+    model: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int = 0
+) -> float:
+    """Costo estimado en USD según MODEL_PRICING (0 si el modelo no tiene precio)."""
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    input_cost = (input_tokens - cached_tokens * CACHED_INPUT_DISCOUNT) * input_price
+    return (input_cost + output_tokens * output_price) / 1_000_000
+
+
+def usage_tokens(usage: Any) -> tuple:
+    """Extrae (entrada, salida) de un objeto usage de Chat Completions, Responses o del SDK de agentes."""
+    if usage is None:
+        return 0, 0
+    input_tokens = getattr(usage, "input_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if output_tokens is None:
+        output_tokens = getattr(usage, "completion_tokens", 0)
+    return input_tokens or 0, output_tokens or 0
+
+
+def cached_tokens(usage: Any) -> int:
+    """Tokens de entrada cacheados de un usage de Responses o Chat Completions (objeto o JSON)."""
+    if usage is None:
+        return 0
+    if isinstance(usage, dict):
+        details = usage.get("input_tokens_details") or usage.get("prompt_tokens_details") or {}
+        return details.get("cached_tokens") or 0
+    details = getattr(usage, "input_tokens_details", None) or getattr(
+        usage, "prompt_tokens_details", None
+    )
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+class MetricsCollector:
+    """Acumula mediciones de un lote y genera las tablas de resumen."""
+
+    def __init__(self):
+        self.reset()
+
+    @staticmethod
+    def _empty_totals() -> Dict[str, float]:
+        return {
+            "elapsed": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0,
+            "cost": 0.0,
+        }
+
+    def reset(self):
+        # Latencias por (tipo, nombre)
+        self._latencies: Dict[tuple, LatencyHistogram] = defaultdict(LatencyHistogram)
+        # Por modelo: [llamadas, tokens de entrada, tokens de salida, tokens cacheados]
+        self._models: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        # Por llamada a un modelo: [llamadas, tokens de entrada, cacheados, llamadas con cache]
+        self._llm_calls: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        # Totales de los leads en curso; se descartan con `pop_lead_totals`
+        self._lead_totals: Dict[str, Dict[str, float]] = defaultdict(self._empty_totals)
+        # Leads cuyos totales ya se consumieron
+        self.finished_leads = 0
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        elapsed: float,
+        model: Optional[str] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        lead: Optional[str] = None,
+        cached_tokens: int = 0,
+    ):
+        """Registra una medición; por defecto se atribuye al lead de `lead_scope`."""
+        self._latencies[(kind, name)].add(elapsed)
+        if model:
+            totals = self._models[model]
+            totals[0] += 1
+            totals[1] += input_tokens
+            totals[2] += output_tokens
+            totals[3] += cached_tokens
+        if kind == "llm":
+            calls = self._llm_calls[name]
+            calls[0] += 1
+            calls[1] += input_tokens
+            calls[2] += cached_tokens
+            calls[3] += cached_tokens > 0
+
+        # Totales por lead acumulados al vuelo para consultarlos sin recorrer las mediciones
+        totals = self._lead_totals[lead if lead is not None else current_lead.get()]
+        totals["elapsed"] += elapsed
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cached_tokens"] += cached_tokens
+        totals["cost"] += estimate_cost(model, input_tokens, output_tokens, cached_tokens)
+
+    def record_llm(self, name: str, model: str, elapsed: float, usage: Any, lead: Optional[str] = None):
+        """Registra una llamada a un modelo a partir de su objeto usage."""
+        input_tokens, output_tokens = usage_tokens(usage)
+        self.record(
+            "llm", name, elapsed, model, input_tokens, output_tokens, lead, cached_tokens(usage)
+        )
+
+    @contextmanager
+    def timer(self, kind: str, name: str, model: Optional[str] = None):
+        """Mide el tiempo de pared del bloque y lo registra al salir."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - started, model)
+
+    def latencies(self, kind: str, name: Optional[str] = None) -> LatencyHistogram:
+        """Histograma de las latencias de un tipo (y opcionalmente un nombre) de medición."""
+        histogram = LatencyHistogram()
+        for (sample_kind, sample_name), values in self._latencies.items():
+            if sample_kind == kind and name in (None, sample_name):
+                histogram.merge(values)
+        return histogram
+
+    def by_lead(self) -> Dict[str, Dict[str, float]]:
+        """Totales de tiempo, tokens y costo por lead en curso."""
+        return {lead: dict(totals) for lead, totals in self._lead_totals.items()}
+
+    def lead_totals(self, lead: str) -> Dict[str, float]:
+        """Totales de tiempo, tokens y costo de un lead (ceros si no tiene mediciones)."""
+        return dict(self._lead_totals.get(lead) or self._empty_totals())
+
+    def pop_lead_totals(self, lead: str) -> Dict[str, float]:
+        """Como `lead_totals`, pero descarta los totales del lead una vez leídos."""
+        totals = self._lead_totals.pop(lead, None)
+        if totals is None:
+            return self._empty_totals()
+        self.finished_leads += 1
+        return totals
+
+    def lead_count(self) -> int:
+        """Leads con mediciones: los ya terminados más los que siguen en curso."""
+        return self.finished_leads + sum(1 for lead in self._lead_totals if lead)
+
+    def snapshot(self) -> dict:
+        """Agregados serializables a JSON, para unirlos en otro proceso con `merge`."""
+        return {
+            "latencies": [
+                [kind, name, histogram.to_dict()]
+                for (kind, name), histogram in self._latencies.items()
+            ],
+            "models": dict(self._models),
+            "llm_calls": dict(self._llm_calls),
+            "leads": self.lead_count(),
+        }
+
+    def merge(self, snapshot: dict):
+        """Suma a este colector los agregados de `snapshot`."""
+        for kind, name, histogram in snapshot["latencies"]:
+            self._latencies[(kind, name)].merge(LatencyHistogram.from_dict(histogram))
+        for target, source in ((self._models, snapshot["models"]), (self._llm_calls, snapshot["llm_calls"])):
+            for key, values in source.items():
+                target[key] = [current + added for current, added in zip(target[key], values)]
+        self.finished_leads += snapshot["leads"]
+
+    def dump(self, path: str):
+        """Guarda los agregados en un archivo JSON, por ejemplo al terminar un shard."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+
+    def load(self, path: str):
+        """Suma a este colector los agregados guardados con `dump`."""
+        with open(path, "r", encoding="utf-8") as f:
+            self.merge(json.load(f))
+
+    def latency_table(self) -> str:
+        """Tabla de latencias p50/p95/p99 por tipo y nombre de medición."""
+        lines = [
+            f"{'Tipo':<12} {'Nombre':<40} {'N':>6} {'p50 (s)':>9} {'p95 (s)':>9} {'p99 (s)':>9}"
+        ]
+        for (kind, name), values in sorted(self._latencies.items()):
+            lines.append(
+                f"{kind:<12} {name[:40]:<40} {values.count:>6} "
+                f"{values.percentile(50):>9.3f} {values.percentile(95):>9.3f} "
+                f"{values.percentile(99):>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def cost_table(self) -> str:
+        """Tabla de tokens y costo estimado por modelo."""
+        lines = [
+            f"{'Modelo':<20} {'Llamadas':>9} {'Tokens entrada':>15} {'Cacheados':>10} "
+            f"{'Tokens salida':>14} {'Costo (USD)':>12}"
+        ]
+        for model, (calls, input_tokens, output_tokens, cached) in sorted(self._models.items()):
+            cost = estimate_cost(model, input_tokens, output_tokens, cached)
+            lines.append(
+                f"{model:<20} {calls:>9} {input_tokens:>15} {cached:>10} "
+                f"{output_tokens:>14} {cost:>12.4f}"
+            )
+        return "\n".join(lines)
+
+    def prompt_cache_table(self) -> str:
+        """Tasa de aciertos de la cache de prompts del proveedor por tipo de llamada a un modelo."""
+        lines = [
+            f"{'Llamada':<24} {'N':>6} {'Tokens entrada':>15} {'Cacheados':>10} "
+            f"{'% tokens':>9} {'% llamadas':>11}"
+        ]
+        for name, (count, input_tokens, cached, hits) in sorted(self._llm_calls.items()):
+            token_rate = cached / input_tokens if input_tokens else 0.0
+            lines.append(
+                f"{name[:24]:<24} {count:>6} {input_tokens:>15} {cached:>10} "
+                f"{token_rate:>9.0%} {hits / count:>11.0%}"
+            )
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        """Resumen completo del lote en texto plano."""
+        return (
+            f"===== Métricas del lote ({self.lead_count()} leads) =====\n\n"
+            f"{self.latency_table()}\n\n{self.cost_table()}\n\n{self.prompt_cache_table()}"
+        )
+
+
+# Colector compartido por todo el proceso
+METRICS = MetricsCollector()
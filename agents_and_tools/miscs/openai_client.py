@@ -0,0 +1,61 @@
+"""
+Cliente AsyncOpenAI compartido por las herramientas, con pool de conexiones y timeouts.
+
+El SDK de OpenAI se importa al construir el cliente (ver `miscs.providers`), no al
+importar este módulo.
+"""
+import os
+from typing import TYPE_CHECKING
+
+from miscs.providers import PROVIDERS, load_config
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+load_config()
+
+# Timeout por defecto de cada llamada (las herramientas pueden pasar uno propio)
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "50"))
+
+
+def _build_client() -> "AsyncOpenAI":
+    """
+    Construye el cliente AsyncOpenAI con su propio pool HTTP.
+
+    Los reintentos del SDK se desactivan porque `miscs.rate_limit.call_with_retry` ya
+    se encarga de ellos.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            timeout=OPENAI_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            ),
+        ),
+    )
+
+
+PROVIDERS.register("openai", _build_client, close=lambda client: client.close())
+
+
+def get_async_openai_client() -> "AsyncOpenAI":
+    """
+    Devuelve el cliente AsyncOpenAI compartido, creándolo en el primer uso.
+
+    El pool HTTP queda ligado al event loop que lo creó, por lo que se construye un
+    cliente por loop.
+    """
+    return PROVIDERS.get("openai")
+
+
+def set_async_openai_client(client):
+    """Sustituye el cliente compartido (por ejemplo, por un doble en benchmarks); None lo restaura."""
+    PROVIDERS.override("openai", client)
@@ -0,0 +1,151 @@
+"""
+Registro perezoso de los clientes de los proveedores y carga única de la configuración.
+
+Importar una herramienta no construye clientes ni importa los SDK: cada módulo registra
+una fábrica con `PROVIDERS.register` y el cliente se construye la primera vez que se
+pide con `PROVIDERS.get`. Los clientes asíncronos (pools httpx) quedan ligados al event
+loop que los creó, así que se guarda uno por loop; los síncronos se construyen una vez
+por proceso.
+"""
+import asyncio
+import inspect
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+_config_loaded = False
+
+
+def load_config():
+    """
+    Cargar el archivo .env una sola vez por proceso.
+
+    Los módulos la llaman antes de leer sus variables de entorno; las llamadas
+    siguientes no vuelven a leer el archivo. Las variables ya definidas en el entorno
+    tienen prioridad sobre las del archivo.
+    """
+    global _config_loaded
+
+    if not _config_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _config_loaded = True
+
+
+@dataclass
+class Provider:
+    # Construye el cliente; puede importar el SDK del proveedor
+    factory: Callable[[], Any]
+    # True si el cliente tiene un pool ligado al event loop
+    per_loop: bool = True
+    # Cierra el cliente (puede devolver una corrutina)
+    close: Optional[Callable[[Any], Any]] = None
+
+
+class ProviderRegistry:
+    """Fábricas registradas y clientes ya construidos, por nombre de proveedor"""
+
+    def __init__(self):
+        self._providers: Dict[str, Provider] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._clients: Dict[str, Any] = {}
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        # Clientes construidos por proveedor, para el benchmark de arranque
+        self.builds: Dict[str, int] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        per_loop: bool = True,
+        close: Optional[Callable[[Any], Any]] = None,
+    ):
+        """Registrar la fábrica de un proveedor (no construye nada)"""
+        self._providers[name] = Provider(factory, per_loop=per_loop, close=close)
+
+    def _build(self, name: str) -> Any:
+        load_config()
+        client = self._providers[name].factory()
+        self.builds[name] = self.builds.get(name, 0) + 1
+        return client
+
+    def get(self, name: str) -> Any:
+        """
+        Devuelve el cliente del proveedor, construyéndolo en el primer uso.
+
+        Los clientes por loop requieren un event loop en ejecución.
+        """
+        if name in self._overrides:
+            return self._overrides[name]
+        if name not in self._providers:
+            raise KeyError(f"Proveedor no registrado: {name}")
+
+        if self._providers[name].per_loop:
+            clients = self._loop_clients.setdefault(asyncio.get_running_loop(), {})
+            if name not in clients:
+                clients[name] = self._build(name)
+            return clients[name]
+
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = self._build(name)
+            return self._clients[name]
+
+    def override(self, name: str, client: Any):
+        """Sustituye el cliente de un proveedor (por ejemplo, por un doble); None lo restaura"""
+        if client is None:
+            self._overrides.pop(name, None)
+        else:
+            self._overrides[name] = client
+
+    def names(self) -> List[str]:
+        """Nombres de los proveedores registrados"""
+        return sorted(self._providers)
+
+    def built(self) -> List[str]:
+        """Nombres de los proveedores cuyo cliente se ha construido"""
+        return sorted(self.builds)
+
+    async def aclose(self, *names: str):
+        """Cierra los clientes del loop actual (todos o los indicados), si existen."""
+        clients = self._loop_clients.get(asyncio.get_running_loop(), {})
+        for name in names or list(clients):
+            client = clients.pop(name, None)
+            close = self._providers[name].close if client is not None else None
+            if close is not None:
+                result = close(client)
+                if inspect.isawaitable(result):
+                    await result
+
+
+# Registro compartido por todo el proceso
+PROVIDERS = ProviderRegistry()
+
+
+def register_http_provider(name: str, timeout: float, max_connections: int):
+    """
+    Registrar un proveedor HTTP: un pool keep-alive de httpx por event loop.
+
+    httpx se importa al construir el cliente, en la primera petición.
+
+    Args:
+        name: Nombre del proveedor en `PROVIDERS`
+        timeout: Plazo de cada petición, en segundos
+        max_connections: Conexiones simultáneas (y keep-alive) del pool
+    """
+
+    def build():
+        import httpx
+
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    PROVIDERS.register(name, build, close=lambda client: client.aclose())
@@ -0,0 +1,255 @@
+"""
+Limitación de tasa y reintentos para las llamadas a proveedores externos.
+
+Cada proveedor tiene dos token buckets (peticiones por minuto y tokens por minuto) y
+un factor adaptativo que reduce la tasa cuando los 429 empiezan a agruparse y la
+recupera poco a poco con cada llamada exitosa.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from miscs.concurrency import provider_slot
+from miscs.providers import load_config
+
+load_config()
+
+logger = logging.getLogger("rate_limit")
+
+# Cuotas por proveedor: (peticiones por minuto, tokens por minuto o None)
+PROVIDER_QUOTAS: Dict[str, Tuple[float, Optional[float]]] = {
+    "openai": (
+        float(os.environ.get("OPENAI_RPM", "500")),
+        float(os.environ.get("OPENAI_TPM", "200000")),
+    ),
+    "tavily": (float(os.environ.get("TAVILY_RPM", "100")), None),
+    "scraperapi": (float(os.environ.get("SCRAPERAPI_RPM", "60")), None),
+}
+
+# Fracción de la cuota que se usa como objetivo para quedar justo por debajo del límite
+TARGET_UTILIZATION = float(os.environ.get("RATE_LIMIT_UTILIZATION", "0.9"))
+
+MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", "5"))
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "TimeoutException",
+    "TransportError",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens (~4 caracteres por token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket que se rellena de forma continua a `rate_per_minute`.
+
+    `reserve` descuenta la cantidad pedida (el saldo puede quedar negativo) y devuelve
+    cuántos segundos debe esperar el llamador.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        # Ráfaga máxima de ~10 segundos de cuota para evitar picos seguidos de 429
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0, rate_factor: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            rate = self.rate_per_second * rate_factor
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / rate
+
+
+class ProviderRateLimiter:
+    """Limitador de un proveedor con buckets RPM/TPM y control adaptativo ante 429."""
+
+    MIN_RATE_FACTOR = 0.1
+    RECOVERY_STEP = 0.02
+    CLUSTER_WINDOW = 10.0
+    CLUSTER_THRESHOLD = 3
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        utilization: float = TARGET_UTILIZATION,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute * utilization)
+        self.tokens = (
+            TokenBucket(tokens_per_minute * utilization) if tokens_per_minute else None
+        )
+        self.rate_factor = 1.0
+        self._recent_429s = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        wait = self.requests.reserve(1, self.rate_factor)
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens, self.rate_factor))
+        return wait
+
+    async def acquire(self, tokens: int = 0):
+        """Espera (sin bloquear el event loop) hasta que haya cuota disponible."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self):
+        with self._lock:
+            self.rate_factor = min(1.0, self.rate_factor + self.RECOVERY_STEP)
+
+    def record_rate_limited(self):
+        """Registra un 429; si se agrupan varios en poco tiempo, reduce la tasa a la mitad."""
+        with self._lock:
+            now = time.monotonic()
+            self._recent_429s.append(now)
+            while self._recent_429s and now - self._recent_429s[0] > self.CLUSTER_WINDOW:
+                self._recent_429s.popleft()
+            if len(self._recent_429s) >= self.CLUSTER_THRESHOLD:
+                self.rate_factor = max(self.MIN_RATE_FACTOR, self.rate_factor / 2)
+                self._recent_429s.clear()
+                logger.warning(
+                    f"Ráfaga de 429 en {self.name}: tasa reducida al "
+                    f"{self.rate_factor:.0%} de la cuota"
+                )
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+
+
+def configure_provider_quotas(**quotas: Tuple[float, Optional[float]]):
+    """
+    Ajusta las cuotas por proveedor.
+
+    Args:
+        **quotas: (peticiones por minuto, tokens por minuto o None) por nombre de
+            proveedor, por ejemplo tavily=(50, None)
+
+    Los nuevos valores se aplican a los limitadores creados a partir de este momento.
+    """
+    for provider, (requests_per_minute, tokens_per_minute) in quotas.items():
+        if requests_per_minute <= 0:
+            raise ValueError(f"La cuota de {provider} debe ser positiva")
+        PROVIDER_QUOTAS[provider] = (requests_per_minute, tokens_per_minute)
+    _limiters.clear()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Devuelve el limitador compartido del proveedor, creándolo si no existe."""
+    if provider not in _limiters:
+        if provider not in PROVIDER_QUOTAS:
+            raise ValueError(f"Proveedor desconocido: {provider}")
+        requests_per_minute, tokens_per_minute = PROVIDER_QUOTAS[provider]
+        _limiters[provider] = ProviderRateLimiter(
+            provider, requests_per_minute, tokens_per_minute
+        )
+    return _limiters[provider]
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Lee Retry-After (o retry-after-ms) de la respuesta HTTP asociada al error."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _classify(exc: Exception) -> Tuple[bool, bool]:
+    """Devuelve (se puede reintentar, es un 429)."""
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES, status == 429
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True, False
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & RETRYABLE_ERROR_NAMES), False
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float]) -> float:
+    """Backoff exponencial con jitter, nunca menor que el Retry-After del servidor."""
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+async def call_with_retry(
+    provider: str,
+    function: Callable[..., Awaitable[Any]],
+    *args,
+    estimated_tokens: int = 0,
+    max_attempts: int = MAX_ATTEMPTS,
+    **kwargs,
+) -> Any:
+    """
+    Ejecuta una llamada asíncrona al proveedor respetando su cuota y reintentando errores transitorios.
+
+    Args:
+        provider: Nombre del proveedor ("openai", "tavily", "scraperapi")
+        function: Función asíncrona que realiza la llamada
+        estimated_tokens: Tokens estimados de la llamada para el bucket TPM
+        max_attempts: Número máximo de intentos
+
+    Returns:
+        El resultado de `function`
+    """
+    limiter = get_rate_limiter(provider)
+    for attempt in range(1, max_attempts + 1):
+        await limiter.acquire(estimated_tokens)
+        try:
+            # El hueco de concurrencia se ocupa solo durante el intento, no en la espera
+            async with provider_slot(provider):
+                result = await function(*args, **kwargs)
+        except Exception as e:
+            retryable, rate_limited = _classify(e)
+            if rate_limited:
+                limiter.record_rate_limited()
+            if not retryable or attempt == max_attempts:
+                raise
+            delay = _backoff_delay(attempt, _retry_after(e))
+            logger.warning(
+                f"Error transitorio en {provider} (intento {attempt}/{max_attempts}): "
+                f"{str(e)}. Reintentando en {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        else:
+            limiter.record_success()
+            return result
+
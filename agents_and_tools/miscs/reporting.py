@@ -1,185 +1,157 @@
 """
 Módulo para la generación de reportes de leads procesados.
+
+`ReportWriter` añade cada lead al reporte en cuanto termina a partir de su `LeadResult`,
+por lo que no hay que interpretar la salida de consola.
 """
+import json
 import os
-import re
+import time
+from dataclasses import asdict
 from datetime import datetime
 
-def extract_profile_from_text(text):
+from typing import Iterator
+
+from models.sales import LeadProfile, LeadResult
+from miscs.providers import load_config
+
+load_config()
+
+# Secciones escritas entre dos fsync del reporte y tiempo máximo sin sincronizar (s)
+REPORT_FSYNC_EVERY = int(os.environ.get("REPORT_FSYNC_EVERY", "20"))
+REPORT_FSYNC_INTERVAL = float(os.environ.get("REPORT_FSYNC_INTERVAL", "1.0"))
+
+
+def render_lead_section(number, result: LeadResult):
     """
-    Extrae información del perfil de un texto (típicamente salida de consola).
-    
+    Construye la sección Markdown de un lead y su registro para el JSONL.
+
     Args:
-        text: Texto que puede contener información del perfil
-        
+        number: Número del lead en el reporte
+        result: Resultado estructurado del lead
+
     Returns:
-        list: Lista de líneas del perfil o None si no se encuentra
+        tuple: (texto Markdown, diccionario serializable)
     """
-    if not text or not isinstance(text, str):
-        return None
-        
-    # Patrones para buscar la sección de perfil
-    patterns = [
-        r"📋 Resumen del Perfil del Lead:(.*?)(?:✅|\n\n)",
-        r"Resumen del Perfil del Lead:(.*?)(?:✅|\n\n)",
-        r"Perfil del Lead:(.*?)(?:✅|\n\n)"
-    ]
-    
-    # Intentar con cada patrón
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            profile_section = match.group(1).strip()
-            # Extraer líneas que contengan información relevante
-            lines = []
-            for line in profile_section.split('\n'):
-                line = line.strip()
-                if line.startswith('  • '):
-                    lines.append(line)
-            if lines:
-                return lines
-    
-    return None
-
-def extract_email_subject(text):
+    md_content = f"## Lead {number}: {result.name or 'Desconocido'}\n\n"
+
+    if result.email:
+        md_content += f"**Email:** {result.email}\n\n"
+    if result.description:
+        md_content += f"**Descripción:** {result.description}\n\n"
+
+    md_content += f"**Último Agente:** {result.last_agent or 'Desconocido'}\n\n"
+
+    if result.profile:
+        md_content += "### Perfil del Lead\n\n"
+        md_content += "\n".join(result.profile.summary_lines()) + "\n\n"
+
+    if result.has_email:
+        md_content += "### Correo Generado\n\n"
+        md_content += f"**Asunto:** {result.email_subject or 'No especificado'}\n\n"
+        md_content += "```\n"
+        md_content += (result.email_body or "") + "\n"
+        md_content += "```\n\n"
+    else:
+        md_content += "### No se generó correo para este lead\n\n"
+
+    if result.error:
+        md_content += f"**Error:** {result.error}\n\n"
+
+    md_content += "---\n\n"
+
+    record = {"number": number, **asdict(result)}
+    return md_content, record
+
+
+class ReportWriter:
     """
-    Extrae el asunto del correo electrónico de un texto.
-    
+    Reporte incremental: cada lead se añade a `report.md` (y a `report.jsonl`) en cuanto termina.
+
+    Los archivos se vacían al sistema operativo tras cada sección y se sincronizan a
+    disco (fsync) cada REPORT_FSYNC_EVERY secciones o REPORT_FSYNC_INTERVAL segundos,
+    así que si el proceso se cae el reporte conserva los leads ya terminados.
+
     Args:
-        text: Texto que puede contener el asunto del correo
-        
-    Returns:
-        str: Asunto del correo o "No especificado" si no se encuentra
+        output_dir: Directorio de salida
     """
-    if not text or not isinstance(text, str):
-        return "No especificado"
-    
-    # Patrones para buscar el asunto
-    patterns = [
-        r"Asunto: ([^\n]+)",
-        r"\*\*Asunto:\*\* ([^\n]+)"
-    ]
-    
-    # Intentar con cada patrón
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1).strip()
-    
-    return "No especificado"
-
-def generate_lead_report(results, leads):
+
+    def __init__(self, output_dir="output"):
+        os.makedirs(output_dir, exist_ok=True)
+        self.report_file = os.path.join(output_dir, "report.md")
+        self.jsonl_file = os.path.join(output_dir, "report.jsonl")
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        # Sobreescribe cualquier reporte anterior
+        self._md = open(self.report_file, "w", encoding="utf-8")
+        self._jsonl = open(self.jsonl_file, "w", encoding="utf-8")
+        self._md.write("# Reporte de Leads Procesados\n\n")
+        self._md.write(f"*Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+        self._md.write("---\n\n")
+        self._md.flush()
+
+    def write(self, result: LeadResult):
+        """
+        Añade la sección de un lead al reporte.
+
+        Args:
+            result: Resultado estructurado del lead
+        """
+        self.count += 1
+        md_content, record = render_lead_section(self.count, result)
+        self._md.write(md_content)
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._md.flush()
+        self._jsonl.flush()
+
+        self._unsynced += 1
+        if (
+            self._unsynced >= REPORT_FSYNC_EVERY
+            or time.monotonic() - self._last_sync >= REPORT_FSYNC_INTERVAL
+        ):
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._md.fileno())
+        os.fsync(self._jsonl.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Sincroniza y cierra los archivos del reporte."""
+        if self._md.closed:
+            return
+        self._sync()
+        self._md.close()
+        self._jsonl.close()
+        print(f"\n✅ Reporte generado: {self.report_file} ({self.count} leads)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_lead_results(jsonl_path: str) -> Iterator[LeadResult]:
     """
-    Genera un reporte de los leads procesados en formato Markdown.
-    Sobreescribe cualquier reporte anterior.
-    
+    Lee los resultados guardados en un `report.jsonl` (por ejemplo, el de un shard).
+
     Args:
-        results: Lista de resultados del procesamiento de leads.
-        leads: Lista de diccionarios con la información original de los leads.
-        
-    Returns:
-        str: Ruta del archivo de reporte generado.
+        jsonl_path: Ruta del archivo JSONL escrito por ReportWriter
+
+    Yields:
+        LeadResult de cada lead, en el orden del archivo
     """
-    # Crear directorio output si no existe
-    output_dir = "output"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # Nombre fijo del archivo de reporte
-    report_file = os.path.join(output_dir, "report.md")
-    
-    # Inicializar el reporte en formato Markdown
-    md_content = "# Reporte de Leads Procesados\n\n"
-    md_content += f"*Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
-    md_content += "---\n\n"
-    
-    # Procesar cada resultado
-    for i, result in enumerate(results):
-        # Extraer datos relevantes del resultado
-        lead_name = None
-        ultimo_agente = None
-        email_draft = None
-        profile_data = None
-        
-        # Extraer el nombre del lead desde el input
-        input_text = result.input if hasattr(result, 'input') else ""
-        if "lead:" in input_text:
-            lead_parts = input_text.split("lead: ")[1].split("(")[0].strip()
-            lead_name = lead_parts
-        
-        # Obtener el último agente
-        ultimo_agente = result.last_agent.name if hasattr(result, 'last_agent') else "Desconocido"
-        
-        # Extraer información del correo electrónico del mensaje final
-        final_output = result.final_output if hasattr(result, 'final_output') else ""
-        
-        # Extraer el borrador del correo (contenido entre las líneas de triple guión)
-        asunto = "No especificado"
-        if "---" in final_output:
-            parts = final_output.split("---")
-            if len(parts) >= 3:
-                email_draft = parts[1].strip()
-                asunto = extract_email_subject(email_draft)
-        
-        # Añadir sección del lead al reporte Markdown
-        md_content += f"## Lead {i+1}: {lead_name or 'Desconocido'}\n\n"
-        
-        # Para email y descripción, buscar en los leads originales
-        for lead in leads:
-            if lead["name"] == lead_name:
-                if "email" in lead:
-                    md_content += f"**Email:** {lead['email']}\n\n"
-                if "description" in lead:
-                    md_content += f"**Descripción:** {lead['description']}\n\n"
-                break
-        
-        md_content += f"**Último Agente:** {ultimo_agente}\n\n"
-        
-        # Construir un texto consolidado para buscar perfiles
-        all_text = final_output
-        
-        # Agregar texto de todos los new_items
-        if hasattr(result, 'new_items'):
-            for item in result.new_items:
-                if hasattr(item, 'output') and isinstance(item.output, str):
-                    all_text += "\n" + item.output
-                # También revisar en raw_item
-                if hasattr(item, 'raw_item'):
-                    if hasattr(item.raw_item, 'output') and isinstance(item.raw_item.output, str):
-                        all_text += "\n" + item.raw_item.output
-        
-        # Buscar perfil en el texto consolidado
-        profile_lines = extract_profile_from_text(all_text)
-        if profile_lines:
-            md_content += "### Perfil del Lead\n\n"
-            md_content += "\n".join(profile_lines) + "\n\n"
-        
-        if email_draft:
-            md_content += f"### Correo Generado\n\n"
-            md_content += f"**Asunto:** {asunto}\n\n"
-            
-            # Limpiar formato del email para Markdown
-            clean_email = email_draft.replace("**Asunto:**", "").strip()
-            # Eliminar cualquier línea que contenga el asunto
-            lines = clean_email.split("\n")
-            clean_lines = []
-            for line in lines:
-                if not re.search(r"(A|a)sunto:", line):
-                    clean_lines.append(line)
-            clean_email = "\n".join(clean_lines).strip()
-            
-            md_content += "```\n"
-            md_content += clean_email + "\n"
-            md_content += "```\n\n"
-        else:
-            md_content += "### No se generó correo para este lead\n\n"
-        
-        md_content += "---\n\n"
-    
-    # Escribir el reporte (sobreescribiendo cualquier versión anterior)
-    with open(report_file, "w", encoding="utf-8") as f:
-        f.write(md_content)
-    
-    print(f"\n✅ Reporte generado: {report_file}")
-    
-    return report_file 
\ No newline at end of file
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.pop("number", None)
+            profile = record.pop("profile", None)
+            yield LeadResult(
+                **record, profile=LeadProfile.from_dict(profile) if profile else None
+            )
@@ -1,60 +1,147 @@
 import asyncio
-from typing import Any, Callable, List, TypeVar, Dict, Awaitable
+import os
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Iterable, List, Tuple, TypeVar, Dict, Awaitable
+
+from miscs.providers import load_config
+
+load_config()
 
 T = TypeVar("T")
 InputType = TypeVar("InputType")
 ResultType = TypeVar("ResultType")
 
+# Número máximo de tareas en vuelo al mismo tiempo (tamaño de la ventana)
+MAX_CONCURRENT_TASKS = int(os.environ.get("LEAD_CONCURRENCY", "8"))
+
+
+async def _iter_completed(
+    process_function: Callable[[InputType], Awaitable[ResultType]],
+    inputs: Iterable[InputType],
+    max_concurrency: int,
+) -> AsyncIterator[Tuple[int, InputType, ResultType]]:
+    """
+    Núcleo del planificador: produce (índice, entrada, resultado) a medida que terminan.
+
+    Mantiene como máximo `max_concurrency` tareas en vuelo y solo toma la siguiente
+    entrada cuando se libera un hueco (backpressure sobre `inputs`).
+    """
+    pending_inputs = enumerate(inputs)
+    in_flight: Dict[asyncio.Task, tuple] = {}
+
+    def fill_window():
+        # Backpressure: solo se consume una nueva entrada por cada hueco libre
+        while len(in_flight) < max_concurrency:
+            try:
+                index, input_item = next(pending_inputs)
+            except StopIteration:
+                return
+            task = asyncio.ensure_future(process_function(input_item))
+            in_flight[task] = (index, input_item)
+
+    try:
+        fill_window()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, input_item = in_flight.pop(task)
+                yield index, input_item, task.result()
+            fill_window()
+    finally:
+        # Si algo falla o el consumidor deja de iterar, cancelar las tareas en vuelo y
+        # esperar a que terminen, para que su limpieza (checkpoints, huecos) llegue a correr
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def iter_tasks_as_completed(
+    process_function: Callable[[InputType], Awaitable[ResultType]],
+    inputs: Iterable[InputType],
+    max_concurrency: int = None,
+) -> AsyncIterator[Tuple[InputType, ResultType]]:
+    """
+    Ejecuta tareas en paralelo y produce cada resultado en cuanto se completa.
+
+    Args:
+        process_function: La función asíncrona que se ejecutará para cada entrada
+        inputs: Iterable de elementos de entrada a procesar
+        max_concurrency: Máximo de tareas simultáneas (por defecto LEAD_CONCURRENCY)
+
+    Yields:
+        Tuplas (entrada, resultado) en orden de finalización
+    """
+    max_concurrency = max(1, max_concurrency or MAX_CONCURRENT_TASKS)
+    # aclosing: si el consumidor deja de iterar, el planificador cancela sus tareas ya
+    async with aclosing(_iter_completed(process_function, inputs, max_concurrency)) as completed:
+        async for _, input_item, result in completed:
+            yield input_item, result
+
 
 async def run_tasks_in_parallel(
     process_function: Callable[[InputType], Awaitable[ResultType]],
-    inputs: List[InputType],
+    inputs: Iterable[InputType],
     show_progress: bool = True,
     result_handler: Callable[[InputType, ResultType], None] = None,
+    max_concurrency: int = None,
+    collect_results: bool = True,
 ) -> List[ResultType]:
     """
-    Ejecuta múltiples tareas en paralelo usando asyncio.
+    Ejecuta múltiples tareas en paralelo usando asyncio con concurrencia acotada.
+
+    Mantiene como máximo `max_concurrency` tareas en vuelo y solo toma la siguiente
+    entrada cuando se libera un hueco, por lo que `inputs` puede ser un generador
+    perezoso de cualquier tamaño.
 
     Args:
         process_function: La función asíncrona que se ejecutará para cada entrada
-        inputs: Lista de elementos de entrada a procesar
+        inputs: Iterable de elementos de entrada a procesar
         show_progress: Indica si se muestran mensajes de progreso
         result_handler: Callback opcional para manejar cada resultado cuando se completa
+        max_concurrency: Máximo de tareas simultáneas (por defecto LEAD_CONCURRENCY)
+        collect_results: Si es False no se acumulan los resultados y la memoria se
+            mantiene constante; usar junto con `result_handler`
 
     Returns:
-        Lista de resultados de todas las entradas procesadas
+        Lista de resultados en el orden de las entradas (vacía si collect_results es False)
     """
-    if show_progress:
-        print(f"Procesando {len(inputs)} elementos en paralelo...\n")
+    max_concurrency = max(1, max_concurrency or MAX_CONCURRENT_TASKS)
 
-    # Crear tareas para cada entrada
-    tasks = [process_function(input_item) for input_item in inputs]
-
-    # Procesar todas las tareas en paralelo
-    results = await asyncio.gather(*tasks)
+    if show_progress:
+        total = f"{len(inputs)} elementos" if hasattr(inputs, "__len__") else "elementos"
+        print(f"Procesando {total} en paralelo (máximo {max_concurrency} a la vez)...\n")
 
-    # Manejar resultados si se proporciona un manejador
-    if result_handler:
-        for input_item, result in zip(inputs, results):
+    results: Dict[int, ResultType] = {}
+    async for index, input_item, result in _iter_completed(
+        process_function, inputs, max_concurrency
+    ):
+        # Manejar el resultado en cuanto se completa
+        if result_handler:
             result_handler(input_item, result)
+        if collect_results:
+            results[index] = result
 
-    return results
+    return [results[index] for index in sorted(results)]
 
 
 async def run_dict_tasks_in_parallel(
     process_function: Callable[[Dict[str, Any]], Awaitable[ResultType]],
-    input_dicts: List[Dict[str, Any]],
+    input_dicts: Iterable[Dict[str, Any]],
     show_progress: bool = True,
     result_handler: Callable[[Dict[str, Any], ResultType], None] = None,
+    max_concurrency: int = None,
+    collect_results: bool = True,
 ) -> List[ResultType]:
     """
     Ejecuta múltiples tareas con entradas de diccionario en paralelo usando asyncio.
 
     Args:
         process_function: La función asíncrona que se ejecutará para cada diccionario de entrada
-        input_dicts: Lista de diccionarios de entrada a procesar
+        input_dicts: Iterable de diccionarios de entrada a procesar
         show_progress: Indica si se muestran mensajes de progreso
         result_handler: Callback opcional para manejar cada resultado cuando se completa
+        max_concurrency: Máximo de tareas simultáneas (por defecto LEAD_CONCURRENCY)
+        collect_results: Si es False no se acumulan los resultados en memoria
 
     Returns:
         Lista de resultados de todas las entradas procesadas
@@ -64,4 +151,32 @@ async def run_dict_tasks_in_parallel(
         inputs=input_dicts,
         show_progress=show_progress,
         result_handler=result_handler,
+        max_concurrency=max_concurrency,
+        collect_results=collect_results,
     )
+
+
+async def iter_dict_tasks_as_completed(
+    process_function: Callable[[Dict[str, Any]], Awaitable[ResultType]],
+    input_dicts: Iterable[Dict[str, Any]],
+    max_concurrency: int = None,
+    result_handler: Callable[[Dict[str, Any], ResultType], None] = None,
+) -> AsyncIterator[Tuple[Dict[str, Any], ResultType]]:
+    """
+    Variante en streaming de run_dict_tasks_in_parallel.
+
+    Args:
+        process_function: La función asíncrona que se ejecutará para cada diccionario de entrada
+        input_dicts: Iterable de diccionarios de entrada a procesar
+        max_concurrency: Máximo de tareas simultáneas (por defecto LEAD_CONCURRENCY)
+        result_handler: Callback opcional que se invoca antes de producir cada resultado
+
+    Yields:
+        Tuplas (diccionario de entrada, resultado) en cuanto cada tarea termina
+    """
+    completed = iter_tasks_as_completed(process_function, input_dicts, max_concurrency=max_concurrency)
+    async with aclosing(completed):
+        async for input_dict, result in completed:
+            if result_handler:
+                result_handler(input_dict, result)
+            yield input_dict, result
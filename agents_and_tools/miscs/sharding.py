@@ -0,0 +1,137 @@
+"""
+Reparto de un lote de leads en shards que se procesan en procesos o máquinas distintas.
+
+Cada shard corre con su propio event loop y sus propios pools de conexiones y procesa
+solo los leads cuyo hash cae en su índice. El hash es el de la clave del registro de
+trabajos (`lead_key`: SHA-256 de nombre + URL + email), así que el reparto es el mismo en cualquier proceso
+o máquina y no depende de PYTHONHASHSEED ni del orden del archivo de entrada.
+
+Cada shard escribe su reporte, sus métricas y su registro de trabajos por separado; al
+final `merge_shards` los une en un único reporte y en el colector de métricas. Las
+métricas se guardan al terminar el shard, así que también marcan que su salida está
+completa: un shard sin métricas se considera fallido y no se une.
+"""
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Tuple
+
+from miscs.concurrency import PROVIDER_LIMITS, configure_provider_limits
+from miscs.job_store import JOB_STORE_PATH
+from miscs.metrics import METRICS, MetricsCollector
+from miscs.providers import load_config
+from miscs.rate_limit import PROVIDER_QUOTAS, configure_provider_quotas
+from miscs.reporting import ReportWriter, read_lead_results
+from models.sales import lead_key
+
+load_config()
+
+# Directorio con la salida de cada shard (en una ruta compartida si hay varias máquinas)
+SHARD_OUTPUT_ROOT = os.environ.get("SHARD_OUTPUT_ROOT", os.path.join("output", "shards"))
+# Repartir las cuotas y la concurrencia de cada proveedor entre los shards; desactivarlo
+# si cada máquina usa sus propias claves
+SHARD_SPLIT_QUOTAS = os.environ.get("SHARD_SPLIT_QUOTAS", "1") == "1"
+
+SHARD_METRICS_FILE = "metrics.json"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` de `count` (índices desde 0)"""
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Shard inválido: {self.index} de {self.count}")
+
+    @property
+    def label(self) -> str:
+        return f"{self.index}-of-{self.count}"
+
+    def output_dir(self, root: str = SHARD_OUTPUT_ROOT) -> str:
+        """Directorio del reporte y las métricas del shard"""
+        return os.path.join(root, self.label)
+
+    def job_store_path(self) -> str:
+        """Registro de trabajos propio del shard, para que `--resume` no compita por SQLite"""
+        base, extension = os.path.splitext(JOB_STORE_PATH)
+        return f"{base}-{self.label}{extension}"
+
+    def owns(self, lead: dict) -> bool:
+        return shard_index(lead, self.count) == self.index
+
+
+def shard_index(lead: dict, count: int) -> int:
+    """Shard al que pertenece un lead; estable entre procesos, máquinas y ejecuciones"""
+    key = lead_key(lead.get("name", ""), lead.get("linkedin_url", ""), lead.get("email", ""))
+    return int(key[:16], 16) % count
+
+
+def iter_shard(leads: Iterable[dict], shard: Shard) -> Iterator[dict]:
+    """Filtra de forma perezosa los leads del shard"""
+    return (lead for lead in leads if shard.owns(lead))
+
+
+def all_shards(count: int) -> List[Shard]:
+    return [Shard(index, count) for index in range(count)]
+
+
+def split_provider_quotas(count: int):
+    """
+    Divide entre `count` shards las cuotas y los límites de concurrencia del proceso.
+
+    Los limitadores viven en cada proceso, así que sin este ajuste N shards harían N
+    veces las peticiones por minuto permitidas por la cuenta.
+    """
+    if count <= 1 or not SHARD_SPLIT_QUOTAS:
+        return
+    configure_provider_quotas(
+        **{
+            provider: (
+                requests_per_minute / count,
+                tokens_per_minute / count if tokens_per_minute else None,
+            )
+            for provider, (requests_per_minute, tokens_per_minute) in PROVIDER_QUOTAS.items()
+        }
+    )
+    configure_provider_limits(
+        **{provider: max(1, limit // count) for provider, limit in PROVIDER_LIMITS.items()}
+    )
+
+
+def clear_shard_output(shard: Shard):
+    """Borra la salida de una ejecución anterior del shard, para no unir datos obsoletos"""
+    if os.path.isdir(shard.output_dir()):
+        shutil.rmtree(shard.output_dir())
+
+
+def save_shard_metrics(shard: Shard, collector: MetricsCollector = METRICS):
+    collector.dump(os.path.join(shard.output_dir(), SHARD_METRICS_FILE))
+
+
+def merge_shards(
+    shards: List[Shard], output_dir: str = "output", collector: MetricsCollector = METRICS
+) -> Tuple[str, List[Shard]]:
+    """
+    Une los reportes de los shards en `output_dir` y sus métricas en `collector`.
+
+    Los leads quedan agrupados por shard, en el orden en que terminó cada uno. Los
+    shards sin reporte o sin métricas (no terminaron) se omiten.
+
+    Returns:
+        (ruta del reporte combinado, shards sin salida completa)
+    """
+    missing = []
+    with ReportWriter(output_dir) as writer:
+        for shard in shards:
+            report_path = os.path.join(shard.output_dir(), "report.jsonl")
+            metrics_path = os.path.join(shard.output_dir(), SHARD_METRICS_FILE)
+            if not (os.path.exists(report_path) and os.path.exists(metrics_path)):
+                missing.append(shard)
+                continue
+            for result in read_lead_results(report_path):
+                writer.write(result)
+            collector.load(metrics_path)
+    return writer.report_file, missing
@@ -1,7 +1,6 @@
 import os
 import logging
-from dotenv import load_dotenv
-from agents import set_default_openai_key
+from miscs.providers import load_config
 
 
 # Initialize logging - set to WARNING to suppress most logs
@@ -18,7 +17,9 @@ def setup_logging():
 # Load environment variables and set up API keys
 def load_api_keys():
     """Load environment variables and set up API keys"""
-    load_dotenv()
+    from agents import set_default_openai_key
+
+    load_config()
 
     # Get and set OpenAI API key
     openai_api_key = os.environ.get("OPENAI_API_KEY")
@@ -1,11 +1,186 @@
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+import hashlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
 
+# Valor de relleno cuando la extracción no encuentra un campo del perfil
+UNKNOWN = "Unknown"
+NO_RECENT_ACTIVITY = "No hay información de actividad reciente disponible"
 
-@dataclass
+
+def _known(value: Any) -> bool:
+    return bool(value) and value != UNKNOWN
+
+
+@dataclass(slots=True)
+class Experience:
+    title: str = UNKNOWN
+    company: str = UNKNOWN
+    duration: str = UNKNOWN
+
+
+@dataclass(slots=True)
+class LeadProfile:
+    """Perfil del lead con la estructura de LINKEDIN_PROFILE_SCHEMA"""
+
+    current_role: str = UNKNOWN
+    company: str = UNKNOWN
+    industry: str = UNKNOWN
+    experience: List[Experience] = field(default_factory=lambda: [Experience()])
+    education: List[str] = field(default_factory=lambda: [UNKNOWN])
+    interests: List[str] = field(default_factory=lambda: [UNKNOWN])
+    recent_activity: str = NO_RECENT_ACTIVITY
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LeadProfile":
+        """
+        Construir el perfil a partir de la salida de una extracción o de un checkpoint.
+
+        Tolera las variantes habituales del modelo: perfil anidado bajo `profile`,
+        `headline` en lugar de `current_role`, experiencia con fechas de inicio y fin
+        y educación como objetos.
+        """
+        if isinstance(data.get("profile"), dict):
+            data = data["profile"]
+
+        experience = [
+            Experience(
+                title=entry.get("title", UNKNOWN),
+                company=entry.get("company", UNKNOWN),
+                duration=entry.get("duration")
+                or f"{entry.get('start_date', '')} - {entry.get('end_date', 'Present')}",
+            )
+            for entry in data.get("experience") or []
+            if isinstance(entry, dict)
+        ] or [Experience()]
+
+        education = data.get("education")
+        if isinstance(education, list):
+            education = [
+                f"{entry.get('degree', 'Degree')} at {entry.get('institution', 'Institution')}"
+                if isinstance(entry, dict)
+                else entry
+                for entry in education
+                if isinstance(entry, (dict, str))
+            ]
+        else:
+            education = [UNKNOWN]
+
+        interests = data.get("interests", [UNKNOWN])
+        if not isinstance(interests, list):
+            interests = [UNKNOWN]
+
+        return cls(
+            current_role=data.get("current_role") or data.get("headline") or UNKNOWN,
+            company=data.get("company") or experience[0].company,
+            industry=data.get("industry", UNKNOWN),
+            experience=experience,
+            education=education,
+            interests=interests,
+            recent_activity=data.get("recent_activity") or NO_RECENT_ACTIVITY,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary_lines(self) -> List[str]:
+        """Líneas de resumen con viñeta para la consola y el reporte"""
+        lines = [
+            f"  • Rol actual: {self.current_role} en {self.company}",
+            f"  • Industria: {self.industry}",
+        ]
+        if self.education and _known(self.education[0]):
+            lines.append(f"  • Educación: {self.education[0]}")
+        if self.interests and _known(self.interests[0]):
+            lines.append(f"  • Intereses clave: {', '.join(self.interests[:3])}")
+        return lines
+
+    def to_prompt(self) -> str:
+        """
+        Serialización compacta para prompts: una línea por campo conocido, sin claves
+        JSON ni valores "Unknown".
+        """
+        lines = []
+        if _known(self.current_role) or _known(self.company):
+            lines.append(f"Rol actual: {self.current_role} en {self.company}")
+        if _known(self.industry):
+            lines.append(f"Industria: {self.industry}")
+        experience = [
+            f"{entry.title} en {entry.company} ({entry.duration})"
+            for entry in self.experience
+            if _known(entry.title)
+        ]
+        if experience:
+            lines.append(f"Experiencia: {'; '.join(experience)}")
+        education = [entry for entry in self.education if _known(entry)]
+        if education:
+            lines.append(f"Educación: {'; '.join(education)}")
+        interests = [entry for entry in self.interests if _known(entry)]
+        if interests:
+            lines.append(f"Intereses: {', '.join(interests)}")
+        if _known(self.recent_activity) and self.recent_activity != NO_RECENT_ACTIVITY:
+            lines.append(f"Actividad reciente: {self.recent_activity}")
+        return "\n".join(lines)
+
+
+@dataclass(slots=True)
 class SalesContext:
-    name: Optional[str]
-    linkedin_url: Optional[str]
-    description: Optional[str] = None
-    profile_data: Optional[Dict[str, Any]] = None
+    """Estado de un lead compartido por las herramientas y los agentes"""
+
+    name: str
+    linkedin_url: str = ""
+    description: str = ""
+    email: str = ""
+    profile: Optional[LeadProfile] = None
     email_draft: Optional[str] = None
+    email_subject: Optional[str] = None
+    # Callback opcional para recibir el correo en streaming (ver generate_email)
+    email_stream_handler: Optional[Callable[[str, str], Any]] = None
+
+
+def lead_key(name: str, linkedin_url: str = "", email: str = "") -> str:
+    """
+    Identidad estable de un lead: SHA-256 de nombre (sin distinguir mayúsculas), URL y email.
+
+    La comparten la deduplicación de la ingesta, el registro de trabajos y el reparto en
+    shards, así que dos leads que la ingesta considera distintos nunca comparten checkpoints.
+    """
+    identity = "\x1f".join(((name or "").casefold(), linkedin_url or "", (email or "").lower()))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def build_sales_context(lead: Dict[str, Any]) -> SalesContext:
+    """Construir el contexto inicial de un lead a partir de su diccionario de entrada"""
+    return SalesContext(
+        name=lead["name"],
+        linkedin_url=lead.get("linkedin_url") or "",
+        description=lead.get("description") or "",
+        email=lead.get("email") or "",
+    )
+
+
+@dataclass(slots=True)
+class LeadResult:
+    """Resultado estructurado de un lead, tomado directamente de su SalesContext"""
+
+    name: str
+    linkedin_url: str
+    description: str = ""
+    email: str = ""
+    # Quién produjo el resultado: "Pipeline determinista", el último agente del grafo...
+    last_agent: str = ""
+    profile: Optional[LeadProfile] = None
+    email_subject: Optional[str] = None
+    email_body: Optional[str] = None
+    elapsed: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    # Tokens de las rondas de los agentes (0 en el pipeline determinista)
+    orchestration_tokens: int = 0
+    # True si el lead ya estaba terminado y se recuperó del registro de trabajos
+    resumed: bool = False
+    error: Optional[str] = None
+
+    @property
+    def has_email(self) -> bool:
+        return bool(self.email_body or self.email_subject)
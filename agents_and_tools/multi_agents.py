@@ -1,9 +1,18 @@
 import os
+import argparse
 import asyncio
 import json
+import logging
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Optional
 
-from models.sales import SalesContext
+from models.sales import SalesContext, build_sales_context
 from prompts.sales import (
     COLD_EMAIL_SPECIALIST_INSTRUCTIONS,
     SALES_DEVELOPMENT_REP_INSTRUCTIONS,
@@ -11,92 +20,157 @@ from prompts.sales import (
     SALES_TEAM_LEAD_INSTRUCTIONS,
 )
 
-from agents import Agent, RunContextWrapper, RunResult, Runner, handoff
-from agents.extensions.handoff_prompt import prompt_with_handoff_instructions
+from agent_tools.scrape_and_extract_linkedin_profile import scraper_cache_stats
+from agent_tools.tavily_search import search_cache_stats
+from agent_tools.utils.linkedin_markdown import TRIM_STATS
+from data.ingest import IngestStats, iter_leads
+from data.sales_leads import leads as sample_leads
+from miscs.run_parallel_agents import (
+    MAX_CONCURRENT_TASKS,
+    iter_dict_tasks_as_completed,
+    run_dict_tasks_in_parallel,
+)
+from miscs.reporting import ReportWriter
+from miscs.job_store import EMAILED, LeadJobStore
+from miscs.llm_cache import invalidate_prompt_version
+from miscs.metrics import METRICS, lead_scope
+from miscs.providers import PROVIDERS
+from miscs.sharding import (
+    SHARD_OUTPUT_ROOT,
+    Shard,
+    all_shards,
+    clear_shard_output,
+    iter_shard,
+    merge_shards,
+    save_shard_metrics,
+    split_provider_quotas,
+)
+from models.sales import LeadResult
+from sales_pipeline import (
+    build_lead_result,
+    restored_lead_result,
+    run_batch_email_campaign,
+    run_sales_pipeline,
+)
 
-from agent_tools.scrape_and_extract_linkedin_profile import extract_linkedin_profile
-from agent_tools.research_lead_with_tavily import research_lead_with_tavily
-from agent_tools.tool_generate_outbound_email import generate_email
-from data.sales_leads import leads
-from miscs.run_parallel_agents import run_dict_tasks_in_parallel
-from miscs.reporting import generate_lead_report
+if TYPE_CHECKING:
+    from agents import Agent, RunContextWrapper, RunResult
 
 
-async def on_handoff_callback(ctx: RunContextWrapper[SalesContext]):
+async def on_handoff_callback(ctx: "RunContextWrapper[SalesContext]"):
     print("\n🔄 Handoff ocurrió")
 
 
-# AGENTEs
-sales_team_lead = Agent[SalesContext](
-    name="Sales Team Lead",
-    instructions=prompt_with_handoff_instructions(SALES_TEAM_LEAD_INSTRUCTIONS),
-    model="gpt-4o",
-)
+@lru_cache(maxsize=None)
+def build_sales_team() -> "Agent[SalesContext]":
+    """
+    Construye el grafo de agentes la primera vez que se usa y devuelve el agente inicial.
 
-sales_development_rep = Agent[SalesContext](
-    name="Sales Development Rep",
-    instructions=prompt_with_handoff_instructions(SALES_DEVELOPMENT_REP_INSTRUCTIONS),
-    tools=[extract_linkedin_profile],
-    model="gpt-4o",
-)
+    El SDK de agentes y las herramientas `function_tool` solo se importan aquí, así que
+    los modos pipeline y batch arrancan sin cargarlos.
+    """
+    from agents import Agent, handoff
+    from agents.extensions.handoff_prompt import prompt_with_handoff_instructions
 
-# Nuevo agente usando búsqueda Tavily en lugar de raspado de LinkedIn
-sales_development_rep_tavily = Agent[SalesContext](
-    name="Sales Development Rep with Tavily",
-    instructions=prompt_with_handoff_instructions(SALES_DEVELOPMENT_REP_TAVILY_INSTRUCTIONS),
-    tools=[research_lead_with_tavily],
-    model="gpt-4o",
-)
+    from agent_tools.function_tools import (
+        extract_linkedin_profile,
+        generate_email,
+        research_lead_with_tavily,
+    )
 
-cold_email_specialist = Agent[SalesContext](
-    name="Cold Email Specialist",
-    instructions=prompt_with_handoff_instructions(COLD_EMAIL_SPECIALIST_INSTRUCTIONS),
-    tools=[generate_email],
-    model="gpt-4o",
-)
+    # AGENTEs
+    sales_team_lead = Agent[SalesContext](
+        name="Sales Team Lead",
+        instructions=prompt_with_handoff_instructions(SALES_TEAM_LEAD_INSTRUCTIONS),
+        model="gpt-4o",
+    )
+
+    sales_development_rep = Agent[SalesContext](
+        name="Sales Development Rep",
+        instructions=prompt_with_handoff_instructions(SALES_DEVELOPMENT_REP_INSTRUCTIONS),
+        tools=[extract_linkedin_profile],
+        model="gpt-4o",
+    )
+
+    # Nuevo agente usando búsqueda Tavily en lugar de raspado de LinkedIn
+    sales_development_rep_tavily = Agent[SalesContext](
+        name="Sales Development Rep with Tavily",
+        instructions=prompt_with_handoff_instructions(SALES_DEVELOPMENT_REP_TAVILY_INSTRUCTIONS),
+        tools=[research_lead_with_tavily],
+        model="gpt-4o",
+    )
+
+    cold_email_specialist = Agent[SalesContext](
+        name="Cold Email Specialist",
+        instructions=prompt_with_handoff_instructions(COLD_EMAIL_SPECIALIST_INSTRUCTIONS),
+        tools=[generate_email],
+        model="gpt-4o",
+    )
+
+    # Configuración original de handoff usando raspador de LinkedIn
+    # sales_team_lead.handoffs = [
+    #     handoff(agent=sales_development_rep, on_handoff=on_handoff_callback),
+    #     handoff(agent=cold_email_specialist, on_handoff=on_handoff_callback),
+    # ]
+
+    # Nueva configuración de handoff usando investigación Tavily
+    sales_team_lead.handoffs = [
+        handoff(agent=sales_development_rep_tavily, on_handoff=on_handoff_callback),
+        handoff(agent=cold_email_specialist, on_handoff=on_handoff_callback),
+    ]
+
+    # Handoff original para el agente basado en LinkedIn
+    sales_development_rep.handoffs = [
+        handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
+    ]
 
-# Configuración original de handoff usando raspador de LinkedIn
-# sales_team_lead.handoffs = [
-#     handoff(agent=sales_development_rep, on_handoff=on_handoff_callback),
-#     handoff(agent=cold_email_specialist, on_handoff=on_handoff_callback),
-# ]
+    # Handoff para el nuevo agente basado en Tavily
+    sales_development_rep_tavily.handoffs = [
+        handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
+    ]
 
-# Nueva configuración de handoff usando investigación Tavily
-sales_team_lead.handoffs = [
-    handoff(agent=sales_development_rep_tavily, on_handoff=on_handoff_callback),
-    handoff(agent=cold_email_specialist, on_handoff=on_handoff_callback),
-]
+    cold_email_specialist.handoffs = [
+        handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
+    ]
 
-# Handoff original para el agente basado en LinkedIn
-sales_development_rep.handoffs = [
-    handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
-]
+    return sales_team_lead
 
-# Handoff para el nuevo agente basado en Tavily
-sales_development_rep_tavily.handoffs = [
-    handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
-]
 
-cold_email_specialist.handoffs = [
-    handoff(agent=sales_team_lead, on_handoff=on_handoff_callback)
-]
+@lru_cache(maxsize=None)
+def get_metrics_hooks():
+    """Hooks compartidos por todas las ejecuciones para medir turnos, handoffs y herramientas"""
+    from miscs.agent_logger import AgentMetricsHooks
 
+    return AgentMetricsHooks()
 
-async def process_sales_lead(lead: dict) -> RunResult:
+
+def orchestration_tokens(result: "RunResult") -> int:
+    """Tokens consumidos por las rondas de los agentes"""
+    return sum(response.usage.total_tokens for response in result.raw_responses)
+
+
+AGENTS_LABEL = "Grafo de agentes"
+
+# Mensaje inicial del grafo: la instrucción fija primero y los datos del lead al final,
+# para que el prefijo de la conversación sea igual en todos los leads
+LEAD_TASK_PROMPT = (
+    "Tenemos un nuevo lead. Por favor, coordina el proceso para investigar este lead y "
+    "crear un correo electrónico de prospección personalizado.\n\n"
+    "Lead: {name} ({linkedin_url})"
+)
+
+
+async def process_sales_lead(lead: dict, job_store: Optional[LeadJobStore] = None) -> LeadResult:
     """Procesar un lead de ventas a través del flujo de trabajo multi-agente"""
-    name = lead["name"]
-    linkedin_url = lead["linkedin_url"]
-    description = lead.get("description", "")
-    email = lead.get("email", "")
-
-    context: SalesContext = {
-        "name": name,
-        "linkedin_url": linkedin_url,
-        "description": description,
-        "email": email,
-        "profile_data": None,
-        "email_draft": None,
-    }
+    context: SalesContext = build_sales_context(lead)
+    if job_store and job_store.restore(context) == EMAILED:
+        return restored_lead_result(context, AGENTS_LABEL)
+    # Los agentes deciden su propia secuencia: se reinicia desde cero si el lead no terminó
+    context = build_sales_context(lead)
+    name = context.name
+    linkedin_url = context.linkedin_url
+    description = context.description
+    email = context.email
 
     print(f"\n🔍 Procesando lead: {name} ({linkedin_url})")
     if description:
@@ -104,46 +178,344 @@ async def process_sales_lead(lead: dict) -> RunResult:
     if email:
         print(f"   ✉️ Email: {email}")
 
-    final_result = await Runner.run(
-        starting_agent=sales_team_lead,
-        input=f"Tenemos un nuevo lead: {name} ({linkedin_url}). Por favor, coordina el proceso para investigar este lead y crear un correo electrónico de prospección personalizado.",
-        context=context,
-        max_turns=15,
-    )
+    from agents import Runner
+
+    with lead_scope(name):
+        started = time.perf_counter()
+        try:
+            final_result = await Runner.run(
+                starting_agent=build_sales_team(),
+                input=LEAD_TASK_PROMPT.format(name=name, linkedin_url=linkedin_url),
+                context=context,
+                max_turns=15,
+                hooks=get_metrics_hooks(),
+            )
+        except Exception as e:
+            if not job_store:
+                raise
+            job_store.mark_failed(context, str(e))
+            print(f"❌ Lead fallido, se reintentará con --resume: {name} ({e})")
+            return build_lead_result(
+                context, AGENTS_LABEL, time.perf_counter() - started, error=str(e)
+            )
+        elapsed = time.perf_counter() - started
+        METRICS.record("lead", "agents", elapsed)
 
-    return final_result
+    if job_store:
+        job_store.checkpoint(context)
+    return build_lead_result(
+        context,
+        final_result.last_agent.name,
+        elapsed,
+        orchestration_tokens=orchestration_tokens(final_result),
+    )
 
 
-def display_lead_result(lead: dict, final_result: RunResult):
+def display_lead_result(lead: dict, result: LeadResult):
     print("Resultados finales:")
     print(f"""
-    Input: {final_result.input}
-    Mensaje final del agente: {final_result.final_output}
-    Último agente: {final_result.last_agent.name}
+    Lead: {result.name} ({result.linkedin_url})
+    Asunto: {result.email_subject or 'No especificado'}
+    Correo: {result.email_body or result.error or 'No se generó correo'}
+    Último agente: {result.last_agent}
     """)
 
 
-async def process_multiple_leads_in_parallel():
-    """Procesar una lista de leads predefinidos en paralelo"""
+# Modos de ejecución: pipeline determinista (por defecto) o grafo de agentes (opt-in)
+PROCESS_FUNCTIONS = {
+    "agents": process_sales_lead,
+    "pipeline": run_sales_pipeline,
+}
+
+
+async def process_multiple_leads_in_parallel(
+    mode: str = "pipeline",
+    resume: bool = False,
+    input_path: Optional[str] = None,
+    shard: Optional[Shard] = None,
+):
+    """
+    Procesar en paralelo los leads de `input_path` (o los de ejemplo de data/sales_leads.py)
+
+    Cada etapa terminada se guarda en el registro de trabajos; con `resume` se conservan
+    los checkpoints de la ejecución anterior y solo se repite el trabajo pendiente. Cada
+    lead se añade al reporte en cuanto termina. Con `shard` solo se procesan los leads
+    de ese shard, con su propio registro de trabajos, reporte y métricas.
+
+    Returns:
+        Resultados en el orden de entrada; con `input_path` no se acumulan en memoria y
+        se devuelve una lista vacía (están en output/report.jsonl)
+    """
     print("\n===== Sistema Multi-Agente de Prospección de Ventas =====")
+    print(f"Modo: {mode}" + (f" (shard {shard.label})" if shard else ""))
 
-    results = await run_dict_tasks_in_parallel(
-        process_function=process_sales_lead,
-        input_dicts=leads,
-        show_progress=True,
-        result_handler=display_lead_result,
-    )
-    
-    # Generar reporte de leads
-    report_file = generate_lead_report(results, leads)
+    ingest_stats = IngestStats()
+    source = iter_leads(input_path, stats=ingest_stats) if input_path else sample_leads
+    if shard:
+        source = iter_shard(source, shard)
+
+    job_store = LeadJobStore(shard.job_store_path()) if shard else LeadJobStore()
+    if resume:
+        print(f"Reanudando lote: {job_store.counts()}")
+
+    # Los leads se leen a medida que el planificador libera huecos
+    tracked_leads = job_store.track(source, reset=not resume)
+
+    def handle_result(lead: dict, result):
+        display_lead_result(lead, result)
+        report.write(result)
+
+    with ReportWriter(shard.output_dir() if shard else "output") as report:
+        if mode == "batch":
+            # Campaña sin requisitos de latencia: correos generados con la Batch API; el
+            # batch necesita todos los contextos, así que aquí sí se guardan los leads
+            leads = list(tracked_leads)
+            results = await run_batch_email_campaign(leads, job_store=job_store)
+            for lead, result in zip(leads, results):
+                handle_result(lead, result)
+        else:
+            # Cada lead se muestra y se añade al reporte en cuanto termina; con --input
+            # no se acumulan los resultados para mantener la memoria constante
+            print(f"Procesando leads en paralelo (máximo {MAX_CONCURRENT_TASKS} a la vez)...\n")
+            results = []
+            async for _, result in iter_dict_tasks_as_completed(
+                partial(PROCESS_FUNCTIONS[mode], job_store=job_store),
+                tracked_leads,
+                result_handler=handle_result,
+            ):
+                if input_path is None:
+                    results.append(result)
+
+    if input_path:
+        print(
+            f"\n📥 Entrada: {ingest_stats.read} filas, {ingest_stats.accepted} leads, "
+            f"{ingest_stats.invalid} inválidas, {ingest_stats.duplicates} duplicadas"
+        )
     
+    # Liberar los pools de conexiones compartidos
+    await PROVIDERS.aclose()
+
+    cache_stats = search_cache_stats()
+    if cache_stats:
+        print(
+            f"\n🗄️ Cache de Tavily: {cache_stats['hits']} aciertos, "
+            f"{cache_stats['misses']} fallos ({cache_stats['entries']} entradas)"
+        )
+    page_cache_stats = scraper_cache_stats()
+    if page_cache_stats:
+        print(
+            f"🗄️ Cache de páginas de LinkedIn: {page_cache_stats['hits']} aciertos, "
+            f"{page_cache_stats['misses']} fallos ({page_cache_stats['entries']} entradas)"
+        )
+    if TRIM_STATS.pages:
+        print(
+            f"✂️ Páginas de LinkedIn recortadas: {TRIM_STATS.pages}, "
+            f"{TRIM_STATS.input_tokens} → {TRIM_STATS.output_tokens} tokens "
+            f"(-{TRIM_STATS.reduction:.0%}, {TRIM_STATS.truncated} al límite, "
+            f"{TRIM_STATS.unrecognized} sin secciones reconocidas)"
+        )
+
+    print(f"\n{METRICS.report()}")
+    print(f"\n📒 Estado del lote: {job_store.counts()}")
+    job_store.close()
+    if shard:
+        save_shard_metrics(shard)
+
     return results
 
 
+async def compare_modes(input_path: Optional[str] = None):
+    """Ejecutar los leads con ambos modos y mostrar el ahorro de latencia y tokens"""
+    # Ambos modos recorren los mismos leads, así que aquí sí se cargan en memoria
+    leads = list(iter_leads(input_path)) if input_path else sample_leads
+    summary = {}
+    # El pipeline va primero: el grafo de agentes corre después con las caches calientes,
+    # así que el ahorro mostrado es una cota inferior
+    for mode in ("pipeline", "agents"):
+        process_function = PROCESS_FUNCTIONS[mode]
+
+        async def timed(lead, process_function=process_function):
+            started = time.perf_counter()
+            result = await process_function(lead)
+            return result, time.perf_counter() - started
+
+        timed_results = await run_dict_tasks_in_parallel(
+            process_function=timed, input_dicts=leads, show_progress=False
+        )
+        latencies = [elapsed for _, elapsed in timed_results]
+        tokens = [result.orchestration_tokens for result, _ in timed_results]
+        summary[mode] = {
+            "latency": statistics.mean(latencies),
+            "tokens": statistics.mean(tokens),
+        }
+
+    await PROVIDERS.aclose()
+
+    agents, pipeline = summary["agents"], summary["pipeline"]
+    print("\n===== Comparación de modos (media por lead) =====")
+    print(f"{'Modo':<10} {'Latencia (s)':>14} {'Tokens orquestación':>22}")
+    for mode, values in summary.items():
+        print(f"{mode:<10} {values['latency']:>14.2f} {values['tokens']:>22.0f}")
+    if agents["latency"]:
+        saved = 1 - pipeline["latency"] / agents["latency"]
+        print(f"\nAhorro de latencia: {saved:.0%}")
+    print(f"Ahorro de tokens por lead: {agents['tokens'] - pipeline['tokens']:.0f}")
+    print(f"\n{METRICS.report()}")
+
+    return summary
+
+
+def run_shard(mode: str, resume: bool, input_path: Optional[str], shard: Shard) -> Shard:
+    """
+    Procesar un shard en el proceso actual, con su propio event loop y pools de conexiones.
+
+    Es el punto de entrada de cada proceso de `run_sharded` y de `--shard-index` cuando
+    los shards se reparten entre varias máquinas.
+    """
+    clear_shard_output(shard)
+    split_provider_quotas(shard.count)
+    asyncio.run(process_multiple_leads_in_parallel(mode, resume, input_path, shard=shard))
+    return shard
+
+
+def merge_shard_outputs(shards) -> bool:
+    """
+    Unir los reportes y las métricas de los shards y mostrar el resumen combinado.
+
+    Returns:
+        True si todos los shards tenían su salida completa
+    """
+    METRICS.reset()
+    _, missing = merge_shards(shards)
+    if missing:
+        print(f"⚠️ Shards sin salida completa, omitidos: {', '.join(shard.label for shard in missing)}")
+    print(f"\n{METRICS.report()}")
+    return not missing
+
+
+def run_sharded(mode: str, workers: int, resume: bool = False, input_path: Optional[str] = None):
+    """
+    Repartir los leads entre `workers` procesos y unir sus reportes y métricas.
+
+    Cada proceso lee la entrada completa y se queda con los leads de su shard. Se usa
+    el método spawn para que cada shard arranque un intérprete limpio, sin heredar
+    conexiones SQLite ni event loops del padre. Solo se unen los shards que terminaron.
+
+    Returns:
+        True si todos los shards terminaron
+    """
+    shards = all_shards(workers)
+    print(f"Repartiendo los leads en {workers} procesos...")
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(run_shard, mode, resume, input_path, shard): shard for shard in shards
+        }
+        failed = []
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                future.result()
+                print(f"✅ Shard {shard.label} terminado")
+            except Exception as e:
+                failed.append(shard)
+                print(f"❌ Shard {shard.label} fallido: {e}")
+
+    completed = merge_shard_outputs([shard for shard in shards if shard not in failed])
+    return completed and not failed
+
+
 def main():
     """Punto de entrada principal para la aplicación"""
+    parser = argparse.ArgumentParser(description="Sistema Multi-Agente de Prospección de Ventas")
+    parser.add_argument(
+        "--mode",
+        choices=sorted(PROCESS_FUNCTIONS) + ["batch"],
+        default="pipeline",
+        help=(
+            "'pipeline' ejecuta las etapas sin orquestador; 'agents' usa el grafo de agentes; "
+            "'batch' genera todos los correos con la Batch API de OpenAI"
+        ),
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Ejecutar ambos modos y mostrar el ahorro de latencia y tokens",
+    )
+    parser.add_argument(
+        "--input",
+        help=(
+            "Archivo de leads CSV o JSONL (admite .gz) o '-' para leer CSV de stdin; "
+            "por defecto se usan los leads de data/sales_leads.py"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reanudar el último lote omitiendo los leads y etapas ya terminados",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos entre los que se reparten los leads (uno por núcleo)",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="Procesar solo este shard (desde 0), para repartir el lote entre máquinas",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help="Total de shards al usar --shard-index",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help=f"Unir los reportes y las métricas de N shards de {SHARD_OUTPUT_ROOT}",
+    )
+    parser.add_argument(
+        "--invalidate-prompt-version",
+        metavar="VERSION",
+        help="Eliminar de la cache las extracciones guardadas con esa versión de prompt y salir",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index y --shard-count se usan juntos")
+    if args.compare and (args.workers > 1 or args.shard_count):
+        parser.error("--compare no admite shards")
+    if args.workers > 1 and args.input == "-":
+        parser.error("--workers necesita un archivo de entrada: cada proceso lee la entrada completa")
+
+    if args.invalidate_prompt_version:
+        removed = invalidate_prompt_version(args.invalidate_prompt_version)
+        print(f"🗑️ Extracciones eliminadas de la cache: {removed}")
+        return
+    if args.merge_shards:
+        if not merge_shard_outputs(all_shards(args.merge_shards)):
+            sys.exit(1)
+        return
+
     print("Iniciando Sistema Multi-Agente de Prospección de Ventas...")
-    asyncio.run(process_multiple_leads_in_parallel())
+    if args.compare:
+        asyncio.run(compare_modes(args.input))
+    elif args.shard_count:
+        try:
+            shard = Shard(args.shard_index, args.shard_count)
+        except ValueError as e:
+            parser.error(str(e))
+        run_shard(args.mode, args.resume, args.input, shard)
+    elif args.workers > 1:
+        if not run_sharded(args.mode, args.workers, resume=args.resume, input_path=args.input):
+            sys.exit(1)
+    else:
+        asyncio.run(
+            process_multiple_leads_in_parallel(args.mode, resume=args.resume, input_path=args.input)
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""
+Pipeline determinista de prospección: investigación → perfil → correo, sin agente orquestador.
+
+Ejecuta las mismas herramientas que el flujo multi-agente como etapas asíncronas fijas,
+evitando las rondas de gpt-4o que el Líder del Equipo de Ventas usa para decidir una
+secuencia que siempre es la misma.
+"""
+import time
+from typing import Iterable, List, Optional
+
+from models.sales import LeadResult, SalesContext, build_sales_context
+from miscs.metrics import METRICS, lead_scope
+from agent_tools.research_lead_with_tavily import is_fallback_profile, research_lead
+from agent_tools.tool_generate_outbound_email import (
+    EmailStreamHandler,
+    split_email,
+    write_outbound_email,
+)
+from agent_tools.batch_email import generate_emails_in_batch
+from miscs.job_store import EMAILED, LeadJobStore
+from miscs.run_parallel_agents import run_dict_tasks_in_parallel
+
+PIPELINE_AGENT_NAME = "Pipeline determinista"
+BATCH_AGENT_NAME = "Campaña batch"
+
+
+def build_lead_result(
+    context: SalesContext,
+    last_agent: str,
+    elapsed: float,
+    error: Optional[str] = None,
+    resumed: bool = False,
+    orchestration_tokens: int = 0,
+) -> LeadResult:
+    """
+    Construir el resultado estructurado de un lead a partir de su contexto.
+
+    Los tokens y el costo salen de los totales de METRICS para el lead, que se
+    descartan una vez leídos para que la memoria no crezca con el lote.
+    """
+    subject, body = split_email(context.email_draft) if context.email_draft else (None, None)
+    totals = METRICS.pop_lead_totals(context.name)
+    return LeadResult(
+        name=context.name,
+        linkedin_url=context.linkedin_url,
+        description=context.description,
+        email=context.email,
+        last_agent=last_agent,
+        profile=context.profile,
+        email_subject=context.email_subject or subject,
+        email_body=body,
+        elapsed=elapsed,
+        input_tokens=int(totals["input_tokens"]),
+        output_tokens=int(totals["output_tokens"]),
+        cost=totals["cost"],
+        orchestration_tokens=orchestration_tokens,
+        resumed=resumed,
+        error=error,
+    )
+
+
+def restored_lead_result(context: SalesContext, last_agent: str) -> LeadResult:
+    """Resultado de un lead ya terminado en una ejecución anterior"""
+    print(f"⏭️ Lead ya procesado en una ejecución anterior: {context.name}")
+    return build_lead_result(context, last_agent, elapsed=0.0, resumed=True)
+
+
+async def run_sales_pipeline(
+    lead: dict,
+    email_stream_handler: Optional[EmailStreamHandler] = None,
+    job_store: Optional[LeadJobStore] = None,
+) -> LeadResult:
+    """
+    Procesar un lead con etapas fijas, sin enrutamiento por LLM
+
+    Args:
+        lead: Diccionario del lead (name, linkedin_url y opcionalmente description/email)
+        email_stream_handler: Callback opcional para recibir el correo en streaming
+        job_store: Registro donde guardar cada etapa terminada; si el lead ya tiene
+            checkpoints, se omiten las etapas completadas
+    """
+    context = build_sales_context(lead)
+    context.email_stream_handler = email_stream_handler
+    name = context.name
+    linkedin_url = context.linkedin_url
+
+    state = job_store.restore(context) if job_store else None
+    if state == EMAILED:
+        return restored_lead_result(context, PIPELINE_AGENT_NAME)
+
+    print(f"\n🔍 Procesando lead (pipeline): {name} ({linkedin_url})")
+    started = time.perf_counter()
+
+    with lead_scope(name):
+        try:
+            # Etapa 1: investigación web y perfil estructurado
+            # Un lead fallido en la etapa de correo conserva su perfil y no se reinvestiga
+            if not context.profile:
+                with METRICS.timer("stage", "research"):
+                    profile = await research_lead(context, name, linkedin_url)
+                if job_store:
+                    # Con registro, un perfil de respaldo se reintenta en la próxima ejecución
+                    # en lugar de pagar un correo sin información
+                    if is_fallback_profile(profile):
+                        raise RuntimeError(profile.recent_activity)
+                    job_store.checkpoint(context)
+
+            # Etapa 2: correo personalizado
+            with METRICS.timer("stage", "email"):
+                await write_outbound_email(context)
+            if job_store:
+                job_store.checkpoint(context)
+        except Exception as e:
+            if not job_store:
+                raise
+            # El fallo queda registrado y no detiene el resto del lote
+            job_store.mark_failed(context, str(e))
+            print(f"❌ Lead fallido, se reintentará con --resume: {name} ({e})")
+            return build_lead_result(
+                context, PIPELINE_AGENT_NAME, time.perf_counter() - started, error=str(e)
+            )
+
+        elapsed = time.perf_counter() - started
+        METRICS.record("lead", "pipeline", elapsed)
+
+    return build_lead_result(context, PIPELINE_AGENT_NAME, elapsed)
+
+
+async def run_batch_email_campaign(
+    leads: Iterable[dict], batch_client=None, job_store: Optional[LeadJobStore] = None
+) -> List[LeadResult]:
+    """
+    Procesar una campaña completa con los correos generados por la Batch API.
+
+    Investiga todos los leads en paralelo y luego envía un único batch con los
+    prompts de correo; pensado para campañas nocturnas sin requisitos de latencia.
+
+    Args:
+        leads: Leads a procesar (puede ser un generador)
+        batch_client: Cliente compatible con AsyncOpenAI para el batch (por defecto el compartido)
+        job_store: Registro de checkpoints; los leads ya investigados o con correo no se repiten
+    """
+
+    async def research_stage(lead: dict):
+        context = build_sales_context(lead)
+        started = time.perf_counter()
+        state = job_store.restore(context) if job_store else None
+        if state == EMAILED or context.profile:
+            return context, 0.0
+        with lead_scope(context.name):
+            with METRICS.timer("stage", "research"):
+                profile = await research_lead(context, context.name, context.linkedin_url)
+        if job_store:
+            if is_fallback_profile(profile):
+                job_store.mark_failed(context, profile.recent_activity)
+                context.profile = None
+            else:
+                job_store.checkpoint(context)
+        return context, time.perf_counter() - started
+
+    researched = await run_dict_tasks_in_parallel(
+        process_function=research_stage, input_dicts=leads, show_progress=True
+    )
+    # Solo van al batch los leads que aún no tienen correo
+    pending = [context for context, _ in researched if not context.email_draft]
+
+    await generate_emails_in_batch(pending, client=batch_client)
+    if job_store:
+        for context in pending:
+            job_store.checkpoint(context)
+
+    return [
+        build_lead_result(
+            context,
+            BATCH_AGENT_NAME,
+            elapsed,
+            error=None if context.email_draft else "No se generó el correo en el batch",
+        )
+        for context, elapsed in researched
+    ]
@@ -0,0 +1,8 @@
+"""
+Configuración común de las pruebas: añade agents_and_tools al path, igual que al
+ejecutar multi_agents.py, para importar los módulos como `miscs.cache`, `data.ingest`...
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
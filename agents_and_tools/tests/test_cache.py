@@ -0,0 +1,100 @@
+"""Pruebas de PersistentCache (TTL, desalojo LRU, etiquetas) y LazyCache."""
+import time
+
+from miscs.cache import LazyCache, PersistentCache
+
+
+def test_set_get_and_stats(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    key = PersistentCache.make_key("tavily", "Ana Pérez", 3)
+
+    assert cache.get(key) is None
+    cache.set(key, {"results": [1, 2]})
+    assert cache.get(key) == {"results": [1, 2]}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    cache.close()
+
+
+def test_make_key_is_stable():
+    assert PersistentCache.make_key("a", 1) == PersistentCache.make_key("a", 1)
+    assert PersistentCache.make_key("a", 1) != PersistentCache.make_key("a", 2)
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), ttl=0.05)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_eviction_keeps_most_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(PersistentCache, "EVICTION_INTERVAL", 5)
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), max_entries=3)
+    for index in range(4):
+        cache.set(f"key-{index}", index)
+        time.sleep(0.01)
+    # key-0 es la más antigua pero se lee, así que pasa a ser la más reciente
+    assert cache.get("key-0") == 0
+    time.sleep(0.01)
+    cache.set("key-4", 4)
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get("key-0") == 0
+    assert cache.get("key-1") is None
+    assert cache.get("key-2") is None
+    cache.close()
+
+
+def test_invalidate_by_tag(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    cache.set("a", 1, tag="v1")
+    cache.set("b", 2, tag="v1")
+    cache.set("c", 3, tag="v2")
+
+    assert cache.invalidate("v1") == 2
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+    assert cache.invalidate() == 1
+    cache.close()
+
+
+def test_lazy_cache_opens_on_first_use(tmp_path):
+    path = tmp_path / "lazy" / "cache.sqlite"
+    lazy = LazyCache(lambda: True, str(path))
+
+    assert lazy.stats() == {}
+    assert not path.exists()
+    cache = lazy.get()
+    assert cache is lazy.get()
+    assert path.exists()
+    cache.close()
+
+
+def test_lazy_cache_checks_toggle_on_every_use(tmp_path):
+    enabled = True
+    lazy = LazyCache(lambda: enabled, str(tmp_path / "cache.sqlite"))
+    cache = lazy.get()
+    assert cache is not None
+
+    enabled = False
+    assert lazy.get() is None
+    enabled = True
+    assert lazy.get() is cache
+    cache.close()
+
+
+def test_disabled_lazy_cache_never_opens(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    lazy = LazyCache(lambda: False, str(path))
+
+    assert lazy.get() is None
+    assert lazy.stats() == {}
+    assert not path.exists()
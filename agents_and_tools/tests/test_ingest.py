@@ -0,0 +1,92 @@
+"""Pruebas de la normalización, la lectura y la deduplicación de leads."""
+import gzip
+import json
+
+import pytest
+
+from data.ingest import IngestStats, SeenKeys, iter_leads, normalize_lead
+
+
+def test_normalize_lead_accepts_aliases():
+    lead = normalize_lead(
+        {
+            " Nombre ": "  Ana   Pérez ",
+            "LinkedIn": "https://www.linkedin.com/in/ana-perez/?trk=feed",
+            "Cargo": "Head of Growth",
+            "Correo": "Ana@Acme.COM",
+        }
+    )
+
+    assert lead == {
+        "name": "Ana Pérez",
+        "linkedin_url": "https://www.linkedin.com/in/ana-perez",
+        "description": "Head of Growth",
+        "email": "ana@acme.com",
+    }
+
+
+def test_normalize_lead_optional_fields():
+    assert normalize_lead({"name": "Ana Pérez"}) == {"name": "Ana Pérez", "linkedin_url": ""}
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"name": "  "},
+        {"name": "Ana", "linkedin_url": "https://example.com/ana"},
+        {"name": "Ana", "email": "no-es-un-email"},
+    ],
+)
+def test_normalize_lead_rejects_invalid_rows(row):
+    with pytest.raises(ValueError):
+        normalize_lead(row)
+
+
+def test_iter_leads_csv_counts_invalid_and_duplicates(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text(
+        "name,linkedin_url,email\n"
+        "Ana Pérez,https://linkedin.com/in/ana,ana@acme.com\n"
+        "ANA PÉREZ,https://www.linkedin.com/in/ana/,ANA@acme.com\n"
+        "Ana Pérez,https://linkedin.com/in/ana,ana@otra.com\n"
+        ",https://linkedin.com/in/nadie,\n",
+        encoding="utf-8",
+    )
+    stats = IngestStats()
+
+    leads = list(iter_leads(str(path), stats=stats))
+
+    assert [lead["email"] for lead in leads] == ["ana@acme.com", "ana@otra.com"]
+    assert stats == IngestStats(read=4, accepted=2, invalid=1, duplicates=1)
+
+
+def test_iter_leads_gzipped_jsonl(tmp_path):
+    path = tmp_path / "leads.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as stream:
+        stream.write(json.dumps({"name": "Carlos Muñoz"}) + "\n\n")
+        stream.write("[1, 2]\n")
+        stream.write("{no es json}\n")
+        stream.write(json.dumps({"nombre": "Marta Ríos", "descripcion": "VP of Sales"}) + "\n")
+    stats = IngestStats()
+
+    leads = list(iter_leads(str(path), stats=stats))
+
+    assert [lead["name"] for lead in leads] == ["Carlos Muñoz", "Marta Ríos"]
+    assert leads[1]["description"] == "VP of Sales"
+    assert (stats.read, stats.invalid) == (4, 2)
+
+
+def test_iter_leads_without_dedupe(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text("name\nAna\nAna\n", encoding="utf-8")
+
+    assert len(list(iter_leads(str(path), dedupe=False))) == 2
+
+
+def test_seen_keys():
+    seen = SeenKeys(cache_kb=64)
+
+    assert seen.add("a") is False
+    assert seen.add("b") is False
+    assert seen.add("a") is True
+    seen.close()
@@ -0,0 +1,90 @@
+"""Pruebas del registro de trabajos: estados, checkpoints y reanudación."""
+from miscs.job_store import EMAILED, FAILED, QUEUED, RESEARCHED, LeadJobStore
+from models.sales import LeadProfile, SalesContext
+
+LEAD = {"name": "Ana Pérez", "linkedin_url": "https://linkedin.com/in/ana", "email": "ana@acme.com"}
+
+
+def _context(**fields) -> SalesContext:
+    return SalesContext(**{**LEAD, **fields})
+
+
+def test_unknown_lead_is_not_restored(tmp_path):
+    store = LeadJobStore(str(tmp_path / "jobs.sqlite"))
+
+    assert store.restore(_context()) is None
+    store.close()
+
+
+def test_track_registers_leads_lazily(tmp_path):
+    store = LeadJobStore(str(tmp_path / "jobs.sqlite"))
+    leads = [{"name": f"Lead {index}"} for index in range(5)]
+
+    tracked = store.track(iter(leads), chunk_size=2)
+    assert next(tracked) == leads[0]
+    assert store.counts() == {QUEUED: 2}
+    assert list(tracked) == leads[1:]
+    assert store.counts() == {QUEUED: 5}
+    store.close()
+
+
+def test_checkpoints_survive_reopening(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = LeadJobStore(path)
+    store.enqueue([LEAD])
+
+    context = _context()
+    store.checkpoint(context)
+    assert store.restore(_context()) == QUEUED
+
+    context.profile = LeadProfile(current_role="Head of Growth", company="Acme Corp")
+    store.checkpoint(context)
+    assert store.counts() == {RESEARCHED: 1}
+
+    context.email_draft = "Hola Ana, ..."
+    context.email_subject = "Growth en Acme"
+    store.checkpoint(context)
+    store.close()
+
+    reopened = LeadJobStore(path)
+    restored = _context()
+    assert reopened.restore(restored) == EMAILED
+    assert restored.profile.company == "Acme Corp"
+    assert restored.email_draft == "Hola Ana, ..."
+    assert restored.email_subject == "Growth en Acme"
+    reopened.close()
+
+
+def test_same_name_with_other_email_is_another_lead(tmp_path):
+    store = LeadJobStore(str(tmp_path / "jobs.sqlite"))
+    store.enqueue([LEAD])
+
+    assert store.restore(_context(email="ana@otra.com")) is None
+    store.close()
+
+
+def test_enqueue_keeps_state_unless_reset(tmp_path):
+    store = LeadJobStore(str(tmp_path / "jobs.sqlite"))
+    store.enqueue([LEAD])
+    store.checkpoint(_context(profile=LeadProfile()))
+
+    store.enqueue([LEAD])
+    assert store.counts() == {RESEARCHED: 1}
+    store.enqueue([LEAD], reset=True)
+    assert store.counts() == {QUEUED: 1}
+    store.close()
+
+
+def test_mark_failed_keeps_checkpoints_and_counts_attempts(tmp_path):
+    store = LeadJobStore(str(tmp_path / "jobs.sqlite"))
+    store.checkpoint(_context(profile=LeadProfile(company="Acme Corp")))
+
+    store.mark_failed(_context(), "timeout")
+    store.mark_failed(_context(), "timeout")
+
+    restored = _context()
+    assert store.restore(restored) == FAILED
+    assert restored.profile.company == "Acme Corp"
+    (attempts,) = store._conn.execute("SELECT attempts FROM lead_jobs").fetchone()
+    assert attempts == 2
+    store.close()
@@ -0,0 +1,52 @@
+"""Pruebas del recorte de páginas de LinkedIn con las páginas de `benchmarks/fixtures/linkedin`."""
+import json
+from pathlib import Path
+
+import pytest
+
+from agent_tools.utils.linkedin_markdown import clean_line, trim_linkedin_markdown
+
+FIXTURES_DIR = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "linkedin"
+EXPECTED = json.loads((FIXTURES_DIR / "expected.json").read_text(encoding="utf-8"))
+BUDGET = 2500
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_fixture_pages(name):
+    expected = EXPECTED[name]
+    page = trim_linkedin_markdown((FIXTURES_DIR / name).read_text(encoding="utf-8"), BUDGET)
+
+    for text in expected.get("keep", []):
+        assert text in page.text
+    for text in expected.get("drop", []):
+        assert text not in page.text
+    assert set(expected["sections"]) <= set(page.sections)
+    assert page.truncated == expected.get("truncated", False)
+    assert page.output_tokens <= BUDGET
+    assert page.saved_tokens > 0
+
+
+def test_clean_line_removes_images_and_urls():
+    line = "![logo](https://media.licdn.com/x.png) [Acme Corp](https://linkedin.com/company/acme?trk=x)"
+
+    assert clean_line(line) == "Acme Corp"
+    assert clean_line("- ![foto](https://media.licdn.com/y.png)") == ""
+    assert clean_line("Ver https://example.com/post") == "Ver"
+
+
+def test_unrecognized_page_keeps_clean_text():
+    page = trim_linkedin_markdown("Sign in\nTexto libre del perfil\nJoin now\n")
+
+    assert page.sections == []
+    assert page.text == "Texto libre del perfil"
+    assert not page.truncated
+
+
+def test_small_budget_is_a_hard_cap():
+    markdown = "# Ana Pérez\nHead of Growth\n## About\n" + "Frase sobre growth. " * 500
+
+    page = trim_linkedin_markdown(markdown, token_budget=100)
+
+    assert page.output_tokens <= 100
+    assert page.truncated
+    assert page.text.startswith("# Ana Pérez")
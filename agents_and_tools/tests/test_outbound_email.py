@@ -0,0 +1,37 @@
+"""Pruebas de la separación del asunto y el cuerpo del correo generado."""
+import pytest
+
+from agent_tools.tool_generate_outbound_email import extract_subject, split_email
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Asunto: Growth en Acme",
+        "asunto:Growth en Acme",
+        "**Asunto:** Growth en Acme",
+        "# Asunto: Growth en Acme",
+        "**Asunto: Growth en Acme**",
+    ],
+)
+def test_split_email_markdown_variants(line):
+    subject, body = split_email(f"{line}\n\nHola Ana,\n\nSaludos")
+
+    assert subject == "Growth en Acme"
+    assert body == "Hola Ana,\n\nSaludos"
+
+
+def test_split_email_without_subject():
+    assert split_email("  Hola Ana,\n\nSaludos\n") == (None, "Hola Ana,\n\nSaludos")
+
+
+def test_extract_subject_waits_for_complete_line():
+    assert extract_subject("Asunto: Growth en") is None
+    assert extract_subject("Asunto: Growth en Acme\nHo") == "Growth en Acme"
+
+
+def test_subject_only_the_first_line_is_removed():
+    subject, body = split_email("Asunto: Uno\nHola\nAsunto: Dos")
+
+    assert subject == "Uno"
+    assert body == "Hola\nAsunto: Dos"
@@ -0,0 +1,115 @@
+"""Pruebas del token bucket, la lectura de Retry-After y la clasificación de errores."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from miscs import rate_limit
+from miscs.rate_limit import (
+    TokenBucket,
+    _backoff_delay,
+    _classify,
+    _retry_after,
+    call_with_retry,
+    configure_provider_quotas,
+)
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # Sin saldo: a 1 token por segundo hay que esperar ~1 segundo
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_bucket_rate_factor_slows_refill():
+    bucket = TokenBucket(rate_per_minute=60, capacity=1)
+    bucket.reserve()
+
+    assert bucket.reserve(rate_factor=0.5) == pytest.approx(2.0, abs=0.05)
+
+
+def test_default_capacity_is_ten_seconds_of_quota():
+    assert TokenBucket(600).capacity == 100
+    assert TokenBucket(3).capacity == 1.0
+
+
+def test_retry_after_headers():
+    assert _retry_after(HTTPError(429, {"retry-after": "7"})) == 7.0
+    assert _retry_after(HTTPError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after(HTTPError(429, {"retry-after": "Wed, 21 Oct 2015"})) is None
+    assert _retry_after(HTTPError(429)) is None
+    assert _retry_after(ValueError("sin respuesta")) is None
+
+
+def test_classify():
+    assert _classify(HTTPError(429)) == (True, True)
+    assert _classify(HTTPError(503)) == (True, False)
+    assert _classify(HTTPError(400)) == (False, False)
+    assert _classify(asyncio.TimeoutError()) == (True, False)
+    assert _classify(type("APIConnectionError", (Exception,), {})()) == (True, False)
+    assert _classify(ValueError()) == (False, False)
+
+
+def test_backoff_never_below_retry_after():
+    for attempt in range(1, 10):
+        delay = _backoff_delay(attempt, None)
+        assert 0 < delay <= rate_limit.MAX_DELAY
+    assert _backoff_delay(1, 30.0) == 30.0
+
+
+def test_configure_provider_quotas_rejects_non_positive():
+    with pytest.raises(ValueError):
+        configure_provider_quotas(tavily=(0, None))
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    """Cuota holgada y esperas de backoff registradas en lugar de dormidas."""
+    monkeypatch.setitem(rate_limit.PROVIDER_QUOTAS, "tavily", (6000, None))
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", sleep)
+    return delays
+
+
+def test_call_with_retry_honours_retry_after(fast_retries):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise HTTPError(429, {"retry-after": "12"})
+        return "ok"
+
+    assert asyncio.run(call_with_retry("tavily", flaky)) == "ok"
+    assert len(calls) == 3
+    assert fast_retries == [12.0, 12.0]
+
+
+def test_call_with_retry_does_not_retry_client_errors(fast_retries):
+    calls = []
+
+    async def bad_request():
+        calls.append(1)
+        raise HTTPError(400)
+
+    with pytest.raises(HTTPError):
+        asyncio.run(call_with_retry("tavily", bad_request))
+    assert len(calls) == 1
+    assert fast_retries == []
@@ -0,0 +1,77 @@
+"""Pruebas de la deduplicación, el orden y el recorte de los resultados de búsqueda."""
+from agent_tools.utils.search_results import build_search_context, canonical_url, select_results
+from miscs.rate_limit import estimate_tokens
+
+NAME = "Ana Pérez"
+DESCRIPTION = "Head of Growth en Acme Corp"
+
+
+def _result(url, content, title="", score=0.5):
+    return {"url": url, "title": title, "content": content, "score": score}
+
+
+def test_canonical_url_drops_tracking_and_formatting():
+    assert canonical_url("https://www.Example.com/path/?utm_source=x&b=2&a=1#top") == (
+        "example.com/path?a=1&b=2"
+    )
+    assert canonical_url("http://example.com/path?trk=feed") == "example.com/path"
+
+
+def test_duplicate_urls_keep_the_most_relevant():
+    results = [
+        _result("https://example.com/a?utm_source=feed", "Texto sin relación alguna", score=0.1),
+        _result("https://www.example.com/a/", "Ana Pérez dirige growth en Acme Corp", score=0.1),
+    ]
+
+    selected = select_results(results, NAME, DESCRIPTION)
+
+    assert len(selected) == 1
+    assert "Ana Pérez" in selected[0]["content"]
+
+
+def test_near_duplicate_content_is_dropped():
+    text = "Ana Pérez es Head of Growth en Acme Corp y lidera el equipo de adquisición desde 2021"
+    results = [
+        _result("https://a.com", text, score=0.9),
+        _result("https://b.com", text + ".", score=0.8),
+        _result("https://c.com", "Entrevista sobre onboarding self-service en SaaS B2B", score=0.7),
+    ]
+
+    urls = [result["url"] for result in select_results(results, NAME, DESCRIPTION)]
+
+    assert urls == ["https://a.com", "https://c.com"]
+
+
+def test_results_mentioning_the_lead_rank_first():
+    results = [
+        _result("https://other.com", "Noticias generales del sector", score=0.9),
+        _result("https://lead.com", "Perfil de Ana Pérez en Acme Corp", score=0.2),
+    ]
+
+    assert select_results(results, NAME, DESCRIPTION)[0]["url"] == "https://lead.com"
+
+
+def test_context_respects_token_budget():
+    results = [
+        _result(f"https://site{index}.com", f"Ana Pérez {index} " + "palabra " * 400)
+        for index in range(5)
+    ]
+
+    context = build_search_context(results, NAME, DESCRIPTION, token_budget=300)
+
+    assert estimate_tokens(context) <= 300
+    assert context.startswith("1. ")
+    assert context.rstrip().endswith("…")
+
+
+def test_context_lists_every_result_within_budget():
+    results = [
+        _result("https://a.com", "Ana Pérez en Acme Corp", title="Perfil"),
+        _result("https://b.com", "Charla sobre growth en SaaS B2B", title="Charla"),
+    ]
+
+    context = build_search_context(results, NAME, DESCRIPTION, token_budget=1000)
+
+    assert "1. Perfil\n   URL: https://a.com" in context
+    assert "2. Charla\n   URL: https://b.com" in context
+    assert "…" not in context
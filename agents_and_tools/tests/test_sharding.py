@@ -0,0 +1,60 @@
+"""Pruebas del reparto de leads en shards y del reparto de cuotas entre ellos."""
+import pytest
+
+from miscs import concurrency, rate_limit, sharding
+from miscs.sharding import Shard, all_shards, iter_shard, shard_index, split_provider_quotas
+
+
+def test_shard_validation():
+    assert Shard(2, 3).label == "2-of-3"
+    for index, count in ((3, 3), (-1, 3), (0, 0)):
+        with pytest.raises(ValueError):
+            Shard(index, count)
+
+
+def test_shard_index_is_stable_and_uses_the_lead_key():
+    lead = {"name": "Ana Pérez", "linkedin_url": "https://linkedin.com/in/ana"}
+
+    assert shard_index(lead, 7) == shard_index(dict(lead), 7)
+    assert shard_index({**lead, "name": "ANA PÉREZ"}, 7) == shard_index(lead, 7)
+    assert 0 <= shard_index(lead, 7) < 7
+
+
+def test_every_lead_belongs_to_exactly_one_shard():
+    leads = [{"name": f"Lead {index}", "email": f"lead{index}@acme.com"} for index in range(300)]
+    shards = all_shards(4)
+
+    parts = [list(iter_shard(leads, shard)) for shard in shards]
+
+    assert sorted(lead["name"] for part in parts for lead in part) == sorted(
+        lead["name"] for lead in leads
+    )
+    # Con 300 leads ningún shard debería quedar vacío ni con casi todo el lote
+    assert all(30 < len(part) < 120 for part in parts)
+
+
+@pytest.fixture
+def quotas(monkeypatch):
+    monkeypatch.setattr(
+        rate_limit,
+        "PROVIDER_QUOTAS",
+        {"openai": (500.0, 200000.0), "tavily": (100.0, None)},
+    )
+    monkeypatch.setattr(sharding, "PROVIDER_QUOTAS", rate_limit.PROVIDER_QUOTAS)
+    monkeypatch.setattr(concurrency, "PROVIDER_LIMITS", {"openai": 16, "tavily": 3})
+    monkeypatch.setattr(sharding, "PROVIDER_LIMITS", concurrency.PROVIDER_LIMITS)
+    monkeypatch.setattr(sharding, "SHARD_SPLIT_QUOTAS", True)
+
+
+def test_split_provider_quotas(quotas):
+    split_provider_quotas(4)
+
+    assert rate_limit.PROVIDER_QUOTAS == {"openai": (125.0, 50000.0), "tavily": (25.0, None)}
+    assert concurrency.PROVIDER_LIMITS == {"openai": 4, "tavily": 1}
+
+
+def test_single_shard_keeps_quotas(quotas):
+    split_provider_quotas(1)
+
+    assert rate_limit.PROVIDER_QUOTAS["openai"] == (500.0, 200000.0)
+    assert concurrency.PROVIDER_LIMITS["openai"] == 16